@@ -0,0 +1,285 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from facebook_batch import GRAPH_URL
+from outbox import slot_key
+from prefetch_queue import Prefetcher, freshness_hours, get_default_prefetch_queue, upcoming_slots
+from quote_cards import strip_image_suggestion
+
+DEFAULT_STORE_PATH = os.path.join('state', 'scheduled_posts.db')
+DEFAULT_DAYS = 7
+# Facebook accepts scheduled_publish_time from 10 minutes to 30 days ahead
+MIN_LEAD = timedelta(minutes=10)
+MAX_LEAD = timedelta(days=30)
+RECONCILE_GRACE = 15 * 60       # seconds after a slot before checking it was published
+MISSING_AFTER = 6 * 3600        # a post still unpublished this long after its slot is re-sent
+
+# Scheduled post states
+SCHEDULED = 'scheduled'
+PUBLISHED = 'published'
+MISSING = 'missing'
+
+
+class ScheduledPostStore:
+    """Posts handed to a platform's own scheduler, kept until they are confirmed published"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('SCHEDULED_POSTS_PATH', DEFAULT_STORE_PATH)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scheduled_posts (
+                    poster TEXT NOT NULL,
+                    platform TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    slot_at REAL NOT NULL,
+                    post_id TEXT NOT NULL,
+                    outbox_key TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    checked_at REAL,
+                    last_error TEXT,
+                    PRIMARY KEY (poster, platform, target, slot_at)
+                )
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def add(self, poster, platform, target, slot, post_id, outbox_key):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scheduled_posts "
+                "(poster, platform, target, slot_at, post_id, outbox_key, state) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (poster, platform, str(target), slot.timestamp(), post_id, outbox_key, SCHEDULED)
+            )
+
+    def scheduled_targets(self, poster, platform, slot):
+        """Targets that already have a post scheduled for this slot"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT target FROM scheduled_posts WHERE poster = ? AND platform = ? AND slot_at = ?",
+                (poster, platform, slot.timestamp())
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def due_for_check(self, now=None):
+        """Scheduled posts whose slot passed more than RECONCILE_GRACE ago"""
+        now = now or time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT poster, platform, target, slot_at, post_id, outbox_key FROM scheduled_posts "
+                "WHERE state = ? AND slot_at <= ? ORDER BY slot_at",
+                (SCHEDULED, now - RECONCILE_GRACE)
+            ).fetchall()
+
+    def set_state(self, poster, platform, target, slot_at, state, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE scheduled_posts SET state = ?, checked_at = ?, last_error = ? "
+                "WHERE poster = ? AND platform = ? AND target = ? AND slot_at = ?",
+                (state, time.time(), error, poster, platform, target, slot_at)
+            )
+
+    def summary(self):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT poster, platform, target, slot_at, post_id, state, last_error FROM scheduled_posts "
+                "ORDER BY slot_at DESC LIMIT 50"
+            ).fetchall()
+
+
+class BulkScheduler:
+    """Generates upcoming posts in one pass and hands them to the platforms' own schedulers.
+
+    Facebook posters upload every slot in the horizon as unpublished posts
+    with scheduled_publish_time, through the Graph batch endpoint. Each is
+    recorded as published in the outbox and queued for its slot, so the
+    poster's own run (if one is still scheduled) publishes nothing twice.
+    Twitter and LinkedIn have no scheduling in the APIs used here, so those
+    jobs fall back to the prefetch queue and still need the daemon at
+    publish time. reconcile() later checks what Facebook actually published.
+
+    jobs are (name, poster_class, run_args, schedule) tuples, as for Prefetcher.
+    """
+
+    def __init__(self, jobs, store=None, queue=None, **poster_options):
+        self.jobs = jobs
+        self.store = store or get_default_scheduled_post_store()
+        self.prefetcher = Prefetcher(jobs, queue or get_default_prefetch_queue(), **poster_options)
+
+    def run(self, days=None, now=None):
+        """Schedule every slot in the next days. Returns the number of page posts scheduled plus posts queued."""
+        days = float(days or os.getenv('BULK_SCHEDULE_DAYS', DEFAULT_DAYS))
+        now = now or datetime.now()
+        until = now + min(timedelta(days=days), MAX_LEAD)
+        total = 0
+        for job in self.jobs:
+            name, poster_class, _run_args, schedule = job
+            slots = upcoming_slots(schedule, now + MIN_LEAD, until=until)
+            if hasattr(poster_class, 'post_to_facebook_pages'):
+                total += self.schedule_facebook(job, slots, now)
+            else:
+                queued = self.prefetcher.fill(job, slots, now)
+                print(f"[bulk] {name}: no native scheduling, {queued} post(s) queued for the daemon")
+                total += queued
+        return total
+
+    def schedule_facebook(self, job, slots, now):
+        """Generate each slot's post for its own date, render their cards as one batch, then schedule them"""
+        name, poster_class, run_args, _schedule = job
+        poster = self.prefetcher.poster(poster_class)
+        hours = freshness_hours(poster_class)
+        pages = poster.facebook_pages
+        planned = []
+        for slot in slots:
+            if slot - timedelta(hours=hours) > now:
+                print(f"[bulk] {name}: stopping at {slot:%Y-%m-%d %H:%M}, beyond its {hours:g}h freshness window")
+                break
+            done = self.store.scheduled_targets(poster_class.POSTER_NAME, 'facebook', slot)
+            todo = {page_id: token for page_id, token in pages.items() if page_id not in done}
+            if not todo:
+                continue
+            content = self.prefetcher.generate(name, poster_class, run_args, slot)
+            if not content:
+                break
+            planned.append((slot, todo, content))
+
+        # Catalog feeds with several targets generate per-target variants
+        texts = [content['facebook'] if isinstance(content, dict) else content for _slot, _todo, content in planned]
+        images = poster.get_quote_cards(texts)
+        scheduled = 0
+        for (slot, todo, content), text, image in zip(planned, texts, images):
+            message = strip_image_suggestion(text) if image else text
+            results = poster.facebook_batch.publish(todo, message, image=image, scheduled_at=slot)
+            accepted = [page_id for page_id, result in results.items() if result['ok']]
+            for page_id, result in results.items():
+                if not result['ok']:
+                    print(f"[bulk] {name}: page {page_id} rejected the {slot:%Y-%m-%d %H:%M} post: {result['error']}")
+
+            # Facebook owns delivery now: published in the outbox, so no run sends it again.
+            # Rejected pages stay out of the outbox and get the post from the queue at slot time.
+            keys = poster.outbox.record(poster_class.POSTER_NAME, text,
+                                        [('facebook', page_id) for page_id in accepted],
+                                        slot=slot_key(slot))
+            for page_id in accepted:
+                key = keys[('facebook', page_id)]
+                poster.outbox.mark_published(key)
+                self.store.add(poster_class.POSTER_NAME, 'facebook', page_id, slot, results[page_id]['id'], key)
+            if accepted:
+                poster.dedup_index.add(poster_class.POSTER_NAME, text, slot=slot_key(slot))
+            # Lets the slot's own run skip generation
+            self.prefetcher.queue.put(poster_class.POSTER_NAME, run_args, slot, content,
+                                      (slot - now).total_seconds() / 3600 + 24)
+            print(f"[bulk] {name}: {slot:%Y-%m-%d %H:%M} scheduled on {len(accepted)}/{len(todo)} page(s)")
+            scheduled += len(accepted)
+        return scheduled
+
+    def reconcile(self, now=None):
+        """Check past scheduled posts on Facebook and re-send the ones it never published.
+
+        Missing posts are marked failed in the outbox, so the outbox
+        retrier publishes them live. Returns {state: count}.
+        """
+        counts = {}
+        poster_classes = {job[1].POSTER_NAME: job[1] for job in self.jobs}
+        now = now or time.time()
+        for poster_name, platform, target, slot_at, post_id, outbox_key in self.store.due_for_check(now):
+            if poster_name not in poster_classes:
+                continue
+            poster = self.prefetcher.poster(poster_classes[poster_name])
+            state, error = self._check_facebook(poster, target, post_id, now - slot_at)
+            if state is None:
+                continue
+            self.store.set_state(poster_name, platform, target, slot_at, state, error)
+            if state == MISSING:
+                print(f"[bulk] {poster_name}: post for {datetime.fromtimestamp(slot_at):%Y-%m-%d %H:%M} "
+                      f"on page {target} was not published ({error}). Re-sending it.")
+                poster.outbox.mark_failed(outbox_key, f"not published by Facebook: {error}")
+            counts[state] = counts.get(state, 0) + 1
+        print("[bulk] Reconciled: " + (', '.join(f"{count} {state}" for state, count in counts.items()) or 'nothing due'))
+        return counts
+
+    def _check_facebook(self, poster, page_id, post_id, overdue):
+        """(state, error) for one scheduled post, or (None, None) to check again later"""
+        token = poster.facebook_pages.get(page_id)
+        try:
+            response = poster.transport.get(f"{GRAPH_URL}/{post_id}",
+                                            params={'fields': 'is_published', 'access_token': token})
+            body = response.json()
+        except Exception as e:
+            print(f"[bulk] Could not check post {post_id}: {e}")
+            return None, None
+        if response.status_code == 200 and body.get('is_published'):
+            return PUBLISHED, None
+        if response.status_code == 200:
+            # Still unpublished: Facebook can run a little late
+            return (MISSING, 'still unpublished') if overdue > MISSING_AFTER else (None, None)
+        error = body.get('error', {})
+        if error.get('code') == 100 or response.status_code == 404:
+            # The post no longer exists (deleted from the page's scheduled posts)
+            return MISSING, error.get('message', 'post not found')
+        print(f"[bulk] Could not check post {post_id}: {response.status_code} - {error.get('message', body)}")
+        return None, None
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_scheduled_post_store():
+    """Return the process-wide scheduled post store"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ScheduledPostStore()
+        return _default_store
+
+
+if __name__ == "__main__":
+    # python bulk_scheduler.py                         -> list scheduled posts
+    # python bulk_scheduler.py --days 7 [job,job]      -> schedule the next week now
+    # python bulk_scheduler.py --reconcile             -> check past posts, re-send missing ones
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if '--days' in sys.argv or '--reconcile' in sys.argv:
+        from cron_schedule import CronSchedule
+        from scheduler_daemon import load_jobs
+
+        args = [arg for index, arg in enumerate(sys.argv[1:], 1)
+                if not arg.startswith('--') and sys.argv[index - 1] != '--days']
+        selected = args[0].split(',') if args else None
+        jobs = []
+        for name, poster_class, run_args, default_schedule in load_jobs():
+            expression = os.getenv(f"SCHEDULE_{name.upper()}", default_schedule)
+            if expression.strip().lower() != 'off' and (not selected or name in selected):
+                jobs.append((name, poster_class, run_args, CronSchedule(expression)))
+        scheduler = BulkScheduler(jobs)
+        if '--reconcile' in sys.argv:
+            scheduler.reconcile()
+        else:
+            started = time.monotonic()
+            total = scheduler.run(days=float(sys.argv[sys.argv.index('--days') + 1]))
+            print(f"[bulk] {total} post(s) scheduled or queued in {time.monotonic() - started:.1f}s")
+        sys.exit(0)
+
+    rows = get_default_scheduled_post_store().summary()
+    if not rows:
+        print("No scheduled posts.")
+        sys.exit(0)
+    print(f"{'Poster':<20}{'Platform':<10}{'Target':<18}{'Slot':<18}{'State':<11}Post ID")
+    print("-" * 100)
+    for poster, platform, target, slot_at, post_id, state, last_error in rows:
+        slot = datetime.fromtimestamp(slot_at).strftime('%Y-%m-%d %H:%M')
+        print(f"{poster:<20}{platform:<10}{target[:16]:<18}{slot:<18}{state:<11}{post_id}"
+              + (f"  ({last_error})" if last_error else ""))
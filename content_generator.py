@@ -0,0 +1,415 @@
+import json
+import os
+import re
+import time
+
+from dedup_index import DEFAULT_MAX_REGENERATIONS
+from generation_cache import get_default_cache
+from hedging import get_default_hedge_policy, HedgeCancelled, HEDGE_WON, FAILED as HEDGE_FAILED
+from metrics import get_default_metrics
+from model_router import get_default_router
+from post_variants import (
+    VARIANT_FIELDS, VariantError, add_missing_hashtags, parse_variants, primary_text, response_format_for,
+    variant_instructions, variant_length,
+)
+from token_budget import TokenBudget, format_usage_report
+from twitter_text import fit_tweet
+
+# Maximum post length per target format, in characters
+PLATFORM_CHAR_LIMITS = {
+    'twitter': 280,
+    'linkedin': 3000,
+    'facebook': 63206,
+}
+
+# End of a sentence: Latin punctuation or the Devanagari danda, followed by
+# whitespace, or a line break
+SENTENCE_END = re.compile(r'[.!?।॥](?=\s)|\n')
+
+
+def find_sentence_cutoff(text, char_budget):
+    """Return text trimmed to the last sentence boundary within the budget"""
+    if len(text) <= char_budget:
+        return text
+
+    window = text[:char_budget + 1]
+    # A boundary with nothing before it (a leading line break) would cut everything
+    boundaries = [match.end() for match in SENTENCE_END.finditer(window) if text[:match.end()].strip()]
+    if boundaries:
+        return text[:boundaries[-1]].rstrip()
+    # No boundary at all: fall back to the last whole word
+    return window[:char_budget].rsplit(' ', 1)[0].rstrip()
+
+
+class ContentGenerator:
+    """Runs a poster's chat completion through the generation cache"""
+
+    def __init__(self, poster_name, client_getter, cache=None, force_regenerate=False, stream=False,
+                 token_budget=None, dedup_index=None, max_regenerations=None, hedge_policy=None,
+                 router=None):
+        self.poster_name = poster_name
+        # Called only on a cache miss, so cached reruns never touch OpenAI
+        self.client_getter = client_getter
+        self.cache = cache or get_default_cache()
+        self.force_regenerate = force_regenerate
+        self.stream = stream
+        self.token_budget = token_budget or TokenBudget()
+        # Prompt/completion token split of the most recent API call
+        self.last_usage = None
+        # Optional near-duplicate check against posting history
+        self.dedup_index = dedup_index
+        self.max_regenerations = int(
+            max_regenerations if max_regenerations is not None
+            else os.getenv('DEDUP_MAX_REGENERATIONS', DEFAULT_MAX_REGENERATIONS)
+        )
+        # Optional second request when a completion is slower than usual (LLM_HEDGE)
+        self.hedge_policy = hedge_policy or get_default_hedge_policy()
+        # Model per (poster, target format), with fallbacks for unhealthy models
+        self.router = router or get_default_router()
+
+    def generate(self, messages, model, max_tokens, temperature, char_budget=None, target_format=None,
+                 slot=None, messages_factory=None):
+        """Return generated text, reusing the slot's cached result when available.
+
+        slot is the outbox slot the post is for (see outbox.slot_key; default
+        today's date), so content made ahead of its slot is cached under that
+        slot, and each slot of a feed posting several times a day gets its own.
+
+        messages_factory, if given, builds the messages actually sent and is
+        only called on a cache miss; messages is then just the cache key's
+        prompt. This keeps slow inputs (news feeds) off the cached path.
+
+        model is the one the feed sets (None to let the model router pick per
+        target format); routes for the poster override it, and a fallback is
+        used while a model is unhealthy.
+
+        max_tokens is an upper bound: the actual value is derived from
+        char_budget and the prompt's script. In streaming mode, char_budget
+        also stops the completion as soon as the text outgrows the target
+        format, cut back to a sentence boundary.
+
+        With a dedup index, text too similar to recent history is regenerated
+        up to max_regenerations times; None is returned if it stays a repeat.
+        """
+        return self._generate(messages, model, max_tokens, temperature, char_budget, target_format, slot=slot,
+                              messages_factory=messages_factory)
+
+    def generate_variants(self, messages, model, max_tokens, temperature, platforms, slot=None,
+                          messages_factory=None):
+        """Return {platform: text, 'hashtags': [...]} from a single structured completion.
+
+        Each platform gets a native version within its own character limit
+        instead of one text truncated to the smallest. The reply is validated
+        locally; an invalid one gets one repair request, and variants still
+        over their limit after that are trimmed to a sentence boundary.
+        Caching, routing and repeat detection work as in generate().
+        """
+        platforms = [platform for platform in VARIANT_FIELDS if platform in platforms]
+        limits = {platform: PLATFORM_CHAR_LIMITS[platform] for platform in platforms}
+        instructions = {"role": "system", "content": variant_instructions(platforms, limits)}
+
+        def with_instructions(messages):
+            # Instructions go just before the user request so the persona stays first
+            return messages[:-1] + [instructions, messages[-1]]
+
+        return self._generate(with_instructions(messages), model, max_tokens, temperature, sum(limits.values()),
+                              'variants', platforms=platforms, slot=slot,
+                              messages_factory=messages_factory and (lambda: with_instructions(messages_factory())))
+
+    def _generate(self, messages, model, max_tokens, temperature, char_budget, target_format, platforms=None,
+                  slot=None, messages_factory=None):
+        configured_model = self.router.route(self.poster_name, target_format, model)
+        token_cap = max_tokens
+        max_tokens, prompt_tokens = self.token_budget.plan(messages, configured_model, char_budget, token_cap)
+        # Variants are a JSON document, which can't be cut off mid-stream
+        stream = self.stream and not platforms
+        budget = char_budget if stream else None
+        extra = ['variants'] + platforms if platforms else budget
+        # Keyed on the configured model so a fallback doesn't invalidate today's cache
+        cache_key = self.cache.make_key(self.poster_name, messages, configured_model, temperature, max_tokens,
+                                        slot=slot, extra=extra)
+
+        call_model = None
+        content = None
+        if not self.force_regenerate:
+            content = self.cache.get(cache_key)
+            if content is not None:
+                print(f"Using cached {self.poster_name} content (pass --force-regenerate to refresh)")
+                get_default_metrics().generations.inc(poster=self.poster_name, source='cache')
+        if content is None:
+            if messages_factory:
+                messages, messages_factory = messages_factory(), None
+                max_tokens, prompt_tokens = self.token_budget.plan(messages, configured_model, char_budget, token_cap)
+            call_model = self.router.select(self.poster_name, target_format, model)
+            content = self._complete_checked(messages, call_model, max_tokens, temperature, char_budget,
+                                             prompt_tokens, stream, platforms)
+            self.cache.put(cache_key, self.poster_name, call_model, content)
+
+        result = self._parse_cached(content, platforms)
+        if not self.dedup_index:
+            return result
+
+        for attempt in range(self.max_regenerations + 1):
+            matches = self.dedup_index.find_similar(primary_text(result) if platforms else result,
+                                                    poster=self.poster_name, slot=slot)
+            if not matches:
+                return result
+            match = matches[0]
+            print(f"[dedup] Too similar ({match['similarity']:.0%}) to a {match['kind']} "
+                  f"posted by {match['poster']} on {match['slot']}: {match['text'][:80]}")
+            if attempt == self.max_regenerations:
+                break
+
+            print(f"[dedup] Regenerating ({attempt + 1}/{self.max_regenerations})...")
+            if messages_factory:
+                messages, messages_factory = messages_factory(), None
+                max_tokens, prompt_tokens = self.token_budget.plan(messages, configured_model, char_budget, token_cap)
+            retry_messages = messages + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": (
+                    f"This repeats a {match['kind']} that was already posted: \"{match['text'][:300]}\". "
+                    "Write a completely different post in the same language and format, "
+                    "built on a different quote and different ideas."
+                )},
+            ]
+            call_model = call_model or self.router.select(self.poster_name, target_format, model)
+            content = self._complete_checked(retry_messages, call_model, max_tokens, temperature, char_budget,
+                                             prompt_tokens, stream, platforms)
+            # Cache the replacement so a rerun of this slot doesn't start from the repeat again
+            self.cache.put(cache_key, self.poster_name, call_model, content)
+            result = self._parse_cached(content, platforms)
+
+        print(f"[dedup] Rejecting {self.poster_name} content: still a repeat after "
+              f"{self.max_regenerations} regenerations")
+        get_default_metrics().generations.inc(poster=self.poster_name, source='rejected')
+        return None
+
+    @staticmethod
+    def _parse_cached(content, platforms):
+        if not platforms:
+            return content
+        limits = {platform: PLATFORM_CHAR_LIMITS[platform] for platform in platforms}
+        # Cached variants were validated and fitted before they were stored
+        return parse_variants(content, platforms, limits, check_lengths=False)
+
+    def _complete_checked(self, messages, model, max_tokens, temperature, char_budget, prompt_tokens,
+                          stream, platforms):
+        """_complete(), plus validation and one repair request for variants.
+
+        Returns the text to cache: plain text, or the normalized variants JSON.
+        """
+        if not platforms:
+            return self._complete(messages, model, max_tokens, temperature, char_budget, prompt_tokens, stream)
+
+        limits = {platform: PLATFORM_CHAR_LIMITS[platform] for platform in platforms}
+        response_format = response_format_for(model, platforms, limits)
+        content = self._complete(messages, model, max_tokens, temperature, None, prompt_tokens, False,
+                                 response_format)
+        try:
+            variants = parse_variants(content, platforms, limits)
+        except VariantError as e:
+            print(f"[variants] Invalid reply ({e}). Asking for a corrected one...")
+            repair_messages = messages + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": (
+                    f"That reply can't be used: {e}. Reply again with the complete JSON object, "
+                    "fixing these problems and keeping everything else."
+                )},
+            ]
+            content = self._complete(repair_messages, model, max_tokens, temperature, None, prompt_tokens,
+                                     False, response_format)
+            try:
+                variants = parse_variants(content, platforms, limits)
+            except VariantError as e:
+                # Still malformed raises; still too long gets trimmed locally
+                print(f"[variants] Corrected reply still invalid ({e}). Trimming it to fit.")
+                variants = parse_variants(content, platforms, limits, check_lengths=False)
+                for platform in platforms:
+                    if variant_length(platform, variants[platform]) > limits[platform]:
+                        variants[platform] = (fit_tweet(variants[platform]) if platform == 'twitter'
+                                              else find_sentence_cutoff(variants[platform], limits[platform]))
+
+        add_missing_hashtags(variants, platforms, limits)
+        return json.dumps({
+            **{VARIANT_FIELDS[platform]: variants[platform] for platform in platforms},
+            'hashtags': variants['hashtags'],
+        }, ensure_ascii=False)
+
+    def _complete(self, messages, model, max_tokens, temperature, char_budget, prompt_tokens, stream=False,
+                  response_format=None):
+        """Call the API once (streaming, hedged or plain), print the token usage and record metrics"""
+        metrics = get_default_metrics()
+        started = time.monotonic()
+        if stream:
+            try:
+                content = self._generate_streaming(messages, model, max_tokens, temperature, char_budget)
+            except Exception:
+                self.router.observe(model, time.monotonic() - started, ok=False)
+                raise
+            self.router.observe(model, time.monotonic() - started)
+            usage = {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': self.token_budget.count_tokens(content, model),
+                'estimated': True,
+            }
+            self._record_call(model, time.monotonic() - started, usage)
+        elif self.hedge_policy.enabled:
+            hedge_model = self.hedge_policy.hedge_model or model
+            try:
+                (content, usage), outcome = self.hedge_policy.run(
+                    model,
+                    lambda cancelled: self._create(self.client_getter, messages, model, max_tokens, temperature,
+                                                   char_budget, response_format, cancelled, prompt_tokens),
+                    lambda cancelled: self._create(lambda: self.hedge_policy.hedge_client(self.client_getter),
+                                                   messages, hedge_model, max_tokens, temperature, char_budget,
+                                                   response_format, cancelled, prompt_tokens)
+                )
+            except Exception:
+                metrics.hedges.inc(poster=self.poster_name, outcome=HEDGE_FAILED)
+                raise
+            metrics.hedges.inc(poster=self.poster_name, outcome=outcome)
+            if outcome == HEDGE_WON:
+                print(f"[hedge] Hedge request ({hedge_model}) answered first")
+        else:
+            content, usage = self._create(self.client_getter, messages, model, max_tokens, temperature, char_budget,
+                                          response_format)
+
+        self.last_usage = usage
+        metrics.generation_wall_seconds.observe(time.monotonic() - started, poster=self.poster_name)
+        metrics.generations.inc(poster=self.poster_name, source='api')
+        print(format_usage_report(self.poster_name, self.last_usage, max_tokens))
+        return content
+
+    def _create(self, client_getter, messages, model, max_tokens, temperature, char_budget, response_format=None,
+                cancelled=None, prompt_tokens=None):
+        """One completion, returned whole. Returns (content, usage).
+
+        With cancelled (a hedged call), the completion is streamed so it can
+        stop as soon as cancelled is set; HedgeCancelled is raised then.
+        """
+        started = time.monotonic()
+        # Only sent when set, for API-compatible servers that reject the parameter
+        options = {'response_format': response_format} if response_format else {}
+        try:
+            if cancelled is None:
+                response = client_getter().chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    **options
+                )
+                choice = response.choices[0]
+                content, finish_reason = choice.message.content, choice.finish_reason
+                usage = {
+                    'prompt_tokens': response.usage.prompt_tokens,
+                    'completion_tokens': response.usage.completion_tokens,
+                    'estimated': False,
+                }
+            else:
+                content, finish_reason, usage = self._create_cancellable(
+                    client_getter, messages, model, max_tokens, temperature, options, cancelled, prompt_tokens,
+                    started)
+        except HedgeCancelled:
+            raise
+        except Exception:
+            self.router.observe(model, time.monotonic() - started, ok=False)
+            raise
+        elapsed = time.monotonic() - started
+
+        content = content.strip()
+        if finish_reason == 'length' and char_budget:
+            # Ran out of tokens mid-sentence: end on the last full sentence, unless that leaves nothing
+            content = find_sentence_cutoff(content, len(content) - 1) or content
+        # Also reached by a losing hedge request that finished before it was cancelled
+        self.hedge_policy.observe(model, elapsed)
+        self.router.observe(model, elapsed)
+        self._record_call(model, elapsed, usage)
+        return content, usage
+
+    def _create_cancellable(self, client_getter, messages, model, max_tokens, temperature, options, cancelled,
+                            prompt_tokens, started):
+        """Stream a completion until it ends or cancelled is set. Returns (content, finish_reason, usage)."""
+        stream = client_getter().chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            stream_options={'include_usage': True},
+            **options
+        )
+        parts, finish_reason, usage = [], None, None
+        try:
+            for chunk in stream:
+                if cancelled.is_set():
+                    break
+                if getattr(chunk, 'usage', None):
+                    usage = {
+                        'prompt_tokens': chunk.usage.prompt_tokens,
+                        'completion_tokens': chunk.usage.completion_tokens,
+                        'estimated': False,
+                    }
+                if chunk.choices:
+                    parts.append(chunk.choices[0].delta.content or '')
+                    finish_reason = chunk.choices[0].finish_reason or finish_reason
+        finally:
+            # Closing the response stops generation of further (billed) tokens
+            stream.close()
+
+        content = ''.join(parts)
+        if usage is None:
+            usage = {
+                'prompt_tokens': prompt_tokens or 0,
+                'completion_tokens': self.token_budget.count_tokens(content, model),
+                'estimated': True,
+            }
+        if cancelled.is_set():
+            elapsed = time.monotonic() - started
+            # At least this slow; the tokens generated so far are billed
+            self.hedge_policy.observe(model, elapsed)
+            self._record_call(model, elapsed, usage)
+            print(f"[hedge] Cancelled the slower {model} request after {elapsed:.1f}s")
+            raise HedgeCancelled(f"{model} request cancelled after {elapsed:.1f}s")
+        return content, finish_reason, usage
+
+    def _record_call(self, model, elapsed, usage):
+        metrics = get_default_metrics()
+        metrics.generation_seconds.observe(elapsed, poster=self.poster_name, model=model)
+        for kind in ('prompt', 'completion'):
+            metrics.tokens.inc(usage[f'{kind}_tokens'], poster=self.poster_name, model=model, type=kind)
+
+    def _generate_streaming(self, messages, model, max_tokens, temperature, char_budget):
+        stream = self.client_getter().chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+
+        text = ''
+        cut_early = False
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+
+                print(delta, end='', flush=True)
+                text += delta
+                if char_budget and len(text.strip()) > char_budget:
+                    cut_early = True
+                    break
+        finally:
+            # Closing the response stops generation of further (billed) tokens
+            stream.close()
+        print()
+
+        text = text.strip()
+        if cut_early:
+            text = find_sentence_cutoff(text, char_budget)
+            print(f"[stream] Stopped at {len(text)} characters (budget {char_budget})")
+        return text
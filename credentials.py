@@ -0,0 +1,299 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from facebook_batch import GRAPH_URL
+from http_transport import get_default_transport
+
+DEFAULT_CREDENTIALS_PATH = os.path.join('state', 'credentials.db')
+DEFAULT_REFRESH_MARGIN_DAYS = 10    # long-lived tokens last about 60 days
+DEFAULT_ACCOUNTS_TTL_HOURS = 24     # how long a /me/accounts result is trusted
+DEFAULT_CHECK_INTERVAL = 3600       # seconds between background refresh checks
+
+LINKEDIN_USERINFO_URL = "https://api.linkedin.com/v2/userinfo"
+LINKEDIN_TOKEN_URL = "https://www.linkedin.com/oauth/v2/accessToken"
+
+# Credential names in the store
+FACEBOOK_USER = 'facebook:user'
+FACEBOOK_ACCOUNTS = 'facebook:accounts'
+LINKEDIN_TOKEN = 'linkedin:access_token'
+LINKEDIN_PERSON = 'linkedin:person_id'
+
+
+def _fingerprint(token):
+    return hashlib.sha256((token or '').encode('utf-8')).hexdigest()[:16]
+
+
+class CredentialService:
+    """Long-lived platform credentials, cached on disk and refreshed before they expire.
+
+    The Facebook user token from .env is exchanged for a long-lived one and
+    the page tokens from /me/accounts are cached; the LinkedIn person ID is
+    resolved from /v2/userinfo once. Lookups made while posting only read
+    the cache, so they never make discovery calls, and refresh_due() (run
+    in the background by the scheduler daemon, or `python credentials.py
+    --refresh`) renews everything well ahead of expiry.
+    """
+
+    def __init__(self, transport=None, path=None, app_id=None, app_secret=None,
+                 refresh_margin_days=None, accounts_ttl_hours=None):
+        self.transport = transport or get_default_transport()
+        self.path = path or os.getenv('CREDENTIALS_PATH', DEFAULT_CREDENTIALS_PATH)
+        self.app_id = app_id or os.getenv('FACEBOOK_APP_ID')
+        self.app_secret = app_secret or os.getenv('FACEBOOK_APP_SECRET')
+        self.refresh_margin = float(refresh_margin_days or os.getenv('TOKEN_REFRESH_MARGIN_DAYS',
+                                                                     DEFAULT_REFRESH_MARGIN_DAYS)) * 86400
+        self.accounts_ttl = float(accounts_ttl_hours or os.getenv('FACEBOOK_ACCOUNTS_TTL_HOURS',
+                                                                  DEFAULT_ACCOUNTS_TTL_HOURS)) * 3600
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS credentials (
+                    name TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    label TEXT,
+                    expires_at REAL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _get(self, name):
+        """(value, expires_at, updated_at) of a credential that hasn't expired, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, expires_at, updated_at FROM credentials WHERE name = ?",
+                               (name,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return row
+
+    def _put(self, name, value, expires_at=None, label=None):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO credentials (name, value, label, expires_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (name, value, label, expires_at, time.time())
+            )
+
+    # Lookups used while posting: cache only, no network calls
+
+    def page_token(self, page_id, default=None):
+        """Cached page access token, or default (the token from .env)"""
+        return self.page_tokens({page_id: default})[page_id]
+
+    def page_tokens(self, defaults):
+        """{page_id: token} for every page in defaults, preferring cached tokens, in one query"""
+        names = [f'facebook:page:{page_id}' for page_id in defaults]
+        if not names:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT name, value FROM credentials WHERE name IN ({','.join('?' * len(names))}) "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (*names, time.time())
+            ).fetchall()
+        cached = {name.rsplit(':', 1)[1]: value for name, value in rows}
+        return {page_id: cached.get(page_id, default) for page_id, default in defaults.items()}
+
+    def linkedin_access_token(self):
+        """Refreshed LinkedIn access token if there is one, else LINKEDIN_ACCESS_TOKEN"""
+        row = self._get(LINKEDIN_TOKEN)
+        return row[0] if row else os.getenv('LINKEDIN_ACCESS_TOKEN')
+
+    def linkedin_person_id(self):
+        """LINKEDIN_PERSON_ID, or the ID cached by refresh_due(); None until it has been resolved"""
+        configured = os.getenv('LINKEDIN_PERSON_ID')
+        if configured:
+            return configured
+        row = self._get(LINKEDIN_PERSON)
+        return row[0] if row else None
+
+    # Refreshes: these call the platforms
+
+    def exchange_facebook_user_token(self, token=None):
+        """Exchange a user token for a long-lived one (about 60 days) and store it"""
+        if not self.app_id or not self.app_secret:
+            raise RuntimeError("FACEBOOK_APP_ID and FACEBOOK_APP_SECRET are needed to exchange tokens")
+        token = token or self.facebook_user_token() or os.getenv('FACEBOOK_USER_TOKEN')
+        if not token:
+            raise RuntimeError("No Facebook user token to exchange (set FACEBOOK_USER_TOKEN)")
+
+        response = self.transport.get(f"{GRAPH_URL}/oauth/access_token", params={
+            'grant_type': 'fb_exchange_token',
+            'client_id': self.app_id,
+            'client_secret': self.app_secret,
+            'fb_exchange_token': token,
+        })
+        data = response.json()
+        if 'access_token' not in data:
+            raise RuntimeError(f"Token exchange failed: {data.get('error', data)}")
+        expires_at = time.time() + data['expires_in'] if data.get('expires_in') else None
+        self._put(FACEBOOK_USER, data['access_token'], expires_at)
+        days = f"{data['expires_in'] / 86400:.0f} days" if data.get('expires_in') else "no expiry"
+        print(f"[credentials] Long-lived Facebook user token stored ({days})")
+        return data['access_token']
+
+    def facebook_user_token(self):
+        row = self._get(FACEBOOK_USER)
+        return row[0] if row else None
+
+    def refresh_page_tokens(self):
+        """Fetch /me/accounts with the user token and cache every page token. Returns {page_id: name}."""
+        user_token = self.facebook_user_token() or self.exchange_facebook_user_token()
+        pages = {}
+        url, params = f"{GRAPH_URL}/me/accounts", {'access_token': user_token, 'limit': 100}
+        while url:
+            data = self.transport.get(url, params=params).json()
+            if 'error' in data:
+                raise RuntimeError(f"/me/accounts failed: {data['error'].get('message', data['error'])}")
+            for page in data.get('data', []):
+                # Page tokens from a long-lived user token don't expire on their own
+                self._put(f"facebook:page:{page['id']}", page['access_token'], label=page.get('name'))
+                pages[page['id']] = page.get('name')
+            # The next page URL already carries the token and cursor
+            url, params = data.get('paging', {}).get('next'), None
+        self._put(FACEBOOK_ACCOUNTS, str(len(pages)))
+        print(f"[credentials] Cached tokens for {len(pages)} Facebook page(s)")
+        return pages
+
+    def resolve_linkedin_person_id(self):
+        """Look up the member's person ID (the OpenID 'sub') and cache it"""
+        token = self.linkedin_access_token()
+        if not token:
+            raise RuntimeError("LINKEDIN_ACCESS_TOKEN is not set")
+        response = self.transport.get(LINKEDIN_USERINFO_URL, headers={"Authorization": f"Bearer {token}"})
+        if response.status_code != 200:
+            raise RuntimeError(f"/v2/userinfo returned {response.status_code} - {response.text[:200]}")
+        person_id = response.json()['sub']
+        self._put(LINKEDIN_PERSON, person_id, label=_fingerprint(token))
+        print(f"[credentials] LinkedIn person ID resolved and cached: {person_id}")
+        return person_id
+
+    def refresh_linkedin_token(self):
+        """Use LINKEDIN_REFRESH_TOKEN to get a new access token (apps with refresh tokens only)"""
+        refresh_token = os.getenv('LINKEDIN_REFRESH_TOKEN')
+        client_id, client_secret = os.getenv('LINKEDIN_CLIENT_ID'), os.getenv('LINKEDIN_CLIENT_SECRET')
+        if not (refresh_token and client_id and client_secret):
+            return None
+        response = self.transport.post(LINKEDIN_TOKEN_URL, data={
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token,
+            'client_id': client_id,
+            'client_secret': client_secret,
+        })
+        data = response.json()
+        if 'access_token' not in data:
+            raise RuntimeError(f"LinkedIn token refresh failed: {data}")
+        self._put(LINKEDIN_TOKEN, data['access_token'], time.time() + data.get('expires_in', 60 * 86400))
+        print(f"[credentials] LinkedIn access token refreshed ({data.get('expires_in', 0) / 86400:.0f} days)")
+        return data['access_token']
+
+    def _expiring(self, name):
+        """True if a credential is missing or expires within the refresh margin"""
+        row = self._get(name)
+        return row is None or (row[1] is not None and row[1] - time.time() < self.refresh_margin)
+
+    def refresh_due(self, force=False):
+        """Renew whatever expires within the margin or is older than its TTL. Returns what was refreshed."""
+        refreshed = []
+        with self._lock:
+            steps = []
+            facebook_ready = self.app_id and self.app_secret and (
+                self.facebook_user_token() or os.getenv('FACEBOOK_USER_TOKEN'))
+            if facebook_ready:
+                if force or self._expiring(FACEBOOK_USER):
+                    steps.append(('facebook user token', self.exchange_facebook_user_token))
+                accounts = self._get(FACEBOOK_ACCOUNTS)
+                if force or steps or not accounts or time.time() - accounts[2] > self.accounts_ttl:
+                    steps.append(('facebook page tokens', self.refresh_page_tokens))
+
+            if os.getenv('LINKEDIN_REFRESH_TOKEN') and (force or self._expiring(LINKEDIN_TOKEN)):
+                steps.append(('linkedin access token', self.refresh_linkedin_token))
+            if not os.getenv('LINKEDIN_PERSON_ID') and self.linkedin_access_token() and (
+                    force or not self._get(LINKEDIN_PERSON)):
+                steps.append(('linkedin person id', self.resolve_linkedin_person_id))
+
+            for label, step in steps:
+                try:
+                    step()
+                    refreshed.append(label)
+                except Exception as e:
+                    print(f"[credentials] Could not refresh {label}: {e}")
+        return refreshed
+
+    def status(self):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT name, label, expires_at, updated_at FROM credentials ORDER BY name"
+            ).fetchall()
+
+    def start(self, interval=None):
+        """Refresh in a background thread now and every interval seconds"""
+        interval = float(interval or os.getenv('CREDENTIALS_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL))
+        self._thread = threading.Thread(target=self._loop, args=(interval,), name='credentials', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _loop(self, interval):
+        while True:
+            try:
+                self.refresh_due()
+            except Exception as e:
+                print(f"[credentials] Refresh check failed: {e}")
+            if self._stop.wait(interval):
+                return
+
+
+_default_credentials = None
+_default_credentials_lock = threading.Lock()
+
+
+def get_default_credentials():
+    """Return the process-wide credential service"""
+    global _default_credentials
+    with _default_credentials_lock:
+        if _default_credentials is None:
+            _default_credentials = CredentialService()
+        return _default_credentials
+
+
+if __name__ == "__main__":
+    # python credentials.py            -> show cached credentials and when they expire
+    # python credentials.py --refresh  -> exchange/refresh everything now
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    service = get_default_credentials()
+    if '--refresh' in sys.argv:
+        refreshed = service.refresh_due(force=True)
+        print(f"Refreshed: {', '.join(refreshed) if refreshed else 'nothing'}")
+
+    rows = service.status()
+    if not rows:
+        print("No cached credentials. Set FACEBOOK_APP_ID, FACEBOOK_APP_SECRET and FACEBOOK_USER_TOKEN "
+              "(or LINKEDIN_ACCESS_TOKEN) in .env and run with --refresh.")
+        sys.exit(0)
+    print(f"{'Credential':<32}{'Label':<26}{'Expires':<18}Updated")
+    print("-" * 94)
+    for name, label, expires_at, updated_at in rows:
+        expires = time.strftime('%Y-%m-%d %H:%M', time.localtime(expires_at)) if expires_at else 'never'
+        updated = time.strftime('%Y-%m-%d %H:%M', time.localtime(updated_at))
+        print(f"{name:<32}{(label or '')[:24]:<26}{expires:<18}{updated}")
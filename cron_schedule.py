@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+
+class CronSchedule:
+    """Minimal five-field cron expression matcher"""
+
+    # Day-of-week accepts 0-7 where both 0 and 7 mean Sunday
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression '{expression}': expected 5 fields")
+
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self._parse_field(field, low, high)
+            for field, (low, high) in zip(fields, self.FIELD_RANGES)
+        ]
+        self.weekdays = {day % 7 for day in self.weekdays}
+        # Classic cron: when both day fields are restricted, either may match
+        self.days_restricted = fields[2] != '*'
+        self.weekdays_restricted = fields[4] != '*'
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+                if step < 1:
+                    raise ValueError(f"Invalid cron step '{step_text}'")
+
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start_text, end_text = part.split('-', 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron field '{field}' out of range {low}-{high}")
+
+            values.update(range(start, end + 1, step))
+        return values
+
+    def matches(self, moment):
+        """Check whether the schedule fires at the given minute"""
+        if moment.minute not in self.minutes or moment.hour not in self.hours:
+            return False
+        if moment.month not in self.months:
+            return False
+
+        day_match = moment.day in self.days
+        # datetime.weekday() is Monday=0; cron is Sunday=0
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_run(self, after):
+        """Return the first matching minute strictly after the given time"""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # One year of minutes is enough for any satisfiable expression
+        for _ in range(366 * 24 * 60):
+            if self.matches(moment):
+                return moment
+            moment += timedelta(minutes=1)
+        return None
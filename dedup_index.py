@@ -0,0 +1,235 @@
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from datetime import date
+
+DEFAULT_INDEX_PATH = os.path.join('state', 'dedup_index.db')
+DEFAULT_THRESHOLD = 0.6          # estimated Jaccard similarity that counts as a repeat
+DEFAULT_WINDOW_DAYS = 365        # only history this recent blocks a post
+DEFAULT_MAX_REGENERATIONS = 2
+
+# MinHash/LSH layout: 128 permutations split into 32 bands of 4 rows. Two
+# texts with similarity 0.6 share at least one band bucket ~99% of the time.
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5                 # characters per shingle (works for Devanagari and Latin)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed seed: signatures must be identical across runs to match stored history
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_PERM)]
+
+HASHTAG_OR_URL = re.compile(r'#\S+|https?://\S+')
+# Text between matching quote marks, long enough to be a real quote
+QUOTED_TEXT = re.compile(r'[“"«„]([^“”"«»„\n]{20,400})[”"»“]')
+
+# Kinds of history entries
+POST = 'post'
+QUOTE = 'quote'
+
+
+def normalize(text):
+    """Reduce text to lowercase letters, marks and digits separated by single spaces.
+
+    Hashtags, URLs, emoji and punctuation are dropped: every post from a
+    poster carries the same hashtags, which would otherwise make unrelated
+    posts look alike. Combining marks are kept so Devanagari matras survive.
+    """
+    text = HASHTAG_OR_URL.sub(' ', unicodedata.normalize('NFC', text)).casefold()
+    kept = [char if unicodedata.category(char)[0] in 'LMN' else ' ' for char in text]
+    return ' '.join(''.join(kept).split())
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Set of overlapping character n-grams of the normalized text"""
+    text = normalize(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash(text):
+    """MinHash signature of a text as a list of NUM_PERM integers"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little') % _MERSENNE_PRIME
+        for shingle in shingles(text)
+    ]
+    if not hashes:
+        return [_MERSENNE_PRIME] * NUM_PERM
+    return [min((a * value + b) % _MERSENNE_PRIME for value in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_buckets(signature):
+    """One LSH bucket id per band, as signed 64-bit integers for SQLite"""
+    buckets = []
+    for band in range(BANDS):
+        rows = array('Q', signature[band * ROWS:(band + 1) * ROWS])
+        digest = hashlib.blake2b(band.to_bytes(2, 'little') + rows.tobytes(), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'little', signed=True))
+    return buckets
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return sum(1 for a, b in zip(signature, other) if a == b) / NUM_PERM
+
+
+def extract_quotes(text):
+    """Quoted passages in a post, e.g. the famous quote a motivational post is built on"""
+    return [match.group(1).strip() for match in QUOTED_TEXT.finditer(text)]
+
+
+class DedupIndex:
+    """History of published posts and quotes for near-duplicate detection.
+
+    Each post, and each quoted passage inside it, is stored with its MinHash
+    signature and indexed under one LSH bucket per band. A lookup reads only
+    the entries sharing a bucket with the candidate, so its cost depends on
+    how many similar texts exist, not on the size of the history.
+    """
+
+    def __init__(self, path=None, threshold=None, window_days=None):
+        self.path = path or os.getenv('DEDUP_INDEX_PATH', DEFAULT_INDEX_PATH)
+        self.threshold = float(threshold or os.getenv('DEDUP_THRESHOLD', DEFAULT_THRESHOLD))
+        self.window_days = float(window_days or os.getenv('DEDUP_WINDOW_DAYS', DEFAULT_WINDOW_DAYS))
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    entry_id INTEGER PRIMARY KEY,
+                    fingerprint TEXT NOT NULL UNIQUE,
+                    poster TEXT NOT NULL,
+                    slot TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    signature BLOB NOT NULL,
+                    text TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    bucket INTEGER NOT NULL,
+                    entry_id INTEGER NOT NULL REFERENCES entries (entry_id)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_bucket ON buckets (bucket)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _items(text):
+        return [(POST, text)] + [(QUOTE, quote) for quote in extract_quotes(text)]
+
+    def add(self, poster, text, slot=None, created_at=None):
+        """Record a published post and the quotes in it. Re-adding the same post is a no-op."""
+        slot = slot or date.today().isoformat()
+        created_at = created_at or time.time()
+        with self._lock, self._connect() as conn:
+            for kind, item in self._items(text):
+                fingerprint = hashlib.sha256(
+                    '\x1f'.join([poster, slot, kind, normalize(item)]).encode('utf-8')
+                ).hexdigest()
+                signature = minhash(item)
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO entries (fingerprint, poster, slot, kind, created_at, signature, text) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (fingerprint, poster, slot, kind, created_at, array('Q', signature).tobytes(), item[:500])
+                )
+                if cursor.rowcount == 1:
+                    conn.executemany(
+                        "INSERT INTO buckets (bucket, entry_id) VALUES (?, ?)",
+                        [(bucket, cursor.lastrowid) for bucket in band_buckets(signature)]
+                    )
+
+    def find_similar(self, text, poster=None, slot=None):
+        """Return history entries too similar to text, most similar first.
+
+        Entries recorded by the same poster for the same slot are ignored,
+        so a rerun of a slot's post is not mistaken for a repeat of itself.
+        slot is the outbox slot (see outbox.slot_key), today's date by default.
+        """
+        slot = slot or date.today().isoformat()
+        cutoff = time.time() - self.window_days * 86400
+        matches = []
+        with self._connect() as conn:
+            for kind, item in self._items(text):
+                signature = minhash(item)
+                buckets = band_buckets(signature)
+                rows = conn.execute(
+                    "SELECT e.poster, e.slot, e.kind, e.signature, e.text FROM entries e "
+                    "WHERE e.entry_id IN (SELECT entry_id FROM buckets WHERE bucket IN "
+                    f"({', '.join('?' * len(buckets))})) "
+                    "AND e.kind = ? AND e.created_at >= ?",
+                    buckets + [kind, cutoff]
+                ).fetchall()
+                for match_poster, match_slot, match_kind, blob, match_text in rows:
+                    if match_poster == poster and match_slot == slot:
+                        continue
+                    score = similarity(signature, array('Q', blob))
+                    if score >= self.threshold:
+                        matches.append({
+                            'poster': match_poster,
+                            'slot': match_slot,
+                            'kind': match_kind,
+                            'similarity': score,
+                            'text': match_text,
+                        })
+        return sorted(matches, key=lambda match: match['similarity'], reverse=True)
+
+    def stats(self):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT poster, kind, COUNT(*), MAX(slot) FROM entries GROUP BY poster, kind ORDER BY poster, kind"
+            ).fetchall()
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_default_dedup_index():
+    """Return the process-wide near-duplicate index"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = DedupIndex()
+        return _default_index
+
+
+def backfill_from_outbox(index, outbox):
+    """Load every post already recorded in the outbox into the index"""
+    with outbox._connect() as conn:
+        rows = conn.execute("SELECT poster, slot, content, created_at FROM contents ORDER BY created_at").fetchall()
+    for poster, slot, content, created_at in rows:
+        index.add(poster, content, slot=slot, created_at=created_at)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    # Usage: python dedup_index.py [--backfill]
+    index = get_default_dedup_index()
+    if '--backfill' in sys.argv:
+        from outbox import get_default_outbox
+        print(f"Indexed {backfill_from_outbox(index, get_default_outbox())} posts from the outbox")
+
+    print(f"{'Poster':<22}{'Kind':<8}{'Entries':>8}  Latest slot")
+    print("-" * 52)
+    for poster, kind, count, latest in index.stats():
+        print(f"{poster:<22}{kind:<8}{count:>8}  {latest}")
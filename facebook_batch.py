@@ -0,0 +1,200 @@
+import json
+import os
+from urllib.parse import urlencode
+
+GRAPH_URL = "https://graph.facebook.com/v18.0"
+MAX_BATCH_SIZE = 50  # Graph API limit on operations per batch request
+
+# Graph error codes worth retrying individually (transient/throttling)
+RETRYABLE_ERROR_CODES = {1, 2, 4, 17, 32, 341, 613}
+
+
+def load_facebook_pages(credentials=None):
+    """Return {page_id: page_access_token} for every configured page.
+
+    FACEBOOK_PAGES holds extra pages as "page_id:token,page_id:token", or
+    just "page_id" for pages whose token is in the credential cache.
+    The single FACEBOOK_PAGE_ID/FACEBOOK_ACCESS_TOKEN pair is always included.
+    Cached page tokens (see credentials.py) take precedence over .env ones.
+    """
+    pages = {}
+    page_id = os.getenv('FACEBOOK_PAGE_ID')
+    if page_id:
+        pages[page_id] = os.getenv('FACEBOOK_ACCESS_TOKEN')
+
+    for entry in (os.getenv('FACEBOOK_PAGES') or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        extra_page_id, _, token = entry.partition(':')
+        pages[extra_page_id.strip()] = token.strip() or None
+
+    if credentials is not None:
+        pages = credentials.page_tokens(pages)
+    missing = [page_id for page_id, token in pages.items() if not token]
+    for page_id in missing:
+        print(f"No access token for Facebook page {page_id} (add it to .env or run credentials.py --refresh)")
+        del pages[page_id]
+    return pages
+
+
+def schedule_params(scheduled_at):
+    """Graph parameters that make a post publish at scheduled_at (a datetime) instead of now"""
+    if scheduled_at is None:
+        return {}
+    return {'published': 'false', 'scheduled_publish_time': str(int(scheduled_at.timestamp()))}
+
+
+class FacebookBatchPublisher:
+    """Publishes one post to many Facebook pages through the Graph batch endpoint.
+
+    Up to 50 page posts go out per HTTP request, each with its own page
+    access token. Items that fail with a transient error are retried
+    individually once; anything still failing is reported back per page.
+    When a page's outcome is unknown (the batch request failed, or its item
+    timed out) the page is checked for the post before it is sent again,
+    and left failed for a later outbox retry if the check itself fails.
+    """
+
+    def __init__(self, transport, rate_governor=None):
+        self.transport = transport
+        self.rate_governor = rate_governor
+
+    def publish(self, pages, message, messages_by_page=None, image=None, scheduled_at=None):
+        """Post to every page in {page_id: token}.
+
+        messages_by_page optionally overrides the message per page (e.g.
+        localized text). With image (JPEG bytes), a photo post with the
+        message as its caption goes to /photos instead; the image is
+        uploaded once per batch request and shared by its operations.
+        With scheduled_at (a datetime), the posts are created unpublished
+        and Facebook publishes them at that time.
+        Returns {page_id: {'ok': bool, 'id': post_id, 'error': text}}.
+        """
+        messages_by_page = messages_by_page or {}
+        results = {}
+
+        ready = []
+        for page_id in pages:
+            if self.rate_governor and not self.rate_governor.acquire('facebook', page_id, max_wait=0):
+                results[page_id] = {'ok': False, 'id': None, 'error': 'rate limited', 'retryable': False}
+            else:
+                ready.append(page_id)
+
+        for start in range(0, len(ready), MAX_BATCH_SIZE):
+            chunk = ready[start:start + MAX_BATCH_SIZE]
+            results.update(self._send_batch(chunk, pages, message, messages_by_page, image, scheduled_at))
+
+        for page_id in list(results):
+            result = results[page_id]
+            retryable, uncertain = result.pop('retryable', False), result.pop('uncertain', False)
+            if result['ok'] or not retryable:
+                continue
+            page_message = messages_by_page.get(page_id, message)
+            if uncertain:
+                # The post may exist even though the batch didn't say so
+                try:
+                    post_id = self._find_post(page_id, pages[page_id], page_message, scheduled_at)
+                except Exception as e:
+                    print(f"Facebook page {page_id}: outcome unknown and the page could not be checked ({e}). "
+                          f"Not posting again now.")
+                    continue
+                if post_id:
+                    print(f"Facebook page {page_id}: the post went out despite the error ({post_id})")
+                    results[page_id] = {'ok': True, 'id': post_id, 'error': None}
+                    continue
+            print(f"Retrying Facebook page {page_id} individually...")
+            results[page_id] = self._post_single(page_id, pages[page_id], page_message, image, scheduled_at)
+        return results
+
+    def _send_batch(self, page_ids, pages, message, messages_by_page, image=None, scheduled_at=None):
+        operations = []
+        for page_id in page_ids:
+            operation = {
+                'method': 'POST',
+                'relative_url': f"{page_id}/photos" if image else f"{page_id}/feed",
+                'body': urlencode({
+                    'message': messages_by_page.get(page_id, message),
+                    'access_token': pages[page_id],
+                    **schedule_params(scheduled_at),
+                }),
+            }
+            if image:
+                operation['attached_files'] = 'card'
+            operations.append(operation)
+
+        try:
+            response = self.transport.post(GRAPH_URL, data={
+                # The top-level token only authenticates the batch itself;
+                # each operation carries its own page token in its body
+                'access_token': pages[page_ids[0]],
+                'batch': json.dumps(operations),
+                'include_headers': 'true',
+            }, files={'card': ('quote.jpg', image, 'image/jpeg')} if image else None)
+            items = response.json()
+        except Exception as e:
+            return {page_id: {'ok': False, 'id': None, 'error': str(e), 'retryable': True, 'uncertain': True}
+                    for page_id in page_ids}
+
+        if not isinstance(items, list):
+            error = items.get('error', {}).get('message', response.text) if isinstance(items, dict) else response.text
+            return {page_id: {'ok': False, 'id': None, 'error': error, 'retryable': True, 'uncertain': True}
+                    for page_id in page_ids}
+
+        return {page_id: self._parse_item(page_id, item) for page_id, item in zip(page_ids, items)}
+
+    def _parse_item(self, page_id, item):
+        if item is None:
+            # Graph returns null for operations that didn't finish in time
+            return {'ok': False, 'id': None, 'error': 'operation timed out', 'retryable': True, 'uncertain': True}
+
+        headers = {header['name']: header['value'] for header in item.get('headers') or []}
+        if self.rate_governor:
+            self.rate_governor.observe('facebook', page_id, headers, item.get('code'))
+
+        try:
+            body = json.loads(item.get('body') or '{}')
+        except ValueError:
+            body = {}
+
+        if item.get('code') == 200 and 'id' in body:
+            # Photo posts answer with the photo's id and the post_id of the post
+            return {'ok': True, 'id': body.get('post_id', body['id']), 'error': None, 'retryable': False}
+
+        error = body.get('error', {})
+        retryable = item.get('code', 500) >= 500 or error.get('code') in RETRYABLE_ERROR_CODES
+        return {
+            'ok': False,
+            'id': None,
+            'error': f"{item.get('code')} - {error.get('message', item.get('body'))}",
+            'retryable': retryable,
+        }
+
+    def _find_post(self, page_id, token, message, scheduled_at=None):
+        """ID of a recent post on the page with exactly this message, or None; raises if the check fails"""
+        edge = 'scheduled_posts' if scheduled_at else 'feed'
+        response = self.transport.get(f"{GRAPH_URL}/{page_id}/{edge}",
+                                      params={'fields': 'id,message', 'limit': 25, 'access_token': token})
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code} - {response.text}")
+        for post in response.json().get('data', []):
+            if post.get('message') == message:
+                return post['id']
+        return None
+
+    def _post_single(self, page_id, token, message, image=None, scheduled_at=None):
+        data = {'message': message, 'access_token': token, **schedule_params(scheduled_at)}
+        try:
+            if image:
+                response = self.transport.post(f"{GRAPH_URL}/{page_id}/photos", data=data,
+                                               files={'source': ('quote.jpg', image, 'image/jpeg')})
+            else:
+                response = self.transport.post(f"{GRAPH_URL}/{page_id}/feed", data=data)
+            if self.rate_governor:
+                self.rate_governor.observe('facebook', page_id, response.headers, response.status_code)
+            if response.status_code == 200:
+                body = response.json()
+                return {'ok': True, 'id': body.get('post_id', body.get('id')), 'error': None}
+            return {'ok': False, 'id': None, 'error': f"{response.status_code} - {response.text}"}
+        except Exception as e:
+            return {'ok': False, 'id': None, 'error': str(e)}
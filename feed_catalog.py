@@ -0,0 +1,513 @@
+import functools
+import os
+import re
+import string
+import sys
+import threading
+from datetime import datetime
+
+from http_transport import get_default_transport
+from cron_schedule import CronSchedule
+from content_generator import ContentGenerator, PLATFORM_CHAR_LIMITS
+from outbox import get_default_outbox
+from rate_governor import get_default_governor
+from dedup_index import get_default_dedup_index
+from facebook_batch import FacebookBatchPublisher
+from credentials import get_default_credentials
+from prefetch_queue import DEFAULT_FRESHNESS_HOURS, get_default_prefetch_queue
+from post_variants import primary_text
+from platform_fanout import publish_to_platforms, print_outcome_report
+from metrics import instrument_run
+from publishing import TwitterLinkedInMixin, FacebookPagesMixin
+from quote_cards import cards_enabled, get_default_card_renderer
+from news_ingest import format_headlines, get_default_news_ingest
+
+DEFAULT_CATALOG_PATH = 'feeds.yaml'
+# The built-in posters (news_poster.py and the others), declared as catalog feeds
+BUILTIN_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'posters.yaml')
+DEFAULT_FEED_CONCURRENCY = 8     # catalog feeds generating at the same time
+SUPPORTED_TARGETS = ('twitter', 'linkedin', 'facebook')
+
+# Settings every feed gets unless the catalog's defaults or the feed override them
+FEED_DEFAULTS = {
+    'system': '',
+    # None: the model router picks one per target format (see model_router.py)
+    'model': None,
+    'temperature': 0.7,
+    'max_tokens': 500,
+    'date_format': '%B %d, %Y',
+    'freshness_hours': DEFAULT_FRESHNESS_HOURS,
+    'quote_cards': False,
+    'pages': [],
+    'news_feeds': [],
+    # Added to the prompt only when news_feeds have recent articles
+    'grounding': '',
+}
+REQUIRED_KEYS = ('name', 'prompt', 'targets', 'schedule')
+
+# Placeholders a prompt, system message or grounding may use, filled in at generation time
+TEMPLATE_FIELDS = {
+    'today': lambda feed, now, articles: now.strftime(feed.date_format),
+    'date': lambda feed, now, articles: now.date().isoformat(),
+    'weekday': lambda feed, now, articles: now.strftime('%A'),
+    'feed': lambda feed, now, articles: feed.name,
+    # Top recent articles from the feed's news_feeds (see news_ingest.py)
+    'headlines': lambda feed, now, articles: format_headlines(articles or []),
+}
+# Publish method for each target
+PUBLISH_METHODS = {'twitter': 'post_to_twitter', 'linkedin': 'post_to_linkedin', 'facebook': 'post_to_facebook'}
+
+
+class PromptTemplate:
+    """A prompt with {placeholders}, parsed and checked once when the catalog loads.
+
+    Literal braces are written {{ and }}, as in str.format.
+    """
+
+    def __init__(self, text, where):
+        self.text = text
+        self.parts = []
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError as e:
+            raise ValueError(f"{where}: {e}") from None
+        for literal, field, format_spec, conversion in parsed:
+            if field is not None and (field not in TEMPLATE_FIELDS or format_spec or conversion):
+                raise ValueError(f"{where}: unknown placeholder {{{field}}} "
+                                 f"(available: {', '.join('{' + name + '}' for name in TEMPLATE_FIELDS)})")
+            self.parts.append((literal, field))
+        self.fields = {field for _literal, field in self.parts if field}
+
+    def render(self, values):
+        return ''.join(literal + (values[field] if field else '') for literal, field in self.parts)
+
+
+class Feed:
+    """One catalog entry, validated and compiled into its poster class"""
+
+    def __init__(self, entry, defaults, where):
+        unknown = set(entry) - set(FEED_DEFAULTS) - set(REQUIRED_KEYS)
+        if unknown:
+            raise ValueError(f"{where}: unknown setting(s) {', '.join(sorted(unknown))}")
+        missing = [key for key in REQUIRED_KEYS if not entry.get(key)]
+        if missing:
+            raise ValueError(f"{where}: missing {', '.join(missing)}")
+        settings = {**FEED_DEFAULTS, **defaults, **entry}
+
+        self.name = str(settings['name'])
+        if not re.fullmatch(r'[a-z][a-z0-9_]*', self.name):
+            raise ValueError(f"{where}: feed name '{self.name}' must be lowercase letters, digits and underscores")
+        where = f"{where} ({self.name})"
+
+        targets = settings['targets']
+        self.targets = [target.strip().lower() for target in
+                        (targets.split(',') if isinstance(targets, str) else targets)]
+        bad = [target for target in self.targets if target not in SUPPORTED_TARGETS]
+        if bad or not self.targets:
+            raise ValueError(f"{where}: targets must be some of {', '.join(SUPPORTED_TARGETS)}, got {targets!r}")
+
+        self.schedule = str(settings['schedule'])
+        try:
+            CronSchedule(self.schedule)
+        except ValueError as e:
+            raise ValueError(f"{where}: bad schedule {self.schedule!r} ({e})") from None
+        self.model = str(settings['model']) if settings['model'] else None
+        self.temperature = float(settings['temperature'])
+        self.max_tokens = int(settings['max_tokens'])
+        self.date_format = str(settings['date_format'])
+        self.freshness_hours = float(settings['freshness_hours'])
+        self.quote_cards = bool(settings['quote_cards'])
+        self.pages = [str(page) for page in settings['pages'] or []]
+        self.news_feeds = [str(url) for url in settings['news_feeds'] or []]
+        self.prompt = PromptTemplate(str(settings['prompt']), f"{where} prompt")
+        self.system = PromptTemplate(str(settings['system']), f"{where} system")
+        self.grounding = PromptTemplate(str(settings['grounding']), f"{where} grounding")
+        if ('headlines' in self.prompt.fields | self.system.fields | self.grounding.fields
+                or self.grounding.text) and not self.news_feeds:
+            raise ValueError(f"{where}: {{headlines}} and grounding need news_feeds")
+        self.poster_class = feed_poster_class(self)
+
+    def messages(self, now=None, articles=None):
+        """The chat messages for one generation, grounded in articles from news_ingest if there are any"""
+        now = now or datetime.now()
+        fields = self.prompt.fields | self.system.fields | self.grounding.fields
+        values = {field: TEMPLATE_FIELDS[field](self, now, articles) for field in fields}
+        prompt = self.prompt.render(values)
+        if articles and self.grounding.text:
+            prompt += '\n\n' + self.grounding.render(values)
+        messages = [{"role": "user", "content": prompt}]
+        if self.system.text:
+            messages.insert(0, {"role": "system", "content": self.system.render(values)})
+        return messages
+
+
+def load_catalog(path=None):
+    """Load and compile every feed in a YAML (.yaml/.yml) or TOML (.toml) catalog.
+
+    The catalog holds an optional `defaults` mapping applied to every feed
+    and a `feeds` list. Raises ValueError on the first invalid entry, so a
+    broken catalog stops the daemon at startup rather than at posting time.
+    """
+    path = path or os.getenv('FEED_CATALOG', DEFAULT_CATALOG_PATH)
+    if path.endswith('.toml'):
+        import tomllib
+        with open(path, 'rb') as catalog_file:
+            data = tomllib.load(catalog_file)
+    else:
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"{path}: reading a YAML feed catalog needs PyYAML (pip install PyYAML)") from None
+        with open(path, encoding='utf-8') as catalog_file:
+            data = yaml.safe_load(catalog_file) or {}
+
+    defaults = data.get('defaults') or {}
+    unknown = set(defaults) - set(FEED_DEFAULTS)
+    if unknown:
+        raise ValueError(f"{path} defaults: unknown setting(s) {', '.join(sorted(unknown))}")
+    feeds = []
+    for index, entry in enumerate(data.get('feeds') or [], 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"{path} feed #{index}: expected a mapping of settings")
+        feeds.append(Feed(entry, defaults, f"{path} feed #{index}"))
+    names = [feed.name for feed in feeds]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"{path}: duplicate feed name(s) {', '.join(duplicates)}")
+    return feeds
+
+
+_builtin_feeds = None
+_builtin_feeds_lock = threading.Lock()
+
+
+def builtin_feeds():
+    """The built-in posters' feeds from posters.yaml, loaded once per process"""
+    global _builtin_feeds
+    with _builtin_feeds_lock:
+        if _builtin_feeds is None:
+            _builtin_feeds = load_catalog(BUILTIN_CATALOG_PATH)
+        return _builtin_feeds
+
+
+def builtin_poster_class(name):
+    """Poster class of a built-in feed, e.g. builtin_poster_class('tech_news')"""
+    return next(feed.poster_class for feed in builtin_feeds() if feed.name == name)
+
+
+def load_feeds(path=None):
+    """The built-in feeds followed by the feed catalog's.
+
+    Without FEED_CATALOG, a missing feeds.yaml just means no catalog feeds.
+    Catalog feeds may not reuse a built-in poster's name.
+    """
+    feeds = list(builtin_feeds())
+    path = path or os.getenv('FEED_CATALOG')
+    if not path and not os.path.exists(DEFAULT_CATALOG_PATH):
+        return feeds
+    catalog = load_catalog(path)
+    taken = [feed.name for feed in catalog if feed.name in {builtin.name for builtin in feeds}]
+    if taken:
+        raise ValueError(f"Feed catalog: {', '.join(taken)} already used by built-in posters")
+    return feeds + catalog
+
+
+def catalog_jobs(path=None):
+    """(name, poster_class, run_args, schedule) jobs for every feed, built-in or from the catalog"""
+    return [(feed.name, feed.poster_class, (), feed.schedule) for feed in load_feeds(path)]
+
+
+_shared_clients = {}
+_shared_clients_lock = threading.Lock()
+_generation_slots = None
+
+
+def shared_client(name, factory):
+    """One API client per process for every catalog feed, created on first use"""
+    with _shared_clients_lock:
+        if _shared_clients.get(name) is None:
+            _shared_clients[name] = factory()
+        return _shared_clients[name]
+
+
+def generation_slots():
+    """Semaphore that lets FEED_CONCURRENCY catalog feeds generate at once (read on first use, after .env)"""
+    global _generation_slots
+    with _shared_clients_lock:
+        if _generation_slots is None:
+            _generation_slots = threading.BoundedSemaphore(
+                int(os.getenv('FEED_CONCURRENCY', DEFAULT_FEED_CONCURRENCY)))
+        return _generation_slots
+
+
+class CatalogPoster:
+    """Generates and publishes one catalog feed.
+
+    Each feed gets its own subclass (see feed_poster_class) with FEED,
+    POSTER_NAME and PREFETCH_FRESHNESS_HOURS set and the publishing mixins
+    for its targets, so the daemon, prefetcher, bulk scheduler and outbox
+    retrier treat built-in and catalog feeds alike. All feeds share one
+    OpenAI and one Twitter client, and at most FEED_CONCURRENCY of them
+    generate at once.
+    """
+
+    FEED = None
+    POSTER_NAME = None
+
+    def __init__(self, transport=None, generation_cache=None, force_regenerate=False, outbox=None,
+                 stream=False, rate_governor=None, dedup_index=None, credentials=None,
+                 prefetch_queue=None):
+        self.feed = self.FEED
+        self.transport = transport or get_default_transport()
+        self.outbox = outbox or get_default_outbox()
+        self.rate_governor = rate_governor or get_default_governor()
+        self.dedup_index = dedup_index or get_default_dedup_index()
+        self.prefetch_queue = prefetch_queue or get_default_prefetch_queue()
+        self.credentials = credentials or get_default_credentials()
+        self.content_generator = ContentGenerator(
+            self.POSTER_NAME, lambda: self.openai_client,
+            cache=generation_cache, force_regenerate=force_regenerate, stream=stream,
+            dedup_index=self.dedup_index
+        )
+        # Articles from the feed's RSS/Atom feeds, for {headlines} and grounding
+        self.news_ingest = get_default_news_ingest() if self.feed.news_feeds else None
+        if self.feed.quote_cards and cards_enabled():
+            self.card_renderer = get_default_card_renderer()
+
+        # Twitter/LinkedIn account, as for the English posters
+        self.twitter_thread = os.getenv('TWITTER_THREAD', 'false').lower() == 'true'
+        self.twitter_account = (os.getenv('TWITTER_ACCESS_TOKEN') or '').split('-')[0] or 'default'
+
+        # Facebook pages: the feed's own pages, or every configured page
+        self.facebook_page_id = self.feed.pages[0] if self.feed.pages else os.getenv('FACEBOOK_PAGE_ID')
+        self.facebook_access_token = None if self.feed.pages else os.getenv('FACEBOOK_ACCESS_TOKEN')
+        self.facebook_batch = FacebookBatchPublisher(self.transport, self.rate_governor)
+
+    @property
+    def openai_client(self):
+        def create():
+            from openai import OpenAI
+            return OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        return shared_client('openai', create)
+
+    @property
+    def facebook_pages(self):
+        """The feed's pages with their cached tokens, or every page from .env"""
+        if not self.feed.pages:
+            return FacebookPagesMixin.facebook_pages.fget(self)
+        pages = self.credentials.page_tokens(dict.fromkeys(self.feed.pages))
+        for page_id in [page_id for page_id, token in pages.items() if not token]:
+            print(f"[{self.POSTER_NAME}] No access token for Facebook page {page_id} (run credentials.py --refresh)")
+            del pages[page_id]
+        return pages
+
+    def select_targets(self, platform=None):
+        """The feed's targets, or what a run asks for: one platform, or 'both' for Twitter and LinkedIn"""
+        if not platform:
+            return list(self.feed.targets)
+        selected = ['twitter', 'linkedin'] if platform.lower() == 'both' else [platform.lower()]
+        unsupported = [name for name in selected if not hasattr(self, PUBLISH_METHODS.get(name, '-'))]
+        if unsupported:
+            raise ValueError(f"{self.POSTER_NAME} can't publish to {', '.join(unsupported)}")
+        return selected
+
+    def get_publishers(self, targets=None):
+        """Map each of the feed's targets (or the given ones) to its publish method"""
+        return {target: getattr(self, PUBLISH_METHODS[target]) for target in targets or self.feed.targets}
+
+    def publish_to_target(self, platform, target, content):
+        """Publish to a single outbox delivery target (used by the outbox retrier)"""
+        if platform == 'facebook':
+            return self.post_to_facebook(content, page_id=target)
+        return getattr(self, PUBLISH_METHODS[platform])(content)
+
+    def grounded_messages(self, now=None):
+        """A function that refreshes the feed's news feeds and returns its prompt with their top articles"""
+        def build():
+            articles = self.news_ingest.top_articles(self.POSTER_NAME, urls=self.feed.news_feeds)
+            return self.feed.messages(now, articles=articles)
+        return build
+
+    def generate_content(self, platform=None, now=None, slot=None):
+        """Generate what run(platform) publishes: text for one target, per-target variants for several.
+
+        now is the time the post is for (default: now); it sets the prompt's
+        date, so prefetched posts are written for their own day. slot is the
+        outbox slot (see outbox.slot_key) that keys the generation cache and
+        the repeat check; it defaults to now's date.
+        """
+        targets = self.select_targets(platform)
+        print(f"[{self.POSTER_NAME}] Generating...")
+        try:
+            # Grounded in the feed's news articles when it has news feeds (see news_ingest.py).
+            # The cache is keyed on the prompt alone, so feeds are only fetched on a cache miss.
+            messages = self.feed.messages(now)
+            factory = self.grounded_messages(now) if self.news_ingest else None
+            slot = slot or (now.date().isoformat() if now else None)
+            with generation_slots():
+                if len(targets) > 1:
+                    return self.content_generator.generate_variants(
+                        model=self.feed.model,
+                        messages=messages,
+                        max_tokens=self.feed.max_tokens * 2,
+                        temperature=self.feed.temperature,
+                        platforms=targets,
+                        slot=slot,
+                        messages_factory=factory
+                    )
+                return self.content_generator.generate(
+                    model=self.feed.model,
+                    messages=messages,
+                    max_tokens=self.feed.max_tokens,
+                    temperature=self.feed.temperature,
+                    char_budget=PLATFORM_CHAR_LIMITS[targets[0]],
+                    target_format=targets[0],
+                    slot=slot,
+                    messages_factory=factory
+                )
+        except Exception as e:
+            print(f"[{self.POSTER_NAME}] Error generating content from OpenAI: {e}")
+            return None
+
+    @instrument_run
+    def run(self, platform=None, content=None, slot=None):
+        """Generate (or take prefetched content) and publish to the feed's targets.
+
+        platform picks other targets for this run (see select_targets).
+        content, if given, is a result of generate_content() made earlier (see
+        generate_all.py); it's published without generating again. slot is
+        the outbox slot of a scheduled run (see outbox.slot_key); manual runs
+        leave it to default to today's date.
+        """
+        targets = self.select_targets(platform)
+        if content is None:
+            content = self.prefetch_queue.take(self.POSTER_NAME, (platform,) if platform else ())
+        post = content if content is not None else self.generate_content(platform, slot=slot)
+
+        if not post:
+            print(f"[{self.POSTER_NAME}] Failed to generate content. Exiting.")
+            return
+
+        print("\n" + "="*50)
+        print(f"Generated {self.POSTER_NAME}:")
+        print("="*50)
+        # Per-target variants: the longest stands for the post as a whole
+        variants = {}
+        if isinstance(post, dict):
+            variants = {target: post[target] for target in targets}
+            post = primary_text(variants)
+            for target, text in variants.items():
+                print(f"[{target}]\n{text}\n")
+        else:
+            print(post)
+        print("="*50 + "\n")
+
+        publishers = self.get_publishers(targets)
+        guarded = {}
+        if 'facebook' in publishers and len(self.facebook_pages) > 1:
+            # Many pages: one Graph batch request per 50 pages. Recorded first,
+            # so the slot's stored content is the Facebook text
+            del publishers['facebook']
+            guarded['facebook'] = self.outbox.guard_batch(
+                self.POSTER_NAME, variants.get('facebook', post), 'facebook', list(self.facebook_pages),
+                self.post_to_facebook_pages, slot=slot
+            )
+        if publishers:
+            # Only the selected platforms' accounts are looked up, each once per run
+            accounts = {'twitter': lambda: self.twitter_account, 'linkedin': lambda: self.linkedin_person_id,
+                        'facebook': lambda: self.facebook_page_id}
+            account_ids = {name: accounts[name]() for name in publishers}
+            if 'linkedin' in publishers:
+                publishers['linkedin'] = functools.partial(self.post_to_linkedin, person_id=account_ids['linkedin'])
+            guarded.update(self.outbox.guard(self.POSTER_NAME, post, publishers, targets=account_ids,
+                                             slot=slot, variants=variants))
+
+        print(f"Posting to {', '.join(guarded)}...")
+        # Recorded once handed to the outbox, which delivers it now or on retry
+        for text in dict.fromkeys(variants.values()) if variants else [post]:
+            self.dedup_index.add(self.POSTER_NAME, text, slot=slot)
+        report = publish_to_platforms(guarded, post)
+        print_outcome_report(report)
+        return report
+
+
+class SharedTwitterMixin(TwitterLinkedInMixin):
+    """Twitter and LinkedIn publishing for catalog feeds, with one Twitter client for all of them"""
+
+    @property
+    def twitter_client(self):
+        if self._twitter_client is None:
+            self._twitter_client = shared_client('twitter', lambda: TwitterLinkedInMixin.twitter_client.fget(self))
+        return self._twitter_client
+
+
+def feed_poster_class(feed):
+    """Build the poster class for a feed: CatalogPoster plus the mixins its targets need.
+
+    Feeds with a Twitter or LinkedIn target can be run for either (or both),
+    the way the English posters are.
+    """
+    bases = [CatalogPoster]
+    if {'twitter', 'linkedin'} & set(feed.targets):
+        bases.append(SharedTwitterMixin)
+    if 'facebook' in feed.targets:
+        bases.append(FacebookPagesMixin)
+    class_name = ''.join(part.capitalize() for part in feed.name.split('_')) + 'Feed'
+    return type(class_name, tuple(bases), {
+        'FEED': feed,
+        'POSTER_NAME': feed.name,
+        'PREFETCH_FRESHNESS_HOURS': feed.freshness_hours,
+        '__module__': __name__,
+    })
+
+
+def run_poster_script(name, default_platform=None):
+    """Command line of a built-in poster script: [twitter|linkedin|both] [--force-regenerate] [--stream]
+
+    --force-regenerate skips today's cached content, --stream prints tokens as they arrive.
+    """
+    poster_class = builtin_poster_class(name)
+    choices = ['twitter', 'linkedin', 'both'] if issubclass(poster_class, TwitterLinkedInMixin) else []
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if args and args[0] not in choices:
+        platforms = f"[{'|'.join(choices)}] " if choices else ''
+        print(f"Usage: python {os.path.basename(sys.argv[0])} {platforms}[--force-regenerate] [--stream]")
+        sys.exit(1)
+
+    poster = poster_class(
+        force_regenerate='--force-regenerate' in sys.argv,
+        stream='--stream' in sys.argv
+    )
+    poster.run(args[0] if args else default_platform)
+
+
+if __name__ == "__main__":
+    # python feed_catalog.py [catalog]                      -> validate the catalog and list every feed
+    # python feed_catalog.py --run <feed> [--force-regenerate]  -> generate and publish one feed now
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    args = [arg for index, arg in enumerate(sys.argv[1:], 1)
+            if not arg.startswith('--') and sys.argv[index - 1] != '--run']
+    try:
+        feeds = load_feeds(args[0] if args else None)
+    except (OSError, ValueError) as e:
+        print(f"Invalid feed catalog: {e}")
+        sys.exit(1)
+
+    if '--run' in sys.argv:
+        name = sys.argv[sys.argv.index('--run') + 1] if len(sys.argv) > sys.argv.index('--run') + 1 else None
+        feed = next((feed for feed in feeds if feed.name == name), None)
+        if feed is None:
+            print(f"Unknown feed '{name}'. Available: {', '.join(feed.name for feed in feeds)}")
+            sys.exit(1)
+        feed.poster_class(force_regenerate='--force-regenerate' in sys.argv).run()
+        sys.exit(0)
+
+    print(f"{'Feed':<24}{'Targets':<26}{'Schedule':<18}Placeholders")
+    print("-" * 84)
+    for feed in feeds:
+        fields = ', '.join(sorted(feed.prompt.fields | feed.system.fields | feed.grounding.fields)) or '-'
+        print(f"{feed.name:<24}{','.join(feed.targets):<26}{feed.schedule:<18}{fields}")
+    builtin = len(builtin_feeds())
+    print(f"\n{len(feeds)} feed(s) OK ({builtin} built-in, {len(feeds) - builtin} from the catalog)")
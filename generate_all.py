@@ -0,0 +1,119 @@
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+DEFAULT_CONCURRENCY = 4  # OpenAI requests in flight at once
+
+
+class AsyncCompletionsBridge:
+    """Synchronous chat.completions facade over one AsyncOpenAI client.
+
+    Each poster's generation pipeline (cache, routing, hedging, repeat
+    checks) runs unchanged in a worker thread; its API calls are handed to
+    the event loop, where they share the async client's connection pool and
+    a semaphore that caps how many requests are in flight.
+    """
+
+    def __init__(self, client, loop, concurrency):
+        self.client = client
+        self.loop = loop
+        self.semaphore = asyncio.Semaphore(concurrency)
+        # Looks like an OpenAI client to ContentGenerator: client.chat.completions.create()
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        if kwargs.get('stream'):
+            raise ValueError("Streaming is not available in generate-all mode")
+        return asyncio.run_coroutine_threadsafe(self._create(kwargs), self.loop).result()
+
+    async def _create(self, kwargs):
+        async with self.semaphore:
+            return await self.client.chat.completions.create(**kwargs)
+
+
+async def generate_all(jobs, concurrency=None, publish=True, **poster_options):
+    """Generate content for every job concurrently and publish each as soon as it's ready.
+
+    jobs are (name, poster_class, run_args) tuples, as from scheduler_daemon.load_jobs().
+    Returns {name: {'generated': seconds, 'content': bool, 'report': report}}.
+    """
+    from openai import AsyncOpenAI
+
+    concurrency = int(concurrency or os.getenv('GENERATE_CONCURRENCY', DEFAULT_CONCURRENCY))
+    loop = asyncio.get_running_loop()
+    client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    bridge = AsyncCompletionsBridge(client, loop, concurrency)
+    # One thread per job: they spend their time waiting on the event loop or a platform
+    executor = ThreadPoolExecutor(max_workers=max(1, len(jobs)), thread_name_prefix='generate')
+    results = {}
+
+    async def run_job(name, poster_class, run_args):
+        poster = poster_class(**poster_options)
+        poster.content_generator.client_getter = lambda: bridge
+        started = time.monotonic()
+        try:
+            content = await loop.run_in_executor(executor, poster.generate_content, *run_args)
+        except Exception as e:
+            print(f"[{name}] Generation failed: {e}")
+            content = None
+        elapsed = time.monotonic() - started
+        results[name] = {'generated': elapsed, 'content': bool(content), 'report': None}
+        print(f"[{name}] Content ready after {elapsed:.1f}s")
+        if not content or not publish:
+            return
+        try:
+            results[name]['report'] = await loop.run_in_executor(
+                executor, lambda: poster.run(*run_args, content=content))
+        except Exception as e:
+            print(f"[{name}] Publishing failed: {e}")
+
+    try:
+        await asyncio.gather(*(run_job(name, poster_class, run_args) for name, poster_class, run_args in jobs))
+    finally:
+        executor.shutdown(wait=False)
+        await client.close()
+    return results
+
+
+if __name__ == "__main__":
+    # python generate_all.py [job,job] [--concurrency N] [--generate-only] [--force-regenerate]
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    from scheduler_daemon import load_jobs
+
+    args = sys.argv[1:]
+    concurrency = None
+    if '--concurrency' in args:
+        concurrency = int(args[args.index('--concurrency') + 1])
+        del args[args.index('--concurrency'):args.index('--concurrency') + 2]
+    names = [arg for arg in args if not arg.startswith('--')]
+    selected = names[0].split(',') if names else None
+    all_jobs = load_jobs()
+    jobs = [(name, poster_class, run_args) for name, poster_class, run_args, _schedule in all_jobs
+            if not selected or name in selected]
+    if not jobs:
+        print(f"Unknown job(s). Available: {', '.join(job[0] for job in all_jobs)}")
+        sys.exit(1)
+
+    started = time.monotonic()
+    results = asyncio.run(generate_all(jobs, concurrency=concurrency, publish='--generate-only' not in args,
+                                       force_regenerate='--force-regenerate' in args))
+    wall = time.monotonic() - started
+
+    print(f"\n{'Job':<22}{'Generated':>10}  Outcome")
+    print("-" * 50)
+    for name, _poster_class, _run_args in jobs:
+        result = results.get(name, {})
+        if not result.get('content'):
+            outcome = 'no content'
+        elif result.get('report') is None:
+            outcome = 'generated' if '--generate-only' in args else 'not published'
+        else:
+            outcome = ', '.join(f"{platform}: {item['status']}" for platform, item in result['report'].items())
+        print(f"{name:<22}{result.get('generated', 0):>9.1f}s  {outcome}")
+    total = sum(result['generated'] for result in results.values())
+    print(f"\nWall time {wall:.1f}s for {total:.1f}s of generation across {len(jobs)} job(s)")
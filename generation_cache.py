@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import date
+
+DEFAULT_CACHE_PATH = os.path.join('state', 'generation_cache.db')
+DEFAULT_TTL_HOURS = 36
+DEFAULT_MAX_ENTRIES = 500
+
+
+class GenerationCache:
+    """On-disk cache of generated post text.
+
+    Entries are keyed by (poster, rendered prompt hash, model, temperature,
+    max_tokens, slot) so a rerun of the same posting slot returns the text
+    that was already paid for instead of calling OpenAI again, while a feed
+    that posts twice a day gets fresh text for each slot.
+    """
+
+    def __init__(self, path=None, ttl_hours=None, max_entries=None):
+        self.path = path or os.getenv('GENERATION_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self.ttl_seconds = float(ttl_hours or os.getenv('GENERATION_CACHE_TTL_HOURS', DEFAULT_TTL_HOURS)) * 3600
+        self.max_entries = int(max_entries or os.getenv('GENERATION_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS generations (
+                    cache_key TEXT PRIMARY KEY,
+                    poster TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    content TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_generations_created ON generations (created_at)")
+
+    def _connect(self):
+        # Used as `with closing(self._connect()) as conn, conn:` - the inner
+        # `with conn` commits, closing() releases the file handle
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def make_key(poster, messages, model, temperature, max_tokens, slot=None, extra=None):
+        """Build the cache key for one generation request.
+
+        slot is the outbox slot the text is for (see outbox.slot_key);
+        manual runs leave it to default to today's date, as the outbox does.
+        extra distinguishes variants of the same request, e.g. a streamed
+        generation cut to a shorter character budget.
+        """
+        prompt_hash = hashlib.sha256(
+            json.dumps(messages, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        slot = slot or date.today().isoformat()
+        parts = [poster, prompt_hash, model, temperature, max_tokens, slot]
+        if extra is not None:
+            parts.append(extra)
+        raw = json.dumps(parts)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, cache_key):
+        """Return cached content, or None when missing or expired"""
+        with self._lock, closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT content, created_at FROM generations WHERE cache_key = ?",
+                (cache_key,)
+            ).fetchone()
+        if not row:
+            return None
+        content, created_at = row
+        if time.time() - created_at > self.ttl_seconds:
+            return None
+        return content
+
+    def put(self, cache_key, poster, model, content):
+        """Store generated content and evict expired/overflow entries"""
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO generations (cache_key, poster, model, created_at, content) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (cache_key, poster, model, now, content)
+            )
+            conn.execute("DELETE FROM generations WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM generations WHERE cache_key NOT IN "
+                "(SELECT cache_key FROM generations ORDER BY created_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM generations")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Return the process-wide generation cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = GenerationCache()
+        return _default_cache
@@ -1,23 +1,13 @@
-import os
-import requests
 from dotenv import load_dotenv
+from credentials import get_default_credentials
 
 load_dotenv()
 
-access_token = os.getenv('LINKEDIN_ACCESS_TOKEN')
-
-# Try userinfo endpoint
-url = "https://api.linkedin.com/v2/userinfo"
-headers = {
-    "Authorization": f"Bearer {access_token}"
-}
-
-response = requests.get(url, headers=headers)
-print("UserInfo Response:")
-print(response.json())
-
-# Try me endpoint
-url2 = "https://api.linkedin.com/v2/me"
-response2 = requests.get(url2, headers=headers)
-print("\nMe Response:")
-print(response2.json())
\ No newline at end of file
+# Looks up the person ID for LINKEDIN_ACCESS_TOKEN from /v2/userinfo and
+# caches it; the posters do the same on first use when LINKEDIN_PERSON_ID
+# isn't set.
+try:
+    person_id = get_default_credentials().resolve_linkedin_person_id()
+    print(f"LinkedIn person ID: {person_id}")
+except Exception as e:
+    print(f"Error: {e}")
@@ -1,62 +1,23 @@
-import requests
-import os
 from dotenv import load_dotenv
+from credentials import get_default_credentials
 
 load_dotenv()
 
-# Your Facebook App credentials
-APP_ID = "750090700854253"  # Your app ID
-APP_SECRET = input("Enter your App Secret: ")  # Get from Facebook App Dashboard
-SHORT_LIVED_TOKEN = os.getenv('FACEBOOK_ACCESS_TOKEN')  # Your current token
+# Exchanges FACEBOOK_USER_TOKEN for a long-lived token and caches every page
+# token from /me/accounts (needs FACEBOOK_APP_ID and FACEBOOK_APP_SECRET).
+# The posters read the cache directly, so nothing needs copying into .env.
+# The scheduler daemon repeats this before the tokens expire.
+credentials = get_default_credentials()
 
-print("Step 1: Exchanging short-lived token for long-lived token...")
-
-# Exchange short-lived token for long-lived user token (60 days)
-url = "https://graph.facebook.com/v18.0/oauth/access_token"
-params = {
-    'grant_type': 'fb_exchange_token',
-    'client_id': APP_ID,
-    'client_secret': APP_SECRET,
-    'fb_exchange_token': SHORT_LIVED_TOKEN
-}
-
-response = requests.get(url, params=params)
-data = response.json()
-
-if 'access_token' in data:
-    long_lived_user_token = data['access_token']
-    print(f"✓ Long-lived user token obtained (expires in {data.get('expires_in', 0)} seconds)")
-    print(f"Long-lived user token: {long_lived_user_token[:50]}...")
-    
-    print("\nStep 2: Getting long-lived page token...")
-    
-    # Get page access token using long-lived user token
-    url2 = "https://graph.facebook.com/v18.0/me/accounts"
-    params2 = {'access_token': long_lived_user_token}
-    
-    response2 = requests.get(url2, params=params2)
-    pages_data = response2.json()
-    
-    if 'data' in pages_data:
-        print(f"\n✓ Found {len(pages_data['data'])} page(s):\n")
-        
-        for page in pages_data['data']:
-            print(f"Page Name: {page['name']}")
-            print(f"Page ID: {page['id']}")
-            print(f"Long-Lived Page Access Token:")
-            print(f"{page['access_token']}")
-            print("-" * 80)
-            
-            # Check if this is your page
-            if page['id'] == '905589205979351':
-                print(f"\n✅ YOUR PAGE TOKEN (Never expires as long as app is active):")
-                print(f"FACEBOOK_ACCESS_TOKEN={page['access_token']}")
-                print("\nUpdate this token in your .env file!")
-    else:
-        print(f"Error getting pages: {pages_data}")
-else:
-    print(f"Error: {data}")
+try:
+    credentials.exchange_facebook_user_token()
+    pages = credentials.refresh_page_tokens()
+except Exception as e:
+    print(f"Error: {e}")
     print("\nMake sure:")
-    print("1. Your App Secret is correct")
-    print("2. Your current token is valid")
-    print("3. You have the right permissions")
+    print("1. FACEBOOK_APP_ID and FACEBOOK_APP_SECRET are set in .env")
+    print("2. FACEBOOK_USER_TOKEN holds a valid user token")
+    print("3. The token has pages_show_list, pages_read_engagement and pages_manage_posts")
+else:
+    for page_id, name in pages.items():
+        print(f"✓ {name} ({page_id})")
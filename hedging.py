@@ -0,0 +1,148 @@
+import os
+import queue
+import threading
+from collections import deque
+
+DEFAULT_PERCENTILE = 90       # hedge once the request is slower than this share of recent calls
+DEFAULT_MIN_SAMPLES = 20      # observed calls needed before the percentile is trusted
+DEFAULT_INITIAL_DELAY = 20.0  # hedge delay in seconds until then
+DEFAULT_MIN_DELAY = 2.0       # never hedge sooner than this
+DEFAULT_MAX_HEDGE_RATE = 0.2  # stop hedging if more than this share of recent calls were hedged
+WINDOW = 200                  # recent calls kept per model
+
+# Hedge outcomes
+NOT_NEEDED = 'not_needed'
+PRIMARY_WON = 'primary_won'
+HEDGE_WON = 'hedge_won'
+FAILED = 'failed'
+
+
+class HedgeCancelled(Exception):
+    """Raised by a call that stopped because the other request answered first"""
+
+
+class HedgePolicy:
+    """Sends a second chat completion when the first one is slower than usual.
+
+    The hedge delay is a percentile of the latencies recently observed for
+    the model, so only the slow tail gets a second request. Whichever
+    response arrives first is used and the other request is cancelled:
+    each call gets a threading.Event that is set once it has lost, and is
+    expected to stop (closing its HTTP response) when it sees it.
+    """
+
+    def __init__(self, enabled=None, percentile=None, min_samples=None, initial_delay=None,
+                 min_delay=None, max_hedge_rate=None, hedge_model=None):
+        if enabled is None:
+            enabled = os.getenv('LLM_HEDGE', 'false').lower() == 'true'
+        self.enabled = enabled
+        self.percentile = float(percentile or os.getenv('LLM_HEDGE_PERCENTILE', DEFAULT_PERCENTILE))
+        self.min_samples = int(min_samples or os.getenv('LLM_HEDGE_MIN_SAMPLES', DEFAULT_MIN_SAMPLES))
+        self.initial_delay = float(initial_delay or os.getenv('LLM_HEDGE_INITIAL_DELAY', DEFAULT_INITIAL_DELAY))
+        self.min_delay = float(min_delay or os.getenv('LLM_HEDGE_MIN_DELAY', DEFAULT_MIN_DELAY))
+        self.max_hedge_rate = float(max_hedge_rate or os.getenv('LLM_HEDGE_MAX_RATE', DEFAULT_MAX_HEDGE_RATE))
+        # Model for the hedge request; empty means the same model as the first request
+        self.hedge_model = hedge_model or os.getenv('LLM_HEDGE_MODEL') or None
+
+        self._latencies = {}
+        self._hedged = deque(maxlen=WINDOW)
+        self._hedge_client = None
+        self._lock = threading.Lock()
+
+    def observe(self, model, seconds):
+        """Record the latency of a completed call"""
+        with self._lock:
+            self._latencies.setdefault(model, deque(maxlen=WINDOW)).append(seconds)
+
+    def hedge_delay(self, model):
+        """Seconds to wait for the first response before sending the hedge"""
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < self.min_samples:
+            return max(self.min_delay, self.initial_delay)
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return max(self.min_delay, samples[index])
+
+    def hedge_rate(self):
+        with self._lock:
+            return sum(self._hedged) / len(self._hedged) if self._hedged else 0.0
+
+    def hedge_client(self, primary_client_getter):
+        """Client for hedge requests: a separate endpoint if OPENAI_HEDGE_BASE_URL is set"""
+        base_url = os.getenv('OPENAI_HEDGE_BASE_URL')
+        if not base_url:
+            return primary_client_getter()
+        with self._lock:
+            if self._hedge_client is None:
+                from openai import OpenAI
+                self._hedge_client = OpenAI(
+                    base_url=base_url,
+                    api_key=os.getenv('OPENAI_HEDGE_API_KEY') or os.getenv('OPENAI_API_KEY')
+                )
+            return self._hedge_client
+
+    def run(self, model, primary, hedge):
+        """Call primary(cancelled), and hedge(cancelled) too if primary is slow or fails.
+
+        cancelled is a threading.Event set when the other call has won.
+        Returns (result, outcome). Raises the last error if both calls fail.
+        """
+        results = queue.Queue()
+        cancelled = {'primary': threading.Event(), 'hedge': threading.Event()}
+
+        def launch(name, call):
+            def target():
+                try:
+                    results.put((name, call(cancelled[name]), None))
+                except Exception as e:
+                    results.put((name, None, e))
+            threading.Thread(target=target, name=f"llm-{name}", daemon=True).start()
+
+        launch('primary', primary)
+        delay = self.hedge_delay(model)
+        try:
+            name, result, error = results.get(timeout=delay)
+            if error is None:
+                self._record_hedged(False)
+                return result, NOT_NEEDED
+            outstanding = 0
+            print(f"[hedge] {model} request failed ({error}). Sending a hedge request...")
+        except queue.Empty:
+            if self.hedge_rate() > self.max_hedge_rate:
+                # Hedging too often means the percentile is stale; don't double the bill
+                self._record_hedged(False)
+                name, result, error = results.get()
+                if error is not None:
+                    raise error
+                return result, NOT_NEEDED
+            outstanding = 1
+            print(f"[hedge] No response from {model} after {delay:.1f}s. Sending a hedge request...")
+
+        self._record_hedged(True)
+        launch('hedge', hedge)
+        outstanding += 1
+        while outstanding:
+            name, result, error = results.get()
+            outstanding -= 1
+            if error is None:
+                # The loser stops generating (billed) tokens
+                cancelled['hedge' if name == 'primary' else 'primary'].set()
+                return result, PRIMARY_WON if name == 'primary' else HEDGE_WON
+        raise error
+
+    def _record_hedged(self, hedged):
+        with self._lock:
+            self._hedged.append(hedged)
+
+
+_default_policy = None
+_default_policy_lock = threading.Lock()
+
+
+def get_default_hedge_policy():
+    """Return the process-wide hedge policy (latency history is shared by all posters)"""
+    global _default_policy
+    with _default_policy_lock:
+        if _default_policy is None:
+            _default_policy = HedgePolicy()
+        return _default_policy
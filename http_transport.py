@@ -0,0 +1,92 @@
+import os
+import threading
+from urllib.parse import urlsplit
+
+# Connection settings. Override in .env if an API is consistently slower.
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 16
+
+
+class HttpTransport:
+    """Shared HTTP layer with one pooled keep-alive session per API host.
+
+    Every LinkedIn and Facebook Graph call goes through here so repeated
+    posts reuse open TCP/TLS connections and no request can hang forever.
+    """
+
+    def __init__(self, connect_timeout=None, read_timeout=None,
+                 pool_connections=None, pool_maxsize=None):
+        self.connect_timeout = float(connect_timeout or os.getenv('HTTP_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT))
+        self.read_timeout = float(read_timeout or os.getenv('HTTP_READ_TIMEOUT', DEFAULT_READ_TIMEOUT))
+        self.pool_connections = int(pool_connections or os.getenv('HTTP_POOL_CONNECTIONS', DEFAULT_POOL_CONNECTIONS))
+        self.pool_maxsize = int(pool_maxsize or os.getenv('HTTP_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE))
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    def session_for(self, host):
+        """Return the pooled session for a host, creating it on first use"""
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._create_session(host)
+                self._sessions[host] = session
+            return session
+
+    def _create_session(self, host):
+        # Imported here so entry points that never call LinkedIn/Facebook
+        # don't pay for importing requests at startup
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=False,
+        )
+        session.mount(f"https://{host}/", adapter)
+        session.mount(f"http://{host}/", adapter)
+        session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        })
+        return session
+
+    def request(self, method, url, **kwargs):
+        """Send a request on the host's pooled session with default timeouts"""
+        host = urlsplit(url).netloc
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session_for(host).request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport():
+    """Return the process-wide transport shared by posters that aren't given one"""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = HttpTransport()
+        return _default_transport
@@ -0,0 +1,589 @@
+import contextlib
+import itertools
+import json
+import math
+import os
+import queue
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from requests.adapters import HTTPAdapter
+
+from http_transport import HttpTransport
+from generation_cache import GenerationCache
+from outbox import Outbox
+from rate_governor import RateGovernor
+from dedup_index import DedupIndex
+from credentials import CredentialService
+from prefetch_queue import PrefetchQueue
+from metrics import peak_rss_mb
+
+DEFAULT_RUNS = 20            # runs per poster
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RESULTS_PATH = os.path.join('state', 'load_benchmark.jsonl')
+
+# Stand-in behaviour per API: median latency and lognormal spread, plus the
+# share of requests answered with a 5xx error or a 429 (with Retry-After)
+DEFAULT_PROFILE = {
+    'openai': {'latency_ms': 800, 'jitter': 0.5, 'error_rate': 0.0, 'rate_limit_rate': 0.0, 'retry_after': 1},
+    'twitter': {'latency_ms': 150, 'jitter': 0.4, 'error_rate': 0.0, 'rate_limit_rate': 0.0, 'retry_after': 1},
+    'linkedin': {'latency_ms': 250, 'jitter': 0.4, 'error_rate': 0.0, 'rate_limit_rate': 0.0, 'retry_after': 1},
+    'facebook': {'latency_ms': 200, 'jitter': 0.4, 'error_rate': 0.0, 'rate_limit_rate': 0.0, 'retry_after': 1},
+}
+
+# Quotas large enough that the governor never throttles unless the stand-in sends 429s
+UNLIMITED_QUOTAS = {platform: (10 ** 9, 1) for platform in DEFAULT_PROFILE}
+
+ENGLISH_WORDS = (
+    'innovation growth success mindset future technology people learning purpose courage team '
+    'progress vision change data model cloud startup leadership resilience focus energy habit '
+    'dream journey impact community open source security research market product design'
+).split()
+HINDI_WORDS = (
+    'सफलता मेहनत जीवन सपना विश्वास समय ज्ञान साहस भारत खबर सरकार खेल विज्ञान स्वास्थ्य '
+    'प्रेरणा विचार लक्ष्य धैर्य कर्म शिक्षा परिवार समाज आशा शक्ति मन'
+).split()
+DEVANAGARI = re.compile('[ऀ-ॿ]')
+GRAPH_FEED_PATH = re.compile(r'/v[\d.]+/([^/]+)/feed')
+GRAPH_BATCH_PATH = re.compile(r'/v[\d.]+/?')
+FIXTURE_FEEDS_URL = Path(__file__).resolve().parent.joinpath('fixtures', 'feeds').as_uri()
+
+
+class StandInServer:
+    """Local HTTP server impersonating the OpenAI, Twitter, LinkedIn and Facebook Graph APIs.
+
+    Serves /v1/chat/completions, /2/tweets, /v2/ugcPosts, /{page}/feed and
+    Graph batch requests with the latency, error and 429 behaviour of the
+    profile, and counts what each API was asked to do.
+    """
+
+    def __init__(self, profile, seed=None):
+        self.profile = profile
+        self.random = random.Random(seed)
+        self.stats = {api: {'requests': 0, 'errors': 0, 'rate_limited': 0} for api in profile}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so the posters' connection pooling is exercised too
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, name='stand-in', daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _roll(self, api):
+        """Pick this request's outcome: ok, error or rate_limited"""
+        settings = self.profile[api]
+        roll = self.random.random()
+        with self._lock:
+            self.stats[api]['requests'] += 1
+            if roll < settings['rate_limit_rate']:
+                self.stats[api]['rate_limited'] += 1
+                return 'rate_limited'
+            if roll < settings['rate_limit_rate'] + settings['error_rate']:
+                self.stats[api]['errors'] += 1
+                return 'error'
+        return 'ok'
+
+    def _sleep(self, api):
+        settings = self.profile[api]
+        if settings['latency_ms'] > 0:
+            median = settings['latency_ms'] / 1000
+            time.sleep(self.random.lognormvariate(math.log(median), settings['jitter']))
+
+    def _handle(self, handler):
+        path = urlsplit(handler.path).path
+        body = handler.rfile.read(int(handler.headers.get('Content-Length') or 0))
+
+        if path.endswith('/chat/completions'):
+            api = 'openai'
+        elif path == '/2/tweets':
+            api = 'twitter'
+        elif path == '/v2/ugcPosts':
+            api = 'linkedin'
+        elif GRAPH_FEED_PATH.fullmatch(path) or GRAPH_BATCH_PATH.fullmatch(path):
+            api = 'facebook'
+        else:
+            self._send(handler, 404, {'error': f'no stand-in for {path}'})
+            return
+
+        self._sleep(api)
+        outcome = self._roll(api)
+        if outcome == 'rate_limited':
+            retry_after = self.profile[api]['retry_after']
+            self._send(handler, 429, {'error': {'message': 'Too Many Requests (stand-in)'}},
+                       {'Retry-After': str(retry_after)})
+            return
+        if outcome == 'error':
+            self._send(handler, 500, {'error': {'message': 'Internal error (stand-in)', 'code': 2}})
+            return
+
+        status, payload, headers = getattr(self, f'_{api}')(path, body)
+        self._send(handler, status, payload, headers)
+
+    @staticmethod
+    def _send(handler, status, payload, headers=None):
+        headers = dict(headers or {})
+        data = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', headers.pop('Content-Type', 'application/json'))
+        handler.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _compose(self, words, sentence_end, count):
+        sentences = []
+        while count > 0:
+            length = min(count, self.random.randint(8, 14))
+            sentences.append(' '.join(self.random.choice(words) for _ in range(length)) + sentence_end)
+            count -= length
+        hashtags = ' '.join('#' + self.random.choice(words) for _ in range(3))
+        return ' '.join(sentences) + '\n\n' + hashtags
+
+    def _openai(self, path, body):
+        request = json.loads(body)
+        prompt = ' '.join(message['content'] for message in request['messages'])
+        hindi = bool(DEVANAGARI.search(prompt))
+        # Roughly 1.3 tokens per English word and 3 per Hindi word
+        tokens_per_word = 3 if hindi else 1.3
+        word_limit = int((request.get('max_tokens') or 500) / tokens_per_word)
+        count = self.random.randint(40, 160)
+        finish_reason = 'length' if count > word_limit else 'stop'
+        words = min(count, word_limit)
+        text = self._compose(HINDI_WORDS if hindi else ENGLISH_WORDS, '।' if hindi else '.', words)
+        response_format = request.get('response_format') or {}
+        if response_format.get('type') == 'json_schema':
+            # Variant requests: one shorter variant per platform field of the schema
+            fields = response_format['json_schema']['schema']['properties']
+            variants = {
+                field: self._compose(ENGLISH_WORDS, '.', max(10, words // (4 if 'short' in field else 2)))
+                for field in fields if field != 'hashtags'
+            }
+            variants['hashtags'] = ['#' + self.random.choice(ENGLISH_WORDS) for _ in range(3)]
+            text = json.dumps(variants)
+
+        completion_id = f"chatcmpl-{next(self._ids)}"
+        usage = {
+            'prompt_tokens': len(prompt) // 4,
+            'completion_tokens': int(words * tokens_per_word),
+        }
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+
+        if request.get('stream'):
+            events = []
+            for index, piece in enumerate(re.findall(r'\S+\s*', text)):
+                delta = {'content': piece} if index else {'role': 'assistant', 'content': piece}
+                events.append({'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                               'model': request['model'],
+                               'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})
+            events.append({'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                           'model': request['model'],
+                           'choices': [{'index': 0, 'delta': {}, 'finish_reason': finish_reason}]})
+            if (request.get('stream_options') or {}).get('include_usage'):
+                events.append({'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                               'model': request['model'], 'choices': [], 'usage': usage})
+            stream = ''.join(f"data: {json.dumps(event, ensure_ascii=False)}\n\n" for event in events)
+            return 200, (stream + 'data: [DONE]\n\n').encode('utf-8'), {'Content-Type': 'text/event-stream'}
+
+        return 200, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request['model'],
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': text},
+                'finish_reason': finish_reason,
+            }],
+            'usage': usage,
+        }, {}
+
+    def _twitter(self, path, body):
+        request = json.loads(body)
+        reset = int(time.time()) + 900
+        headers = {
+            'x-rate-limit-limit': '100000',
+            'x-rate-limit-remaining': '99999',
+            'x-rate-limit-reset': str(reset),
+        }
+        return 201, {'data': {'id': str(10 ** 18 + next(self._ids)), 'text': request.get('text', '')}}, headers
+
+    def _linkedin(self, path, body):
+        share_id = f"urn:li:share:{next(self._ids)}"
+        return 201, {'id': share_id}, {'x-restli-id': share_id}
+
+    def _facebook(self, path, body):
+        usage = {'X-App-Usage': json.dumps({'call_count': 1, 'total_cputime': 1, 'total_time': 1})}
+        match = GRAPH_FEED_PATH.fullmatch(path)
+        if match:
+            return 200, {'id': f"{match.group(1)}_{next(self._ids)}"}, usage
+
+        form = parse_qs(body.decode('utf-8'))
+        operations = json.loads(form.get('batch', ['[]'])[0])
+        items = []
+        for operation in operations:
+            page_id = operation['relative_url'].split('/')[0]
+            # Every operation in a batch can fail on its own
+            outcome = self._roll('facebook')
+            if outcome == 'rate_limited':
+                items.append({'code': 400, 'headers': [], 'body': json.dumps(
+                    {'error': {'message': 'Page request limit reached (stand-in)', 'code': 32}})})
+            elif outcome == 'error':
+                items.append({'code': 500, 'headers': [], 'body': json.dumps(
+                    {'error': {'message': 'Service temporarily unavailable (stand-in)', 'code': 2}})})
+            else:
+                items.append({
+                    'code': 200,
+                    'headers': [{'name': name, 'value': value} for name, value in usage.items()],
+                    'body': json.dumps({'id': f"{page_id}_{next(self._ids)}"}),
+                })
+        return 200, items, usage
+
+
+class RedirectAdapter(HTTPAdapter):
+    """Sends every request to the stand-in server, whatever host it was addressed to"""
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = self.base_url + parts.path + (f'?{parts.query}' if parts.query else '')
+        return super().send(request, **kwargs)
+
+
+class StandInTransport(HttpTransport):
+    """HttpTransport whose pooled sessions all talk to the stand-in server"""
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+
+    def _create_session(self, host):
+        session = super()._create_session(host)
+        adapter = RedirectAdapter(self.base_url, pool_connections=self.pool_connections,
+                                  pool_maxsize=self.pool_maxsize)
+        session.mount(f"https://{host}/", adapter)
+        session.mount(f"http://{host}/", adapter)
+        return session
+
+
+class BenchmarkOutbox(Outbox):
+    """Outbox that gives every run its own slot, so repeated runs really publish"""
+
+    _slots = itertools.count(1)
+
+    def record(self, poster, content, deliveries, slot=None, contents=None):
+        return super().record(poster, content, deliveries, slot=slot or f"bench-{next(self._slots)}",
+                              contents=contents)
+
+
+def configure_environment(base_url, facebook_pages):
+    """Point every poster at the stand-in server with throwaway credentials"""
+    os.environ.update({
+        'OPENAI_API_KEY': 'sk-benchmark',
+        'OPENAI_BASE_URL': f"{base_url}/v1",
+        'TWITTER_API_KEY': 'benchmark',
+        'TWITTER_API_SECRET': 'benchmark',
+        'TWITTER_ACCESS_TOKEN': '1000-benchmark',
+        'TWITTER_ACCESS_SECRET': 'benchmark',
+        'LINKEDIN_ACCESS_TOKEN': 'benchmark',
+        'LINKEDIN_PERSON_ID': 'benchmark',
+        'FACEBOOK_PAGE_ID': '200000',
+        'FACEBOOK_ACCESS_TOKEN': 'benchmark',
+        'FACEBOOK_PAGES': ','.join(f"{200000 + index}:benchmark-{index}" for index in range(1, facebook_pages)),
+        # Keep benchmark numbers out of the production metrics textfile
+        'METRICS_TEXTFILE': '',
+        # News posters read the fixture feeds instead of the internet, whatever their dates
+        'NEWS_FEEDS_TECH_NEWS': f"{FIXTURE_FEEDS_URL}/tech.xml,{FIXTURE_FEEDS_URL}/science.rdf",
+        'NEWS_FEEDS_AI_NEWS': f"{FIXTURE_FEEDS_URL}/ai.atom",
+        'NEWS_FEEDS_HINDI_NEWS': f"{FIXTURE_FEEDS_URL}/hindi.xml",
+        'NEWS_MAX_AGE_HOURS': '0',
+    })
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(values):
+    return {
+        'count': len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values) if values else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmark(runs=DEFAULT_RUNS, concurrency=DEFAULT_CONCURRENCY, posters=None, profile=None,
+                  facebook_pages=1, stream=False, real_quotas=False, verbose=False, seed=None):
+    """Drive every poster class through the stand-in APIs and return a result record"""
+    profile = profile or DEFAULT_PROFILE
+    server = StandInServer(profile, seed=seed)
+    server.start()
+    configure_environment(server.base_url, facebook_pages)
+
+    # Imported after the environment is set, since the posters read it at import
+    from scheduler_daemon import load_jobs
+
+    jobs = [job for job in load_jobs() if not posters or job[0] in posters]
+    workdir = tempfile.mkdtemp(prefix='load-benchmark-')
+    os.environ['NEWS_STORE_PATH'] = os.path.join(workdir, 'news.db')
+    transport = StandInTransport(server.base_url)
+    outbox = BenchmarkOutbox(path=os.path.join(workdir, 'outbox.db'))
+    cache = GenerationCache(path=os.path.join(workdir, 'generation_cache.db'))
+    dedup_index = DedupIndex(path=os.path.join(workdir, 'dedup_index.db'))
+    # Empty credential cache, so the .env stand-in tokens are used
+    credentials = CredentialService(transport=transport, path=os.path.join(workdir, 'credentials.db'))
+    # Empty prefetch queue, so every run generates
+    prefetch_queue = PrefetchQueue(path=os.path.join(workdir, 'prefetch.db'))
+    rate_governor = RateGovernor(quotas=None if real_quotas else UNLIMITED_QUOTAS)
+
+    # One pool of warm poster instances per job, like the scheduler daemon keeps
+    pools = {}
+    for name, poster_class, run_args, _schedule in jobs:
+        if hasattr(poster_class, 'twitter_client'):
+            # Scheduled English runs only post to LinkedIn; exercise Twitter too
+            run_args = ('both',)
+        pool = queue.Queue()
+        for _ in range(concurrency):
+            poster = poster_class(transport=transport, generation_cache=cache, force_regenerate=True,
+                                  outbox=outbox, stream=stream, rate_governor=rate_governor,
+                                  dedup_index=dedup_index, credentials=credentials,
+                                  prefetch_queue=prefetch_queue)
+            if hasattr(poster, 'twitter_client'):
+                # tweepy has its own session with a hard-coded api.twitter.com host
+                poster.twitter_client.session.mount(
+                    'https://api.twitter.com/', RedirectAdapter(server.base_url, pool_maxsize=concurrency))
+            pool.put(poster)
+        pools[name] = (pool, run_args)
+
+    def run_one(name):
+        pool, run_args = pools[name]
+        poster = pool.get()
+        started = time.perf_counter()
+        try:
+            report, error = poster.run(*run_args), None
+        except Exception as e:
+            report, error = None, str(e)
+        finally:
+            pool.put(poster)
+        return name, time.perf_counter() - started, report, error
+
+    run_latencies = {name: [] for name in pools}
+    publish_latencies = {}
+    outcomes = {}
+    errors = []
+    output = sys.stdout if verbose else open(os.devnull, 'w', encoding='utf-8')
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(output), ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Interleave posters so they compete for the same workers and connections
+        futures = [executor.submit(run_one, name) for _ in range(runs) for name in pools]
+        for done, future in enumerate(as_completed(futures), 1):
+            name, elapsed, report, error = future.result()
+            run_latencies[name].append(elapsed)
+            if error:
+                errors.append(f"{name}: {error}")
+            for platform, outcome in (report or {}).items():
+                publish_latencies.setdefault(platform, []).append(outcome['elapsed'])
+                outcomes[outcome['status']] = outcomes.get(outcome['status'], 0) + 1
+            if report is None:
+                outcomes['no_content'] = outcomes.get('no_content', 0) + 1
+            print(f"\r  {done}/{len(futures)} runs", end='', file=sys.stderr, flush=True)
+    wall = time.perf_counter() - started
+    print(file=sys.stderr)
+
+    if output is not sys.stdout:
+        output.close()
+    transport.close()
+    server.stop()
+
+    all_runs = [value for values in run_latencies.values() for value in values]
+    published = outcomes.get('published', 0)
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'config': {
+            'runs': runs,
+            'concurrency': concurrency,
+            'posters': [job[0] for job in jobs],
+            'facebook_pages': facebook_pages,
+            'stream': stream,
+            'real_quotas': real_quotas,
+            'profile': profile,
+        },
+        'wall_seconds': wall,
+        'runs_per_sec': len(all_runs) / wall,
+        'posts_published': published,
+        'posts_per_sec': published / wall,
+        'run_latency': latency_summary(all_runs),
+        'run_latency_by_poster': {name: latency_summary(values) for name, values in run_latencies.items()},
+        'publish_latency': {platform: latency_summary(values) for platform, values in publish_latencies.items()},
+        'outcomes': outcomes,
+        'errors': errors[:20],
+        'server': server.stats,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def load_previous(path, label):
+    """Most recent stored result with the same label"""
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('label') == label:
+                previous = record
+    return previous
+
+
+def store_result(path, result):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as handle:
+        handle.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+def _ms(value):
+    return f"{value * 1000:9.0f}" if value is not None else f"{'-':>9}"
+
+
+def _change(current, previous, higher_is_better):
+    if not previous or current is None:
+        return ''
+    delta = (current - previous) / previous * 100
+    better = delta > 0 if higher_is_better else delta < 0
+    return f"  ({delta:+.1f}% {'better' if better else 'worse'})" if abs(delta) >= 0.5 else '  (unchanged)'
+
+
+def print_summary(result, previous=None):
+    print(f"\nLoad benchmark '{result['label']}' at {result['commit'] or 'unknown commit'}")
+    print(f"  {result['config']['runs']} runs x {len(result['config']['posters'])} posters, "
+          f"concurrency {result['config']['concurrency']}, {result['wall_seconds']:.1f}s wall")
+    print(f"  Posts/sec:  {result['posts_per_sec']:.2f}"
+          f"{_change(result['posts_per_sec'], previous and previous['posts_per_sec'], True)}")
+    print(f"  Runs/sec:   {result['runs_per_sec']:.2f}")
+    p95 = result['run_latency']['p95']
+    print(f"  Run p95:    {p95 * 1000:.0f} ms"
+          f"{_change(p95, previous and previous['run_latency']['p95'], False)}")
+    if result['peak_rss_mb'] is not None:
+        print(f"  Peak RSS:   {result['peak_rss_mb']:.1f} MB"
+              f"{_change(result['peak_rss_mb'], previous and previous.get('peak_rss_mb'), False)}")
+
+    print(f"\n  {'Latency (ms)':<28}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    rows = [('run (all posters)', result['run_latency'])]
+    rows += [(f"run {name}", summary) for name, summary in result['run_latency_by_poster'].items()]
+    rows += [(f"publish {platform}", summary) for platform, summary in result['publish_latency'].items()]
+    for label, summary in rows:
+        print(f"  {label:<28}{_ms(summary['p50'])}{_ms(summary['p95'])}{_ms(summary['p99'])}{_ms(summary['max'])}")
+
+    print(f"\n  Outcomes: {', '.join(f'{status}={count}' for status, count in sorted(result['outcomes'].items()))}")
+    print("  Stand-in traffic: " + ', '.join(
+        f"{api} {stats['requests']} req ({stats['errors']} err, {stats['rate_limited']} 429)"
+        for api, stats in result['server'].items()))
+    for error in result['errors'][:5]:
+        print(f"  ! {error}")
+
+
+def parse_profile_override(profile, assignment):
+    """Apply one api.setting=value override, e.g. linkedin.error_rate=0.05"""
+    target, _, value = assignment.partition('=')
+    api, _, setting = target.partition('.')
+    if api not in profile or setting not in profile[api]:
+        raise ValueError(f"Unknown profile setting '{target}'")
+    profile[api][setting] = float(value)
+
+
+if __name__ == "__main__":
+    usage = ("Usage: python load_benchmark.py [--runs N] [--concurrency N] [--posters name,name] "
+             "[--facebook-pages N] [--set api.setting=value ...] [--stream] [--real-quotas] "
+             "[--label NAME] [--results PATH] [--seed N] [--verbose]")
+    options = {'runs': DEFAULT_RUNS, 'concurrency': DEFAULT_CONCURRENCY, 'posters': None,
+               'facebook_pages': 1, 'stream': False, 'real_quotas': False, 'verbose': False, 'seed': None}
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    label = 'default'
+    results_path = DEFAULT_RESULTS_PATH
+
+    args = iter(sys.argv[1:])
+    try:
+        for arg in args:
+            if arg == '--runs':
+                options['runs'] = int(next(args))
+            elif arg == '--concurrency':
+                options['concurrency'] = int(next(args))
+            elif arg == '--posters':
+                options['posters'] = next(args).split(',')
+            elif arg == '--facebook-pages':
+                options['facebook_pages'] = int(next(args))
+            elif arg == '--set':
+                parse_profile_override(profile, next(args))
+            elif arg in ('--stream', '--real-quotas', '--verbose'):
+                options[arg[2:].replace('-', '_')] = True
+            elif arg == '--seed':
+                options['seed'] = int(next(args))
+            elif arg == '--label':
+                label = next(args)
+            elif arg == '--results':
+                results_path = next(args)
+            else:
+                raise ValueError(f"Unknown option '{arg}'")
+    except (StopIteration, ValueError) as e:
+        print(f"{e}\n{usage}" if str(e) else usage)
+        sys.exit(1)
+
+    result = run_benchmark(profile=profile, **options)
+    result['label'] = label
+    previous = load_previous(results_path, label)
+    store_result(results_path, result)
+    print_summary(result, previous)
+    print(f"\nResults appended to {results_path}")
@@ -0,0 +1,594 @@
+import hashlib
+import io
+import json
+import mimetypes
+import mmap
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+from metrics import get_default_metrics, peak_rss_mb
+
+DEFAULT_UPLOAD_STATE_PATH = os.path.join('state', 'uploads.db')
+DEFAULT_CHUNK_SIZE = 4 * 2 ** 20     # Twitter accepts APPEND segments of up to 5 MB
+READ_BLOCK = 64 * 1024               # bytes handed to the socket at a time
+MAX_PROCESSING_WAIT = 300            # seconds to wait for Twitter to process a video
+
+TWITTER_UPLOAD_URL = "https://upload.twitter.com/1.1/media/upload.json"
+LINKEDIN_REGISTER_UPLOAD_URL = "https://api.linkedin.com/v2/assets?action=registerUpload"
+LINKEDIN_COMPLETE_MULTIPART_URL = "https://api.linkedin.com/v2/assets?action=completeMultiPartUpload"
+LINKEDIN_UPLOAD_MECHANISM = "com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest"
+LINKEDIN_MULTIPART_MECHANISM = "com.linkedin.digitalmedia.uploading.MultipartUpload"
+FACEBOOK_VIDEO_URL = "https://graph-video.facebook.com/v18.0"
+
+
+class MediaUploadError(RuntimeError):
+    """An upload step was rejected by the platform"""
+
+
+class ChunkReader:
+    """File-like view of part of a media source.
+
+    requests streams it to the socket block by block with a Content-Length,
+    so a part of a large file is never copied into memory as a whole, and
+    mapped pages are dropped as soon as they have been read.
+    """
+
+    def __init__(self, source, start, end):
+        self._source = source
+        self._start = start
+        self._end = end
+        self._position = start
+
+    def __len__(self):
+        return self._end - self._start
+
+    def read(self, size=-1):
+        end = self._end if size is None or size < 0 else min(self._end, self._position + size)
+        # Released right away, so no slice outlives the mapping
+        with self._source.view[self._position:end] as piece:
+            data = piece.tobytes()
+        self._source.release(self._position, end - self._position)
+        self._position = end
+        return data
+
+    def __iter__(self):
+        while True:
+            block = self.read(READ_BLOCK)
+            if not block:
+                return
+            yield block
+
+
+class MultipartStream:
+    """multipart/form-data body whose file part is read from a ChunkReader as it is sent.
+
+    requests' files= builds the whole body in memory first; this one has a
+    length and read(), so requests streams it like a bare ChunkReader.
+    Send it as data= with content_type as the Content-Type header.
+    """
+
+    def __init__(self, fields, name, filename, reader, media_type='application/octet-stream'):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        head = ''.join(f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'
+                       for key, value in fields.items())
+        head += (f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                 f'Content-Type: {media_type}\r\n\r\n')
+        head, tail = head.encode('utf-8'), f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        self._parts = [io.BytesIO(head), reader, io.BytesIO(tail)]
+        self._length = len(head) + len(reader) + len(tail)
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        pieces = []
+        while self._parts and (size is None or size < 0 or size > 0):
+            piece = self._parts[0].read(size)
+            if not piece:
+                self._parts.pop(0)
+                continue
+            pieces.append(piece)
+            if size is not None and size > 0:
+                size -= len(piece)
+        return b''.join(pieces)
+
+    def __iter__(self):
+        while True:
+            block = self.read(READ_BLOCK)
+            if not block:
+                return
+            yield block
+
+
+class MediaSource:
+    """Media to upload, from a memory-mapped file or bytes already in memory.
+
+    Chunks are memoryview slices, so the OS pages a file in as it is sent
+    and the process never holds more than the part in flight.
+    """
+
+    def __init__(self, view, name, media_type=None, closer=None, mapped=None):
+        self.view = view
+        self.name = name
+        self.media_type = media_type or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self._closer = closer
+        self._mapped = mapped
+        self._fingerprint = None
+
+    @classmethod
+    def from_path(cls, path, media_type=None):
+        handle = open(path, 'rb')
+        try:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            handle.close()
+            raise MediaUploadError(f"{path} is empty")
+        view = memoryview(mapped)
+
+        def close():
+            view.release()
+            mapped.close()
+            handle.close()
+        return cls(view, os.path.basename(path), media_type, close, mapped)
+
+    @classmethod
+    def from_bytes(cls, data, name, media_type=None):
+        return cls(memoryview(data), name, media_type)
+
+    @property
+    def size(self):
+        return len(self.view)
+
+    @property
+    def is_video(self):
+        return self.media_type.startswith('video/')
+
+    @property
+    def fingerprint(self):
+        """Content hash identifying the asset across runs, for resuming"""
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for offset in range(0, self.size, DEFAULT_CHUNK_SIZE):
+                with self.view[offset:offset + DEFAULT_CHUNK_SIZE] as piece:
+                    digest.update(piece)
+                self.release(offset, DEFAULT_CHUNK_SIZE)
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def reader(self, offset=0, length=None):
+        end = self.size if length is None else min(self.size, offset + length)
+        return ChunkReader(self, offset, end)
+
+    def release(self, offset, length):
+        """Let the OS drop mapped pages that have been sent, so they don't count towards RSS"""
+        if self._mapped is None or not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        start = offset - offset % mmap.PAGESIZE
+        end = min(self.size, offset + length)
+        if end < self.size:
+            # A page read only in part is dropped by the next read; dropping it now would
+            # fault it back in, with its already-sent neighbours
+            end -= end % mmap.PAGESIZE
+        if end > start:
+            self._mapped.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def close(self):
+        if self._closer:
+            self._closer()
+            self._closer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class UploadStore:
+    """Progress of chunked uploads, so an interrupted one resumes at the last acknowledged chunk.
+
+    Each row is keyed on the platform, the account and the asset's content
+    hash and holds the platform's upload session and the bytes it has
+    acknowledged. Once an upload completes its media ID is kept, and
+    uploading the same asset to the same account again reuses it.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('UPLOAD_STATE_PATH', DEFAULT_UPLOAD_STATE_PATH)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS uploads (
+                    upload_key TEXT PRIMARY KEY,
+                    platform TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    total_bytes INTEGER NOT NULL,
+                    session TEXT NOT NULL,
+                    bytes_acked INTEGER NOT NULL DEFAULT 0,
+                    media_id TEXT,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def make_key(*parts):
+        return hashlib.sha256('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+    def load(self, key):
+        """{'session', 'bytes_acked', 'media_id'} for an upload, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT session, bytes_acked, media_id FROM uploads WHERE upload_key = ?",
+                               (key,)).fetchone()
+        if not row:
+            return None
+        return {'session': json.loads(row[0]), 'bytes_acked': row[1], 'media_id': row[2]}
+
+    def save(self, key, platform, source, session, bytes_acked):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO uploads "
+                "(upload_key, platform, name, total_bytes, session, bytes_acked, media_id, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, NULL, ?)",
+                (key, platform, source.name, source.size, json.dumps(session), bytes_acked, time.time())
+            )
+
+    def complete(self, key, media_id):
+        with self._connect() as conn:
+            conn.execute("UPDATE uploads SET media_id = ?, bytes_acked = total_bytes, updated_at = ? "
+                         "WHERE upload_key = ?", (media_id, time.time(), key))
+
+    def discard(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM uploads WHERE upload_key = ?", (key,))
+
+    def summary(self):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT platform, name, total_bytes, bytes_acked, media_id, updated_at FROM uploads "
+                "ORDER BY updated_at DESC LIMIT 50"
+            ).fetchall()
+
+
+class UploadProgress:
+    """Throughput and memory report for one asset"""
+
+    def __init__(self, platform, source, resumed_from=0):
+        self.platform = platform
+        self.source = source
+        self.resumed_from = resumed_from
+        self.bytes_sent = 0
+        self.chunks = 0
+        self.started = time.monotonic()
+        if resumed_from:
+            print(f"[upload] Resuming {platform} upload of {source.name} at "
+                  f"{resumed_from / 2 ** 20:.1f}/{source.size / 2 ** 20:.1f} MiB")
+
+    def sent(self, nbytes):
+        self.bytes_sent += nbytes
+        self.chunks += 1
+        get_default_metrics().media_upload_bytes.inc(nbytes, platform=self.platform)
+
+    def finish(self):
+        elapsed = time.monotonic() - self.started
+        throughput = self.bytes_sent / elapsed / 2 ** 20 if elapsed > 0 else 0.0
+        rss = peak_rss_mb()
+        get_default_metrics().media_upload_seconds.observe(elapsed, platform=self.platform)
+        resumed = f", resumed at {self.resumed_from / 2 ** 20:.1f} MiB" if self.resumed_from else ""
+        memory = f", peak RSS {rss:.0f} MB" if rss is not None else ""
+        print(f"[upload] {self.platform} {self.source.name}: {self.bytes_sent / 2 ** 20:.1f} MiB in "
+              f"{self.chunks} chunk(s), {elapsed:.1f}s ({throughput:.2f} MiB/s){resumed}{memory}")
+        return {'bytes': self.bytes_sent, 'seconds': elapsed, 'mib_per_second': throughput, 'peak_rss_mb': rss}
+
+
+def _check(response, store, key, step, ok=(200, 201, 202, 204)):
+    """Raise if a step failed. Client errors also drop the stored session so the next try starts over."""
+    if response.status_code in ok:
+        return
+    if 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+        store.discard(key)
+    raise MediaUploadError(f"{step} failed: {response.status_code} - {response.text[:300]}")
+
+
+def upload_twitter_media(transport, auth, source, account='default', store=None, chunk_size=None,
+                         media_category=None):
+    """Upload with the chunked INIT/APPEND/FINALIZE protocol and return the media ID.
+
+    auth is an OAuth 1.0a user-context auth for requests (see
+    tweepy.OAuth1UserHandler.apply_auth): API v2 has no media upload of its
+    own, but create_tweet accepts the returned media ID.
+    """
+    store = store or get_default_upload_store()
+    key = store.make_key('twitter', account, source.fingerprint)
+    state = store.load(key)
+    if state and time.time() >= state['session'].get('expires_at', 0):
+        # Twitter forgets uploaded media after expires_after_secs
+        store.discard(key)
+        state = None
+    if state and state['media_id']:
+        print(f"[upload] {source.name} is already uploaded to Twitter (media {state['media_id']})")
+        return state['media_id']
+
+    if state:
+        session, acked = state['session'], state['bytes_acked']
+    else:
+        category = media_category or ('tweet_video' if source.is_video else
+                                      'tweet_gif' if source.media_type == 'image/gif' else 'tweet_image')
+        response = transport.post(TWITTER_UPLOAD_URL, auth=auth, data={
+            'command': 'INIT',
+            'total_bytes': source.size,
+            'media_type': source.media_type,
+            'media_category': category,
+        })
+        _check(response, store, key, "Twitter media INIT")
+        info = response.json()
+        session = {
+            'media_id': info['media_id_string'],
+            'chunk_size': int(chunk_size or os.getenv('MEDIA_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)),
+            'expires_at': time.time() + info.get('expires_after_secs', 86400),
+        }
+        acked = 0
+        store.save(key, 'twitter', source, session, acked)
+
+    # Segments keep the chunk size the upload started with
+    media_id, size = session['media_id'], session['chunk_size']
+    progress = UploadProgress('twitter', source, acked)
+    for offset in range(acked, source.size, size):
+        chunk = source.reader(offset, size)
+        body = MultipartStream({
+            'command': 'APPEND',
+            'media_id': media_id,
+            'segment_index': offset // size,
+        }, 'media', 'blob', chunk)
+        response = transport.post(TWITTER_UPLOAD_URL, auth=auth, data=body,
+                                  headers={'Content-Type': body.content_type})
+        _check(response, store, key, f"Twitter media APPEND (segment {offset // size})")
+        progress.sent(len(chunk))
+        store.save(key, 'twitter', source, session, offset + len(chunk))
+
+    response = transport.post(TWITTER_UPLOAD_URL, auth=auth, data={'command': 'FINALIZE', 'media_id': media_id})
+    _check(response, store, key, "Twitter media FINALIZE")
+    processing = response.json().get('processing_info')
+    deadline = time.monotonic() + MAX_PROCESSING_WAIT
+    # Videos are transcoded after FINALIZE; they can't be attached until that succeeds
+    while processing and processing.get('state') in ('pending', 'in_progress') and time.monotonic() < deadline:
+        time.sleep(processing.get('check_after_secs', 1))
+        response = transport.get(TWITTER_UPLOAD_URL, auth=auth, params={'command': 'STATUS', 'media_id': media_id})
+        _check(response, store, key, "Twitter media STATUS")
+        processing = response.json().get('processing_info')
+    if processing and processing.get('state') != 'succeeded':
+        store.discard(key)
+        raise MediaUploadError(f"Twitter media processing {processing.get('state')}: {processing.get('error')}")
+
+    store.complete(key, media_id)
+    progress.finish()
+    return media_id
+
+
+def upload_linkedin_media(transport, access_token, person_id, source, store=None):
+    """Register an upload for the member, send the asset and return its URN for a ugcPosts share.
+
+    Videos use the multipart mechanism, each part sent straight from the
+    source and resumable; images go up in a single streamed PUT.
+    """
+    store = store or get_default_upload_store()
+    key = store.make_key('linkedin', person_id, source.fingerprint)
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json",
+        "X-Restli-Protocol-Version": "2.0.0"
+    }
+    state = store.load(key)
+    if state and state['media_id']:
+        print(f"[upload] {source.name} is already uploaded to LinkedIn ({state['media_id']})")
+        return state['media_id']
+
+    if state:
+        session, acked = state['session'], state['bytes_acked']
+    else:
+        request = {
+            "recipes": [f"urn:li:digitalmediaRecipe:feedshare-{'video' if source.is_video else 'image'}"],
+            "owner": f"urn:li:person:{person_id}",
+            "serviceRelationships": [{
+                "relationshipType": "OWNER",
+                "identifier": "urn:li:userGeneratedContent"
+            }]
+        }
+        if source.is_video:
+            request["supportedUploadMechanism"] = ["MULTIPART_UPLOAD"]
+            request["fileSize"] = source.size
+        response = transport.post(LINKEDIN_REGISTER_UPLOAD_URL, headers=headers,
+                                  json={"registerUploadRequest": request})
+        _check(response, store, key, "LinkedIn upload registration", ok=(200,))
+        value = response.json()['value']
+        mechanism = value['uploadMechanism']
+        session = {'asset': value['asset'], 'media_artifact': value.get('mediaArtifact')}
+        if LINKEDIN_MULTIPART_MECHANISM in mechanism:
+            multipart = mechanism[LINKEDIN_MULTIPART_MECHANISM]
+            session['metadata'] = multipart.get('metadata')
+            session['parts'] = [
+                {
+                    'url': part['url'],
+                    'first': part['byteRange']['firstByte'],
+                    'last': part['byteRange']['lastByte'],
+                    'headers': part.get('headers') or {},
+                }
+                for part in multipart['partUploadRequests']
+            ]
+            session['responses'] = {}
+        else:
+            session['upload_url'] = mechanism[LINKEDIN_UPLOAD_MECHANISM]['uploadUrl']
+        acked = 0
+        store.save(key, 'linkedin', source, session, acked)
+
+    progress = UploadProgress('linkedin', source, acked)
+    if 'parts' in session:
+        for index, part in enumerate(session['parts']):
+            if str(index) in session['responses']:
+                continue
+            chunk = source.reader(part['first'], part['last'] - part['first'] + 1)
+            response = transport.request('PUT', part['url'], data=chunk, headers=part['headers'])
+            _check(response, store, key, f"LinkedIn part {index + 1}/{len(session['parts'])} upload", ok=(200, 201))
+            session['responses'][str(index)] = {
+                'headers': {'ETag': response.headers.get('ETag')},
+                'httpStatusCode': response.status_code,
+            }
+            acked += len(chunk)
+            progress.sent(len(chunk))
+            store.save(key, 'linkedin', source, session, acked)
+
+        response = transport.post(LINKEDIN_COMPLETE_MULTIPART_URL, headers=headers, json={
+            "completeMultipartUploadRequest": {
+                "mediaArtifact": session['media_artifact'],
+                "metadata": session['metadata'],
+                "partUploadResponses": [session['responses'][str(index)] for index in range(len(session['parts']))],
+            }
+        })
+        _check(response, store, key, "LinkedIn multipart completion", ok=(200, 201))
+    else:
+        response = transport.request('PUT', session['upload_url'], data=source.reader(), headers={
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": source.media_type
+        })
+        _check(response, store, key, "LinkedIn media upload", ok=(200, 201))
+        progress.sent(source.size)
+
+    store.complete(key, session['asset'])
+    progress.finish()
+    return session['asset']
+
+
+def upload_facebook_video(transport, page_id, access_token, source, description='', store=None):
+    """Publish a video to a page with Graph's resumable start/transfer/finish upload; return its ID.
+
+    Graph says which byte range it wants next after every chunk, so an
+    interrupted upload continues from the last range it acknowledged.
+    """
+    store = store or get_default_upload_store()
+    key = store.make_key('facebook', page_id, source.fingerprint)
+    url = f"{FACEBOOK_VIDEO_URL}/{page_id}/videos"
+    state = store.load(key)
+    if state and state['media_id']:
+        print(f"[upload] {source.name} is already published to Facebook page {page_id} (video {state['media_id']})")
+        return state['media_id']
+
+    if state:
+        session = state['session']
+    else:
+        response = transport.post(url, data={
+            'upload_phase': 'start',
+            'file_size': source.size,
+            'access_token': access_token,
+        })
+        _check(response, store, key, "Facebook video upload start", ok=(200,))
+        info = response.json()
+        session = {
+            'upload_session_id': info['upload_session_id'],
+            'video_id': info['video_id'],
+            'start_offset': int(info['start_offset']),
+            'end_offset': int(info['end_offset']),
+        }
+        store.save(key, 'facebook', source, session, 0)
+
+    progress = UploadProgress('facebook', source, session['start_offset'])
+    while session['start_offset'] < session['end_offset']:
+        start, end = session['start_offset'], session['end_offset']
+        body = MultipartStream({
+            'upload_phase': 'transfer',
+            'upload_session_id': session['upload_session_id'],
+            'start_offset': start,
+            'access_token': access_token,
+        }, 'video_file_chunk', 'chunk', source.reader(start, end - start))
+        response = transport.post(url, data=body, headers={'Content-Type': body.content_type})
+        _check(response, store, key, f"Facebook video transfer at {start}", ok=(200,))
+        info = response.json()
+        session['start_offset'], session['end_offset'] = int(info['start_offset']), int(info['end_offset'])
+        progress.sent(end - start)
+        store.save(key, 'facebook', source, session, session['start_offset'])
+
+    response = transport.post(url, data={
+        'upload_phase': 'finish',
+        'upload_session_id': session['upload_session_id'],
+        'description': description,
+        'access_token': access_token,
+    })
+    _check(response, store, key, "Facebook video upload finish", ok=(200,))
+    if not response.json().get('success'):
+        raise MediaUploadError(f"Facebook video upload finish failed: {response.text[:300]}")
+
+    store.complete(key, session['video_id'])
+    progress.finish()
+    return session['video_id']
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_upload_store():
+    """Return the process-wide upload store"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = UploadStore()
+        return _default_store
+
+
+if __name__ == "__main__":
+    # python media_upload.py                            -> list recent uploads
+    # python media_upload.py twitter|linkedin|facebook PATH  -> upload a file with the .env credentials
+    from dotenv import load_dotenv
+    from http_transport import get_default_transport
+
+    load_dotenv()
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if not args:
+        rows = get_default_upload_store().summary()
+        if not rows:
+            print("No uploads recorded.")
+            sys.exit(0)
+        print(f"{'Platform':<10}{'File':<30}{'Size MiB':>10}{'Sent':>8}  Media")
+        print("-" * 90)
+        for platform, name, total, acked, media_id, _updated in rows:
+            print(f"{platform:<10}{name[:28]:<30}{total / 2 ** 20:>10.1f}{acked / total:>8.0%}  "
+                  f"{media_id or '(incomplete)'}")
+        sys.exit(0)
+
+    if len(args) != 2 or args[0] not in ('twitter', 'linkedin', 'facebook'):
+        print("Usage: python media_upload.py [twitter|linkedin|facebook PATH]")
+        sys.exit(1)
+
+    platform, path = args
+    transport = get_default_transport()
+    with MediaSource.from_path(path) as source:
+        if platform == 'twitter':
+            import tweepy
+            auth = tweepy.OAuth1UserHandler(
+                os.getenv('TWITTER_API_KEY'), os.getenv('TWITTER_API_SECRET'),
+                os.getenv('TWITTER_ACCESS_TOKEN'), os.getenv('TWITTER_ACCESS_SECRET')
+            ).apply_auth()
+            account = (os.getenv('TWITTER_ACCESS_TOKEN') or '').split('-')[0] or 'default'
+            print(f"Media ID: {upload_twitter_media(transport, auth, source, account=account)}")
+        elif platform == 'linkedin':
+            asset = upload_linkedin_media(transport, os.getenv('LINKEDIN_ACCESS_TOKEN'),
+                                          os.getenv('LINKEDIN_PERSON_ID'), source)
+            print(f"Asset: {asset}")
+        else:
+            if not source.is_video:
+                print("Facebook uploads here are page videos; photos are posted by the posters directly.")
+                sys.exit(1)
+            video_id = upload_facebook_video(transport, os.getenv('FACEBOOK_PAGE_ID'),
+                                             os.getenv('FACEBOOK_ACCESS_TOKEN'), source)
+            print(f"Video ID: {video_id}")
@@ -0,0 +1,259 @@
+import functools
+import os
+import sys
+import threading
+import time
+
+# Latency buckets in seconds, wide enough for both a Graph call and a GPT-4 completion
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where it can't be read"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def render(self, openmetrics):
+        # OpenMetrics names the family without the _total suffix; the
+        # Prometheus text format (textfile collector) uses the sample name
+        family = self.name if openmetrics else f'{self.name}_total'
+        lines = [f'# HELP {family} {self.documentation}', f'# TYPE {family} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of label names"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(float(bound) for bound in sorted(buckets)) + (float('inf'),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+                self._series[key] = series
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self, openmetrics):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series['counts']):
+                    labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                    lines.append(f'{self.name}_bucket{labels} {count}')
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f'{self.name}_count{labels} {series["count"]}')
+                lines.append(f'{self.name}_sum{labels} {_format_value(series["sum"])}')
+        return lines
+
+
+class PosterMetrics:
+    """Latency, outcome and token metrics for every poster in the process.
+
+    Rendered in the OpenMetrics text format for a /metrics endpoint, or in
+    the Prometheus text format for node_exporter's textfile collector.
+    """
+
+    def __init__(self):
+        self.generation_seconds = Histogram(
+            'poster_generation_seconds', 'Latency of OpenAI chat completion calls', ('poster', 'model'))
+        self.generation_wall_seconds = Histogram(
+            'poster_generation_wall_seconds', 'Time until a usable completion, including any hedge request',
+            ('poster',))
+        self.hedges = Counter(
+            'poster_llm_hedges', 'Hedging outcomes (not_needed, primary_won, hedge_won, failed)',
+            ('poster', 'outcome'))
+        self.model_selections = Counter(
+            'poster_model_selections', 'Models chosen for generation (reason: route or fallback)',
+            ('poster', 'model', 'reason'))
+        self.generations = Counter(
+            'poster_generations', 'Generated posts by source (api, cache or rejected as a repeat)',
+            ('poster', 'source'))
+        self.tokens = Counter(
+            'poster_openai_tokens', 'OpenAI tokens used, from response.usage', ('poster', 'model', 'type'))
+        self.publish_seconds = Histogram(
+            'poster_publish_seconds', 'Latency of publishing to one platform', ('poster', 'platform'))
+        self.publishes = Counter(
+            'poster_publishes', 'Publish outcomes by platform', ('poster', 'platform', 'outcome'))
+        self.media_upload_seconds = Histogram(
+            'poster_media_upload_seconds', 'Duration of a whole media upload, all chunks included', ('platform',))
+        self.media_upload_bytes = Counter(
+            'poster_media_upload_bytes', 'Media bytes sent to platform upload endpoints', ('platform',))
+        self.http_responses = Counter(
+            'poster_http_responses', 'Platform API responses by HTTP status', ('platform', 'status'))
+        self.run_seconds = Histogram(
+            'poster_run_seconds', 'Duration of a whole poster run', ('poster',))
+        self.runs = Counter(
+            'poster_runs', 'Poster runs by outcome', ('poster', 'outcome'))
+        self._metrics = [
+            self.generation_seconds, self.generation_wall_seconds, self.hedges, self.model_selections,
+            self.generations, self.tokens, self.publish_seconds, self.publishes, self.media_upload_seconds,
+            self.media_upload_bytes, self.http_responses, self.run_seconds, self.runs,
+        ]
+
+    def observe_report(self, poster, report):
+        """Record a publish_to_platforms outcome report"""
+        for platform, outcome in (report or {}).items():
+            self.publish_seconds.observe(outcome['elapsed'], poster=poster, platform=platform)
+            self.publishes.inc(poster=poster, platform=platform, outcome=outcome['status'])
+
+    def render(self, openmetrics=True):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(openmetrics))
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path=None):
+        """Atomically write the Prometheus text format for node_exporter's textfile collector"""
+        path = path or os.getenv('METRICS_TEXTFILE')
+        if not path:
+            return None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            handle.write(self.render(openmetrics=False))
+        os.replace(temp_path, path)
+        return path
+
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_default_metrics():
+    """Return the process-wide metrics registry"""
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = PosterMetrics()
+        return _default_metrics
+
+
+def instrument_run(run):
+    """Decorator for a poster's run(): time it, record its publish report, refresh the textfile"""
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs):
+        metrics = get_default_metrics()
+        started = time.monotonic()
+        outcome = 'error'
+        try:
+            report = run(self, *args, **kwargs)
+            metrics.observe_report(self.POSTER_NAME, report)
+            if report is None:
+                outcome = 'no_content'
+            elif report and all(item['status'] == 'published' for item in report.values()):
+                outcome = 'published'
+            else:
+                outcome = 'partial'
+            return report
+        finally:
+            metrics.run_seconds.observe(time.monotonic() - started, poster=self.POSTER_NAME)
+            metrics.runs.inc(poster=self.POSTER_NAME, outcome=outcome)
+            try:
+                metrics.write_textfile()
+            except OSError as e:
+                print(f"[metrics] Could not write textfile: {e}")
+    return wrapper
+
+
+def start_metrics_server(port=None, host=None, metrics=None):
+    """Serve /metrics from a background thread. Returns the server, or None if no port is set."""
+    port = int(port or os.getenv('METRICS_PORT') or 0)
+    if not port:
+        return None
+    # Imported here so one-shot poster runs don't pay for http.server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    host = host or os.getenv('METRICS_HOST', '127.0.0.1')
+    metrics = metrics or get_default_metrics()
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            openmetrics = 'application/openmetrics-text' in (self.headers.get('Accept') or '')
+            body = metrics.render(openmetrics=openmetrics).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes every few seconds would drown the posting logs
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics', daemon=True)
+    thread.start()
+    print(f"📈 Serving metrics on http://{host}:{server.server_port}/metrics")
+    return server
@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from collections import deque
+
+from metrics import get_default_metrics
+
+# (poster, target format) -> model. '*' matches any poster or format; the
+# most specific entry wins, and a model the feed sets itself beats the '*'
+# entries. Short formats go to a small, fast model, and multi-platform
+# variants to one that supports structured outputs.
+DEFAULT_ROUTES = {
+    ('*', 'twitter'): 'gpt-4o-mini',
+    ('*', 'linkedin'): 'gpt-4',
+    ('*', 'facebook'): 'gpt-4',
+    ('*', 'variants'): 'gpt-4o',
+}
+DEFAULT_MODEL = 'gpt-4'   # when no route matches and the feed doesn't set one
+
+# Model to use instead while a model is unhealthy
+DEFAULT_FALLBACKS = {
+    'gpt-4': 'gpt-4o',
+    'gpt-4o': 'gpt-4o-mini',
+    'gpt-4o-mini': 'gpt-4o',
+}
+
+DEFAULT_LATENCY_THRESHOLD = 30.0   # p90 latency in seconds that marks a model unhealthy
+DEFAULT_ERROR_THRESHOLD = 0.5      # share of failed calls that marks a model unhealthy
+DEFAULT_HEALTH_WINDOW = 600        # seconds of history considered
+DEFAULT_MIN_CALLS = 3              # calls in the window before a model can be judged
+
+
+def parse_routes(value):
+    """Parse "poster:format=model,..." (poster or format may be '*')"""
+    routes = {}
+    for entry in (value or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        target, _, model = entry.partition('=')
+        poster, _, target_format = target.partition(':')
+        if not model or not target_format:
+            print(f"Ignoring malformed MODEL_ROUTES entry '{entry}' (expected poster:format=model)")
+            continue
+        routes[(poster.strip(), target_format.strip())] = model.strip()
+    return routes
+
+
+def parse_fallbacks(value):
+    """Parse "model=fallback,..." """
+    fallbacks = {}
+    for entry in (value or '').split(','):
+        model, _, fallback = entry.strip().partition('=')
+        if model and fallback:
+            fallbacks[model.strip()] = fallback.strip()
+    return fallbacks
+
+
+class ModelRouter:
+    """Picks the model for each (poster, target format) and avoids unhealthy ones.
+
+    Routes come from DEFAULT_ROUTES overlaid with MODEL_ROUTES. Every call's
+    latency and outcome is observed; when a model's recent p90 latency or
+    error rate crosses its threshold, requests move down its fallback chain
+    until its history ages out of the window.
+    """
+
+    def __init__(self, routes=None, fallbacks=None, latency_threshold=None, error_threshold=None,
+                 window=None, min_calls=None):
+        self.routes = dict(DEFAULT_ROUTES)
+        self.routes.update(routes if routes is not None else parse_routes(os.getenv('MODEL_ROUTES')))
+        self.fallbacks = dict(DEFAULT_FALLBACKS)
+        self.fallbacks.update(fallbacks if fallbacks is not None else parse_fallbacks(os.getenv('MODEL_FALLBACKS')))
+        self.latency_threshold = float(latency_threshold or os.getenv('MODEL_LATENCY_THRESHOLD',
+                                                                      DEFAULT_LATENCY_THRESHOLD))
+        self.error_threshold = float(error_threshold or os.getenv('MODEL_ERROR_THRESHOLD', DEFAULT_ERROR_THRESHOLD))
+        self.window = float(window or os.getenv('MODEL_HEALTH_WINDOW', DEFAULT_HEALTH_WINDOW))
+        self.min_calls = int(min_calls or os.getenv('MODEL_HEALTH_MIN_CALLS', DEFAULT_MIN_CALLS))
+
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def route(self, poster, target_format, default=None):
+        """Configured model for a poster and format, before health is considered.
+
+        default is the model the feed sets explicitly (None if it doesn't):
+        routes naming the poster win over it, and it wins over '*' routes.
+        """
+        for key in ((poster, target_format), (poster, '*')):
+            if key in self.routes:
+                return self.routes[key]
+        if default:
+            return default
+        for key in (('*', target_format), ('*', '*')):
+            if key in self.routes:
+                return self.routes[key]
+        return DEFAULT_MODEL
+
+    def select(self, poster, target_format, default=None):
+        """Model to call now: the configured one, or the first healthy fallback"""
+        configured = self.route(poster, target_format, default)
+        model, reason = configured, 'route'
+        candidate, seen = configured, set()
+        while candidate and candidate not in seen:
+            seen.add(candidate)
+            problem = self.health_problem(candidate)
+            if not problem:
+                model = candidate
+                break
+            print(f"[router] {candidate} is unhealthy ({problem})")
+            candidate = self.fallbacks.get(candidate)
+            reason = 'fallback'
+        else:
+            # Every model in the chain is unhealthy: stay on the configured one
+            model, reason = configured, 'route'
+
+        if model != configured:
+            print(f"[router] Using {model} instead of {configured} for {poster} ({target_format})")
+        get_default_metrics().model_selections.inc(poster=poster, model=model, reason=reason)
+        return model
+
+    def observe(self, model, seconds, ok=True):
+        """Record one completed or failed call"""
+        with self._lock:
+            self._calls.setdefault(model, deque(maxlen=200)).append((time.monotonic(), seconds, ok))
+
+    def health(self, model):
+        """(calls, p90 latency, error rate) over the recent window"""
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            calls = [call for call in self._calls.get(model, ()) if call[0] >= cutoff]
+        if not calls:
+            return 0, None, 0.0
+        latencies = sorted(seconds for _, seconds, ok in calls if ok)
+        p90 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))] if latencies else None
+        error_rate = sum(1 for _, _, ok in calls if not ok) / len(calls)
+        return len(calls), p90, error_rate
+
+    def health_problem(self, model):
+        """Why a model is unhealthy right now, or None"""
+        calls, p90, error_rate = self.health(model)
+        if calls < self.min_calls:
+            return None
+        if error_rate >= self.error_threshold:
+            return f"{error_rate:.0%} errors"
+        if p90 is not None and p90 > self.latency_threshold:
+            return f"p90 {p90:.1f}s"
+        return None
+
+
+_default_router = None
+_default_router_lock = threading.Lock()
+
+
+def get_default_router():
+    """Return the process-wide model router"""
+    global _default_router
+    with _default_router_lock:
+        if _default_router is None:
+            _default_router = ModelRouter()
+        return _default_router
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from scheduler_daemon import load_jobs
+
+    load_dotenv()
+    router = get_default_router()
+    print(f"{'Poster':<22}{'Twitter':<16}{'LinkedIn':<16}{'Facebook':<16}Variants")
+    print("-" * 86)
+    for name, poster_class, _run_args, _schedule in load_jobs():
+        models = [router.route(name, target_format, poster_class.FEED.model)
+                  for target_format in ('twitter', 'linkedin', 'facebook', 'variants')]
+        print(f"{name:<22}{models[0]:<16}{models[1]:<16}{models[2]:<16}{models[3]}")
+    print("\nFallbacks: " + ', '.join(f"{model} -> {fallback}" for model, fallback in router.fallbacks.items()))
@@ -0,0 +1,490 @@
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from http_transport import get_default_transport
+
+# html, email.utils, xml.etree and concurrent.futures are imported where
+# they're used, so importing a news poster stays cheap (see startup_benchmark.py)
+
+DEFAULT_STORE_PATH = os.path.join('state', 'news.db')
+DEFAULT_FETCH_WORKERS = 16
+DEFAULT_REFRESH_MINUTES = 15     # a feed checked this recently isn't fetched again
+DEFAULT_MAX_AGE_HOURS = 36       # older articles are not offered to the prompt (0: no limit)
+DEFAULT_TOP_ITEMS = 6
+DEFAULT_RETENTION_DAYS = 7
+MAX_ITEMS_PER_FEED = 50          # parsing stops after this many items, the rest isn't downloaded
+SUMMARY_CHARS = 280
+CHUNK_SIZE = 16384
+USER_AGENT = 'social-news-poster/1.0 (+feed reader)'
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+RSS1 = '{http://purl.org/rss/1.0/}'
+DC = '{http://purl.org/dc/elements/1.1/}'
+CONTENT = '{http://purl.org/rss/1.0/modules/content/}'
+ITEM_TAGS = {'item', RSS1 + 'item', ATOM + 'entry'}
+TITLE_TAGS = {'title', RSS1 + 'title', ATOM + 'title'}
+
+# Feed refresh outcomes
+FETCHED = 'fetched'
+NOT_MODIFIED = 'not_modified'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+def _text(element, *tags):
+    for tag in tags:
+        child = element.find(tag)
+        if child is not None and (child.text or '').strip():
+            return child.text.strip()
+    return None
+
+
+def parse_date(text):
+    """Timestamp of an RSS (RFC 822) or Atom (ISO 8601) date, or None"""
+    from email.utils import parsedate_to_datetime
+
+    if not text:
+        return None
+    try:
+        return parsedate_to_datetime(text).timestamp()
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(text.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def clean_summary(text):
+    """Plain-text summary: markup stripped, entities decoded, cut at a word boundary"""
+    import html
+
+    text = ' '.join(html.unescape(re.sub(r'<[^>]+>', ' ', text or '')).split())
+    if len(text) <= SUMMARY_CHARS:
+        return text
+    return text[:SUMMARY_CHARS].rsplit(' ', 1)[0] + '…'
+
+
+def _article(element):
+    """{guid, title, link, summary, published_at} for an RSS item or Atom entry, or None without a title"""
+    import html
+
+    if element.tag == ATOM + 'entry':
+        link = None
+        for candidate in element.findall(ATOM + 'link'):
+            if candidate.get('rel') in (None, 'alternate'):
+                link = candidate.get('href')
+                break
+        title = _text(element, ATOM + 'title')
+        guid = _text(element, ATOM + 'id')
+        published = _text(element, ATOM + 'published', ATOM + 'updated')
+        summary = _text(element, ATOM + 'summary', ATOM + 'content')
+    else:
+        ns = RSS1 if element.tag == RSS1 + 'item' else ''
+        title = _text(element, ns + 'title')
+        link = _text(element, ns + 'link')
+        guid = _text(element, 'guid') or element.get('{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about')
+        published = _text(element, 'pubDate', DC + 'date')
+        summary = _text(element, ns + 'description', CONTENT + 'encoded')
+    if not title:
+        return None
+    return {
+        'guid': guid or link or title,
+        'title': ' '.join(html.unescape(title).split()),
+        'link': link,
+        'summary': clean_summary(summary),
+        'published_at': parse_date(published),
+    }
+
+
+def parse_feed(chunks, max_items=MAX_ITEMS_PER_FEED):
+    """Parse RSS 2.0, RSS 1.0 or Atom from an iterable of byte chunks as they arrive.
+
+    Returns (feed title, articles). Each item is dropped from the tree once
+    read, and parsing stops after max_items, so large feeds are neither
+    held in memory nor downloaded in full. A feed that breaks off or turns
+    malformed part way keeps the items read before that point.
+    """
+    from xml.etree import ElementTree
+
+    parser = ElementTree.XMLPullParser(events=('start', 'end'))
+    title = None
+    articles = []
+    depth = 0
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if element.tag in ITEM_TAGS:
+                    depth += 1 if event == 'start' else -1
+                    if event == 'end':
+                        article = _article(element)
+                        element.clear()
+                        if article:
+                            articles.append(article)
+                            if len(articles) >= max_items:
+                                return title, articles
+                elif event == 'end' and title is None and depth == 0 and element.tag in TITLE_TAGS:
+                    title = ' '.join((element.text or '').split()) or None
+        parser.close()
+    except ElementTree.ParseError:
+        if not articles:
+            raise
+    return title, articles
+
+
+class ArticleStore:
+    """Feed validators (ETag/Last-Modified) and the articles read from them"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('NEWS_STORE_PATH', DEFAULT_STORE_PATH)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS feeds (
+                    url TEXT PRIMARY KEY,
+                    title TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    checked_at REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    article_id TEXT PRIMARY KEY,
+                    feed_url TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    link TEXT,
+                    summary TEXT,
+                    published_at REAL NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_feed ON articles (feed_url, published_at)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def feed_states(self, urls):
+        """{url: (etag, last_modified, checked_at)} for the feeds seen before"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT url, etag, last_modified, checked_at FROM feeds WHERE url IN ({','.join('?' * len(urls))})",
+                list(urls)
+            ).fetchall()
+        return {url: (etag, last_modified, checked_at) for url, etag, last_modified, checked_at in rows}
+
+    def save(self, results):
+        """Store a refresh's results: {url: result} as returned by NewsIngest.fetch(). Returns new articles."""
+        now = time.time()
+        added = 0
+        with self._connect() as conn:
+            for url, result in results.items():
+                if result['status'] == NOT_MODIFIED:
+                    conn.execute("UPDATE feeds SET checked_at = ?, status = ?, error = NULL WHERE url = ?",
+                                 (now, NOT_MODIFIED, url))
+                    continue
+                if result['status'] == FAILED:
+                    # Validators are kept, so the next refresh can still get a 304
+                    conn.execute(
+                        "INSERT INTO feeds (url, checked_at, status, error) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(url) DO UPDATE SET checked_at = excluded.checked_at, "
+                        "status = excluded.status, error = excluded.error",
+                        (url, now, FAILED, result['error'])
+                    )
+                    continue
+                conn.execute(
+                    "INSERT OR REPLACE INTO feeds (url, title, etag, last_modified, checked_at, status) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, result['title'], result['etag'], result['last_modified'], now, FETCHED)
+                )
+                for article in result['articles']:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO articles "
+                        "(article_id, feed_url, title, link, summary, published_at, fetched_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (hashlib.sha256(f"{url}\x1f{article['guid']}".encode('utf-8')).hexdigest(), url,
+                         article['title'], article['link'], article['summary'],
+                         article['published_at'] or now, now)
+                    )
+                    added += cursor.rowcount
+        return added
+
+    def recent_articles(self, urls, since, limit):
+        """Newest articles of the given feeds published after since, with their feed's title"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT a.feed_url, COALESCE(f.title, a.feed_url), a.title, a.link, a.summary, a.published_at "
+                "FROM articles a LEFT JOIN feeds f ON f.url = a.feed_url "
+                f"WHERE a.feed_url IN ({','.join('?' * len(urls))}) AND a.published_at >= ? "
+                "ORDER BY a.published_at DESC LIMIT ?",
+                list(urls) + [since, limit]
+            ).fetchall()
+
+    def purge(self, before):
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM articles WHERE published_at < ? AND fetched_at < ?",
+                                (before, before)).rowcount
+
+    def summary(self):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT f.url, f.title, f.status, f.checked_at, f.error, COUNT(a.article_id) "
+                "FROM feeds f LEFT JOIN articles a ON a.feed_url = f.url GROUP BY f.url ORDER BY f.url"
+            ).fetchall()
+
+
+class NewsIngest:
+    """Reads each poster's RSS/Atom feeds and picks the top articles for its prompt.
+
+    Feeds are fetched in parallel with If-None-Match/If-Modified-Since, so
+    an unchanged feed costs a 304, and parsed as they download. Feeds
+    checked within refresh_minutes are not fetched again. file:// URLs are
+    read from disk, with the file's mtime standing in for Last-Modified.
+    """
+
+    def __init__(self, store=None, transport=None, workers=None, refresh_minutes=None, max_age_hours=None,
+                 top_items=None):
+        self.store = store or ArticleStore()
+        self.transport = transport or get_default_transport()
+        self.workers = int(workers or os.getenv('NEWS_FETCH_WORKERS', DEFAULT_FETCH_WORKERS))
+        self.refresh_minutes = float(refresh_minutes if refresh_minutes is not None
+                                     else os.getenv('NEWS_REFRESH_MINUTES', DEFAULT_REFRESH_MINUTES))
+        self.max_age_hours = float(max_age_hours if max_age_hours is not None
+                                   else os.getenv('NEWS_MAX_AGE_HOURS', DEFAULT_MAX_AGE_HOURS))
+        self.top_items = int(top_items or os.getenv('NEWS_TOP_ITEMS', DEFAULT_TOP_ITEMS))
+
+    @staticmethod
+    def sources(poster_name, urls=()):
+        """A poster's feed URLs: NEWS_FEEDS_<POSTER_NAME> (comma-separated) if set, else urls"""
+        override = os.getenv(f"NEWS_FEEDS_{poster_name.upper()}")
+        if override is not None:
+            return [url.strip() for url in override.split(',') if url.strip()]
+        return list(urls)
+
+    def refresh(self, urls, force=False):
+        """Fetch the feeds that are due, all at once. Returns {outcome: count} plus 'articles' (new ones)."""
+        urls = list(dict.fromkeys(urls))
+        counts = {FETCHED: 0, NOT_MODIFIED: 0, FAILED: 0, SKIPPED: 0, 'articles': 0}
+        if not urls:
+            return counts
+        states = self.store.feed_states(urls)
+        cutoff = time.time() - self.refresh_minutes * 60
+        due = [url for url in urls if force or url not in states or states[url][2] < cutoff]
+        counts[SKIPPED] = len(urls) - len(due)
+
+        results = {}
+        if due:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(due)), thread_name_prefix='news') as executor:
+                fetched = executor.map(lambda url: self.fetch(url, *states.get(url, (None, None, None))[:2]), due)
+                results = dict(zip(due, fetched))
+        for url, result in results.items():
+            counts[result['status']] += 1
+            if result['status'] == FAILED:
+                print(f"[news] Could not read {url}: {result['error']}")
+        counts['articles'] = self.store.save(results)
+        self.store.purge(time.time() - DEFAULT_RETENTION_DAYS * 86400)
+        return counts
+
+    def fetch(self, url, etag=None, last_modified=None):
+        """Fetch and parse one feed: {'status', 'title', 'articles', 'etag', 'last_modified', 'error'}"""
+        from email.utils import formatdate
+        from urllib.request import url2pathname
+        from xml.etree import ElementTree
+
+        result = {'status': FAILED, 'title': None, 'articles': [], 'etag': None, 'last_modified': None,
+                  'error': None}
+        try:
+            if urlsplit(url).scheme == 'file':
+                path = url2pathname(urlsplit(url).path)
+                modified = formatdate(os.path.getmtime(path), usegmt=True)
+                if modified == last_modified:
+                    result['status'] = NOT_MODIFIED
+                    return result
+                with open(path, 'rb') as feed_file:
+                    result['title'], result['articles'] = parse_feed(iter(lambda: feed_file.read(CHUNK_SIZE), b''))
+                result.update(status=FETCHED, last_modified=modified)
+                return result
+
+            headers = {'User-Agent': USER_AGENT}
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+            with self.transport.get(url, headers=headers, stream=True) as response:
+                if response.status_code == 304:
+                    result['status'] = NOT_MODIFIED
+                    return result
+                if response.status_code != 200:
+                    result['error'] = f"HTTP {response.status_code}"
+                    return result
+                result['title'], result['articles'] = parse_feed(response.iter_content(CHUNK_SIZE))
+                result.update(status=FETCHED, etag=response.headers.get('ETag'),
+                              last_modified=response.headers.get('Last-Modified'))
+                return result
+        except (OSError, ElementTree.ParseError) as e:
+            result['error'] = str(e)
+            return result
+        except Exception as e:
+            # requests' exceptions, without importing requests up front
+            result['error'] = f"{type(e).__name__}: {e}"
+            return result
+
+    def top_articles(self, poster_name, urls=(), limit=None):
+        """Refresh a poster's feeds and return its top recent articles, newest of each source first.
+
+        NEWS_FEEDS_<POSTER_NAME> replaces urls (see sources). Sources take
+        turns so no single feed fills the prompt, and a story carried by
+        several feeds under the same title is offered once.
+        """
+        urls = self.sources(poster_name, urls)
+        if not urls:
+            return []
+        limit = limit or self.top_items
+        counts = self.refresh(urls)
+        if counts[FETCHED] or counts[NOT_MODIFIED] or counts[FAILED]:
+            print(f"[news] {poster_name}: {counts[FETCHED]} feed(s) fetched, {counts[NOT_MODIFIED]} unchanged, "
+                  f"{counts[FAILED]} failed, {counts['articles']} new article(s)")
+        since = time.time() - self.max_age_hours * 3600 if self.max_age_hours else 0
+        by_feed = {}
+        for feed_url, source, title, link, summary, published_at in self.store.recent_articles(urls, since,
+                                                                                               limit * 10):
+            by_feed.setdefault(feed_url, []).append({'source': source, 'title': title, 'link': link,
+                                                     'summary': summary, 'published_at': published_at})
+        picked = []
+        seen = set()
+        while len(picked) < limit and any(by_feed.values()):
+            for articles in by_feed.values():
+                if articles and len(picked) < limit:
+                    article = articles.pop(0)
+                    key = re.sub(r'\W+', ' ', article['title'].lower()).strip()
+                    if key not in seen:
+                        seen.add(key)
+                        picked.append(article)
+        return picked
+
+
+def format_headlines(articles):
+    """Numbered article list for a prompt: title, source, summary and link"""
+    lines = []
+    for index, article in enumerate(articles, 1):
+        lines.append(f"{index}. {article['title']} ({article['source']})")
+        if article['summary']:
+            lines.append(f"   {article['summary']}")
+        if article['link']:
+            lines.append(f"   {article['link']}")
+    return '\n'.join(lines)
+
+
+_default_ingest = None
+_default_ingest_lock = threading.Lock()
+
+
+def get_default_news_ingest():
+    """Return the process-wide news ingest"""
+    global _default_ingest
+    with _default_ingest_lock:
+        if _default_ingest is None:
+            _default_ingest = NewsIngest()
+        return _default_ingest
+
+
+def fixture_feed_server(directory):
+    """Local HTTP server for the feeds in directory, answering conditional GETs with 304.
+
+    Any query string is ignored, so "tech.xml?copy=7" serves tech.xml as
+    a separate feed URL. Used by --benchmark.
+    """
+    from functools import partial
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(SimpleHTTPRequestHandler):
+        def send_head(self):
+            path = self.translate_path(self.path)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return None
+                self._etag = etag
+            return super().send_head()
+
+        def end_headers(self):
+            if getattr(self, '_etag', None):
+                self.send_header('ETag', self._etag)
+                self._etag = None
+            super().end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), partial(Handler, directory=directory))
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name='fixture-feeds', daemon=True).start()
+    return httpd
+
+
+if __name__ == "__main__":
+    # python news_ingest.py                  -> refresh every feed's news feeds and show the top articles
+    # python news_ingest.py --status         -> list feeds and their last refresh
+    # python news_ingest.py --benchmark [N]  -> refresh N fixture feeds from a local server, twice
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if '--benchmark' in sys.argv:
+        import tempfile
+
+        index = sys.argv.index('--benchmark')
+        count = int(sys.argv[index + 1]) if len(sys.argv) > index + 1 else 100
+        fixtures = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'feeds')
+        names = sorted(os.listdir(fixtures))
+        httpd = fixture_feed_server(fixtures)
+        base_url = f"http://127.0.0.1:{httpd.server_port}"
+        urls = [f"{base_url}/{names[i % len(names)]}?copy={i}" for i in range(count)]
+        ingest = NewsIngest(store=ArticleStore(os.path.join(tempfile.mkdtemp(prefix='news-'), 'news.db')),
+                            refresh_minutes=0, max_age_hours=0)
+        for label in ('cold', 'conditional'):
+            started = time.monotonic()
+            counts = ingest.refresh(urls)
+            print(f"[news] {label}: {count} feeds in {time.monotonic() - started:.2f}s - "
+                  f"{counts[FETCHED]} fetched, {counts[NOT_MODIFIED]} not modified, {counts[FAILED]} failed, "
+                  f"{counts['articles']} new article(s)")
+        httpd.shutdown()
+        sys.exit(0)
+
+    ingest = get_default_news_ingest()
+    if '--status' not in sys.argv:
+        from feed_catalog import load_feeds
+
+        for feed in load_feeds():
+            if feed.news_feeds:
+                print(f"\n{feed.name}")
+                print("-" * 60)
+                print(format_headlines(ingest.top_articles(feed.name, feed.news_feeds)) or "(no recent articles)")
+        print()
+
+    print(f"{'Feed':<60}{'Status':<14}{'Checked':<18}Articles")
+    print("-" * 100)
+    for url, title, status, checked_at, error, articles in ingest.store.summary():
+        checked = datetime.fromtimestamp(checked_at).strftime('%Y-%m-%d %H:%M')
+        print(f"{(title or url)[:58]:<60}{status:<14}{checked:<18}{articles}" + (f"  ({error})" if error else ""))
@@ -0,0 +1,423 @@
+import contextvars
+import functools
+import hashlib
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date
+
+from metrics import get_default_metrics
+
+DEFAULT_OUTBOX_PATH = os.path.join('state', 'outbox.db')
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_BASE_DELAY = 30      # seconds before the first retry
+DEFAULT_MAX_DELAY = 3600     # cap for exponential backoff
+IN_FLIGHT_LEASE = 600        # in-flight rows older than this are assumed crashed
+
+# Delivery states
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+PUBLISHED = 'published'
+FAILED = 'failed'
+
+# Idempotency key of the delivery Outbox.deliver() is publishing right now
+_current_delivery = contextvars.ContextVar('outbox_delivery', default=None)
+
+
+def current_delivery():
+    """Key of the delivery being published in this context, or None outside Outbox.deliver()"""
+    return _current_delivery.get()
+
+
+def slot_key(moment):
+    """The outbox slot of a scheduled run: its fire time to the minute, so a job firing twice a day gets two slots"""
+    return moment.strftime('%Y-%m-%dT%H:%M')
+
+
+class Outbox:
+    """Durable record of generated content and its per-platform deliveries.
+
+    Every (platform, target) delivery has an idempotency key derived from the
+    poster, the posting slot (the scheduled fire time, see slot_key(); today's
+    date for manual runs), the platform and the target, and moves through pending -> in_flight -> published/failed.
+    A delivery that is already published is never sent again, and failed
+    ones are retried with exponential backoff and jitter.
+    """
+
+    def __init__(self, path=None, max_attempts=None, base_delay=None, max_delay=None):
+        self.path = path or os.getenv('OUTBOX_PATH', DEFAULT_OUTBOX_PATH)
+        self.max_attempts = int(max_attempts or os.getenv('OUTBOX_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+        self.base_delay = float(base_delay or os.getenv('OUTBOX_BASE_DELAY', DEFAULT_BASE_DELAY))
+        self.max_delay = float(max_delay or os.getenv('OUTBOX_MAX_DELAY', DEFAULT_MAX_DELAY))
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS contents (
+                    content_id TEXT PRIMARY KEY,
+                    poster TEXT NOT NULL,
+                    slot TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS deliveries (
+                    idempotency_key TEXT PRIMARY KEY,
+                    content_id TEXT NOT NULL REFERENCES contents (content_id),
+                    platform TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    updated_at REAL NOT NULL,
+                    content TEXT
+                )
+            """)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(deliveries)")]
+            if 'content' not in columns:
+                # Per-platform variant text; NULL means the shared content
+                conn.execute("ALTER TABLE deliveries ADD COLUMN content TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_deliveries_due ON deliveries (state, next_attempt_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS parts (
+                    idempotency_key TEXT NOT NULL REFERENCES deliveries (idempotency_key),
+                    position INTEGER NOT NULL,
+                    part_id TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (idempotency_key, position)
+                )
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def make_key(*parts):
+        return hashlib.sha256('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+    def record(self, poster, content, deliveries, slot=None, contents=None):
+        """Store content and its deliveries; return {(platform, target): key}.
+
+        contents optionally maps platform -> the variant text that platform
+        gets instead of content. Recording the same poster/slot again keeps
+        the original content and delivery states, which is what makes reruns
+        idempotent. slot defaults to today's date, so manual runs share one
+        slot per day.
+        """
+        contents = contents or {}
+        slot = slot or date.today().isoformat()
+        content_id = self.make_key(poster, slot)
+        now = time.time()
+        keys = {}
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO contents (content_id, poster, slot, content, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (content_id, poster, slot, content, now)
+            )
+            for platform, target in deliveries:
+                target = str(target or 'default')
+                key = self.make_key(poster, slot, platform, target)
+                conn.execute(
+                    "INSERT OR IGNORE INTO deliveries "
+                    "(idempotency_key, content_id, platform, target, state, next_attempt_at, updated_at, content) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, content_id, platform, target, PENDING, now, now, contents.get(platform))
+                )
+                keys[(platform, target)] = key
+        return keys
+
+    def get_state(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT state FROM deliveries WHERE idempotency_key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_content(self, key):
+        """Return the stored content for a delivery (its platform variant, if any)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COALESCE(d.content, c.content) FROM deliveries d JOIN contents c ON c.content_id = d.content_id "
+                "WHERE d.idempotency_key = ?",
+                (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def posted_parts(self, key):
+        """IDs of the parts of a multi-part delivery (a tweet thread) already sent, in order.
+
+        A publisher records each part as it goes (see current_delivery()),
+        so a retry after a partial failure continues where it stopped.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT part_id FROM parts WHERE idempotency_key = ? ORDER BY position",
+                                (key,)).fetchall()
+        return [row[0] for row in rows]
+
+    def record_part(self, key, position, part_id):
+        """Remember that part number position of a delivery was sent as part_id"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO parts (idempotency_key, position, part_id, created_at) VALUES (?, ?, ?, ?)",
+                (key, position, str(part_id), time.time())
+            )
+
+    def claim(self, key, force=False):
+        """Atomically move a delivery to in_flight. Returns False if someone else owns it.
+
+        force=True ignores the retry schedule (used by a live run that just
+        recorded the delivery), but never re-sends a published delivery.
+        """
+        now = time.time()
+        if force:
+            ready_clause, ready_params = "state IN (?, ?)", [PENDING, FAILED]
+        else:
+            ready_clause, ready_params = "state = ? AND next_attempt_at <= ?", [PENDING, now]
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE deliveries SET state = ?, updated_at = ? WHERE idempotency_key = ? AND "
+                f"(({ready_clause}) OR (state = ? AND updated_at < ?))",
+                [IN_FLIGHT, now, key] + ready_params + [IN_FLIGHT, now - IN_FLIGHT_LEASE]
+            )
+            return cursor.rowcount == 1
+
+    def mark_published(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE deliveries SET state = ?, attempts = attempts + 1, last_error = NULL, updated_at = ? "
+                "WHERE idempotency_key = ?",
+                (PUBLISHED, now, key)
+            )
+
+    def mark_failed(self, key, error):
+        """Schedule a retry with exponential backoff, or give up after max attempts"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT attempts FROM deliveries WHERE idempotency_key = ?", (key,)).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            if attempts >= self.max_attempts:
+                state, next_attempt = FAILED, now
+            else:
+                state, next_attempt = PENDING, now + self.backoff_delay(attempts)
+            conn.execute(
+                "UPDATE deliveries SET state = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ? "
+                "WHERE idempotency_key = ?",
+                (state, attempts, next_attempt, str(error)[:500], now, key)
+            )
+        return state
+
+    def backoff_delay(self, attempts):
+        """Exponential backoff with jitter: half the delay fixed, half random"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def due_deliveries(self, limit=50):
+        """Return pending deliveries whose retry time has come"""
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT d.idempotency_key, c.poster, d.platform, d.target FROM deliveries d "
+                "JOIN contents c ON c.content_id = d.content_id "
+                "WHERE (d.state = ? AND d.next_attempt_at <= ?) OR (d.state = ? AND d.updated_at < ?) "
+                "ORDER BY d.next_attempt_at LIMIT ?",
+                (PENDING, now, IN_FLIGHT, now - IN_FLIGHT_LEASE, limit)
+            ).fetchall()
+
+    def summary(self):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT c.poster, c.slot, d.platform, d.target, d.state, d.attempts, d.last_error "
+                "FROM deliveries d JOIN contents c ON c.content_id = d.content_id "
+                "ORDER BY d.updated_at DESC LIMIT 50"
+            ).fetchall()
+
+    def guard(self, poster, content, publishers, slot=None, targets=None, variants=None):
+        """Record content and wrap each publisher with idempotent delivery tracking.
+
+        publishers maps platform -> callable(content) and targets optionally
+        maps platform -> account/page the delivery goes to. variants
+        optionally maps platform -> its own text, which that platform is
+        sent (and retried with) instead of content. The returned dict has
+        the same shape and can be passed straight to publish_to_platforms.
+        """
+        targets = targets or {}
+        variants = variants or {}
+        keys = self.record(poster, content,
+                           [(platform, targets.get(platform)) for platform in publishers], slot=slot,
+                           contents=variants)
+
+        guarded = {}
+        reused = False
+        for (platform, _target), key in keys.items():
+            stored_content = self.get_content(key)
+            reused = reused or stored_content != variants.get(platform, content)
+            guarded[platform] = self._guarded_publisher(key, platform, publishers[platform], stored_content)
+        if reused:
+            print(f"Content for {poster} was already recorded for this slot. Reusing it.")
+        return guarded
+
+    def _guarded_publisher(self, key, platform, publish, stored_content):
+        def deliver(_content):
+            return self.deliver(key, platform, publish, stored_content, force=True)
+        return deliver
+
+    def guard_batch(self, poster, content, platform, targets, publish_batch, slot=None):
+        """Like guard(), for a platform that publishes to many targets in one call.
+
+        publish_batch(content, targets) must return {target: True/False}.
+        Only targets that aren't published yet are sent. Returns a single
+        callable(content) suitable for publish_to_platforms.
+        """
+        keys = self.record(poster, content, [(platform, target) for target in targets], slot=slot)
+        stored_content = self.get_content(next(iter(keys.values()))) if keys else content
+
+        def deliver(_content):
+            claimed = {}
+            for (_platform, target), key in keys.items():
+                if self.get_state(key) == PUBLISHED:
+                    continue
+                if self.claim(key, force=True):
+                    claimed[target] = key
+            skipped = len(keys) - len(claimed)
+            if skipped:
+                print(f"Skipping {skipped} {platform} target(s) already published or in progress.")
+            if claimed:
+                self._publish_claimed(platform, claimed, publish_batch, stored_content)
+            return all(self.get_state(key) == PUBLISHED for key in keys.values())
+        return deliver
+
+    def _publish_claimed(self, platform, claimed, publish_batch, content):
+        try:
+            results = publish_batch(content, list(claimed))
+        except Exception as e:
+            results, error = {}, e
+        else:
+            error = None
+
+        for target, key in claimed.items():
+            self._record_outcome(key, f"{platform} {target}", bool(results.get(target)),
+                                 error or f"{platform} publish to {target} failed")
+
+    def deliver(self, key, platform, publish, content, force=False):
+        """Claim one delivery, publish it and record the outcome"""
+        if self.get_state(key) == PUBLISHED:
+            print(f"Already published to {platform} for this slot. Skipping.")
+            return True
+        if not self.claim(key, force=force):
+            print(f"Delivery to {platform} is already in progress elsewhere. Skipping.")
+            return False
+
+        token = _current_delivery.set(key)
+        try:
+            success = publish(content)
+        except Exception as e:
+            success, error = False, e
+        else:
+            error = None if success else f"{platform} publish returned failure"
+        finally:
+            _current_delivery.reset(token)
+
+        self._record_outcome(key, platform, success, error)
+        return success
+
+    def _record_outcome(self, key, label, success, error):
+        if success:
+            self.mark_published(key)
+            return
+        state = self.mark_failed(key, error)
+        if state == PENDING:
+            print(f"Delivery to {label} queued for retry.")
+        else:
+            print(f"Delivery to {label} failed permanently after {self.max_attempts} attempts.")
+
+
+class OutboxRetrier:
+    """Background thread that re-sends due deliveries from the outbox.
+
+    resolvers maps a poster name to callable(platform, target, content),
+    normally the poster's publish_to_target method. Throttled deliveries
+    are skipped, so later ones in the queue go first.
+    """
+
+    def __init__(self, outbox, resolvers, interval=30, rate_governor=None):
+        self.outbox = outbox
+        self.resolvers = resolvers
+        self.interval = interval
+        # Deliveries whose platform account is throttled wait for a later pass
+        self.rate_governor = rate_governor
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """Retry every due delivery once. Returns the number attempted."""
+        attempted = 0
+        for key, poster, platform, target in self.outbox.due_deliveries():
+            resolver = self.resolvers.get(poster)
+            if resolver is None:
+                continue
+            if self.rate_governor and self.rate_governor.delay_for(platform, target) > 0:
+                continue
+            content = self.outbox.get_content(key)
+            print(f"[outbox] Retrying {poster} -> {platform} ({target})")
+            publish = functools.partial(resolver, platform, target)
+            started = time.monotonic()
+            published = self.outbox.deliver(key, platform, publish, content)
+            metrics = get_default_metrics()
+            metrics.publish_seconds.observe(time.monotonic() - started, poster=poster, platform=platform)
+            metrics.publishes.inc(poster=poster, platform=platform, outcome='published' if published else 'failed')
+            attempted += 1
+        return attempted
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='outbox-retrier', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[outbox] Retry pass failed: {e}")
+
+
+_default_outbox = None
+_default_outbox_lock = threading.Lock()
+
+
+def get_default_outbox():
+    """Return the process-wide outbox"""
+    global _default_outbox
+    with _default_outbox_lock:
+        if _default_outbox is None:
+            _default_outbox = Outbox()
+        return _default_outbox
+
+
+if __name__ == "__main__":
+    outbox = Outbox()
+    rows = outbox.summary()
+    if not rows:
+        print("Outbox is empty.")
+        sys.exit(0)
+
+    print(f"{'Poster':<20}{'Slot':<18}{'Platform':<10}{'Target':<18}{'State':<11}{'Tries':<6}Last error")
+    print("-" * 100)
+    for poster, slot, platform, target, state, attempts, last_error in rows:
+        print(f"{poster:<20}{slot:<18}{platform:<10}{target[:16]:<18}{state:<11}{attempts:<6}{last_error or ''}")
@@ -0,0 +1,99 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Per-platform publish deadlines in seconds.
+# Override with <PLATFORM>_PUBLISH_TIMEOUT in .env, e.g. LINKEDIN_PUBLISH_TIMEOUT=20
+DEFAULT_TIMEOUTS = {
+    'twitter': 30,
+    'linkedin': 30,
+    'facebook': 60,
+}
+FALLBACK_TIMEOUT = 60
+
+
+def get_platform_timeout(platform):
+    """Return the publish deadline for a platform in seconds"""
+    override = os.getenv(f"{platform.upper()}_PUBLISH_TIMEOUT")
+    if override:
+        return float(override)
+    return DEFAULT_TIMEOUTS.get(platform, FALLBACK_TIMEOUT)
+
+
+def publish_to_platforms(publishers, content, timeouts=None):
+    """Publish content to every platform concurrently.
+
+    publishers maps a platform name to a callable taking the content and
+    returning True on success. Each platform gets its own deadline, so the
+    total wall time is set by the slowest platform rather than the sum.
+
+    Returns a per-platform outcome report:
+        {platform: {'status': 'published'|'failed'|'timeout'|'error',
+                    'elapsed': seconds, 'error': message or None}}
+    """
+    timeouts = timeouts or {}
+    report = {}
+    if not publishers:
+        return report
+
+    executor = ThreadPoolExecutor(max_workers=len(publishers), thread_name_prefix='publish')
+    started = time.monotonic()
+    futures = {
+        platform: executor.submit(_timed_call, publish, content)
+        for platform, publish in publishers.items()
+    }
+
+    try:
+        for platform, future in futures.items():
+            deadline = timeouts.get(platform, get_platform_timeout(platform))
+            remaining = max(0.0, started + deadline - time.monotonic())
+            try:
+                success, elapsed, error = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                future.cancel()
+                report[platform] = {
+                    'status': 'timeout',
+                    'elapsed': time.monotonic() - started,
+                    'error': f"No response within {deadline:g}s",
+                }
+                continue
+
+            if error is not None:
+                status = 'error'
+            else:
+                status = 'published' if success else 'failed'
+            report[platform] = {'status': status, 'elapsed': elapsed, 'error': error}
+    finally:
+        # Don't block on publishers that blew their deadline
+        executor.shutdown(wait=False)
+
+    return report
+
+
+def _timed_call(publish, content):
+    start = time.monotonic()
+    try:
+        success = publish(content)
+        return bool(success), time.monotonic() - start, None
+    except Exception as e:
+        return False, time.monotonic() - start, str(e)
+
+
+def print_outcome_report(report):
+    """Print a one-line summary per platform"""
+    if not report:
+        print("No platforms selected.")
+        return
+
+    print("\nPublish report:")
+    for platform, outcome in report.items():
+        symbol = "✓" if outcome['status'] == 'published' else "✗"
+        line = f"  {symbol} {platform:<10} {outcome['status']:<10} {outcome['elapsed']:.2f}s"
+        if outcome['error']:
+            line += f"  ({outcome['error']})"
+        print(line)
+
+
+def all_published(report):
+    """True when every selected platform published successfully"""
+    return bool(report) and all(outcome['status'] == 'published' for outcome in report.values())
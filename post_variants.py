@@ -0,0 +1,135 @@
+import json
+import re
+
+from twitter_text import weighted_length
+
+# JSON field holding each platform's variant
+VARIANT_FIELDS = {
+    'twitter': 'twitter_short',
+    'linkedin': 'linkedin_long',
+    'facebook': 'facebook',
+}
+MAX_HASHTAGS = 8
+
+# Models that accept a strict JSON schema, and older ones that only have JSON mode
+STRUCTURED_OUTPUT_MODELS = ('gpt-4o', 'gpt-4.1', 'gpt-5', 'o1', 'o3', 'o4')
+JSON_MODE_MODELS = ('gpt-4-turbo', 'gpt-4-1106', 'gpt-4-0125', 'gpt-3.5-turbo')
+
+CODE_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+
+class VariantError(ValueError):
+    """Structured output that doesn't match the variant schema"""
+
+
+def variant_length(platform, text):
+    """Length as the platform counts it (weighted for Twitter)"""
+    return weighted_length(text) if platform == 'twitter' else len(text)
+
+
+def variant_schema(platforms, limits):
+    properties = {
+        VARIANT_FIELDS[platform]: {
+            'type': 'string',
+            'description': f"Complete {platform} post, at most {limits[platform]} characters",
+        }
+        for platform in platforms
+    }
+    properties['hashtags'] = {
+        'type': 'array',
+        'items': {'type': 'string'},
+        'description': f"Up to {MAX_HASHTAGS} relevant hashtags",
+    }
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': list(properties),
+        'additionalProperties': False,
+    }
+
+
+def response_format_for(model, platforms, limits):
+    """The response_format a model supports for variants, or None for prompt-only JSON"""
+    if model.startswith(STRUCTURED_OUTPUT_MODELS):
+        return {
+            'type': 'json_schema',
+            'json_schema': {'name': 'post_variants', 'strict': True, 'schema': variant_schema(platforms, limits)},
+        }
+    if model.startswith(JSON_MODE_MODELS):
+        return {'type': 'json_object'}
+    return None
+
+
+def variant_instructions(platforms, limits):
+    """System message asking for every platform's variant in one JSON object"""
+    fields = '\n'.join(
+        f'- "{VARIANT_FIELDS[platform]}": the complete {platform} post, at most {limits[platform]} characters'
+        + (' (emoji count as 2, links as 23)' if platform == 'twitter' else '')
+        for platform in platforms
+    )
+    return f"""Write one native version of the post for each platform below, instead of a single post.
+Each version must stand on its own and fit its platform's limit without being cut off; keep the
+length instructions in the request for the longest version. Reply with one JSON object only:
+{fields}
+- "hashtags": a list of up to {MAX_HASHTAGS} relevant hashtags, each starting with #"""
+
+
+def parse_variants(text, platforms, limits, check_lengths=True):
+    """Validate structured output and return {platform: text, 'hashtags': [...]}.
+
+    Raises VariantError describing every problem found, so it can be sent
+    back to the model for a corrected reply.
+    """
+    try:
+        data = json.loads(CODE_FENCE.sub('', text.strip()))
+    except ValueError as e:
+        raise VariantError(f"reply is not valid JSON ({e})")
+    if not isinstance(data, dict):
+        raise VariantError("reply is not a JSON object")
+
+    problems = []
+    variants = {}
+    for platform in platforms:
+        field = VARIANT_FIELDS[platform]
+        value = data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            problems.append(f'"{field}" is missing or empty')
+            continue
+        value = value.strip()
+        length = variant_length(platform, value)
+        if check_lengths and length > limits[platform]:
+            problems.append(f'"{field}" is {length} characters, over the {limits[platform]} limit')
+        variants[platform] = value
+
+    hashtags = data.get('hashtags') or []
+    if not isinstance(hashtags, list):
+        problems.append('"hashtags" is not a list')
+        hashtags = []
+    tags = []
+    for tag in hashtags:
+        if isinstance(tag, str) and tag.strip('# '):
+            tag = '#' + re.sub(r'\s+', '', tag.strip().lstrip('#'))
+            if tag not in tags:
+                tags.append(tag)
+    variants['hashtags'] = tags[:MAX_HASHTAGS]
+
+    if problems:
+        raise VariantError('; '.join(problems))
+    return variants
+
+
+def add_missing_hashtags(variants, platforms, limits, count=3):
+    """Append a few of the shared hashtags to variants that came back without any"""
+    for platform in platforms:
+        text = variants[platform]
+        if '#' in text or not variants['hashtags']:
+            continue
+        tags = ' '.join(variants['hashtags'][:count])
+        if variant_length(platform, f"{text}\n\n{tags}") <= limits[platform]:
+            variants[platform] = f"{text}\n\n{tags}"
+    return variants
+
+
+def primary_text(variants):
+    """The longest variant, used where a single text stands for the whole post"""
+    return max((text for key, text in variants.items() if key != 'hashtags'), key=len)
@@ -0,0 +1,240 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from outbox import slot_key
+
+DEFAULT_QUEUE_PATH = os.path.join('state', 'prefetch.db')
+DEFAULT_FRESHNESS_HOURS = 24     # for posters that don't set PREFETCH_FRESHNESS_HOURS
+DEFAULT_EARLY_MINUTES = 60       # a run this long before a slot may take its item
+DEFAULT_PREFETCH_SCHEDULE = '0 3 * * *'
+
+
+def freshness_hours(poster_class):
+    """How long a poster's generated content stays publishable.
+
+    PREFETCH_FRESHNESS_HOURS_<POSTER_NAME> overrides the class's
+    PREFETCH_FRESHNESS_HOURS (short for news, long for quotes).
+    """
+    override = os.getenv(f"PREFETCH_FRESHNESS_HOURS_{poster_class.POSTER_NAME.upper()}")
+    return float(override or getattr(poster_class, 'PREFETCH_FRESHNESS_HOURS', DEFAULT_FRESHNESS_HOURS))
+
+
+class PrefetchQueue:
+    """Content generated ahead of its posting slot, stored until run() takes it.
+
+    Each item belongs to one poster, run() arguments and slot, and is only
+    handed out until its freshness window ends. Stale items are dropped when
+    they come up, so the run generates fresh content instead.
+    """
+
+    def __init__(self, path=None, early_minutes=None):
+        self.path = path or os.getenv('PREFETCH_QUEUE_PATH', DEFAULT_QUEUE_PATH)
+        self.early_minutes = float(early_minutes or os.getenv('PREFETCH_EARLY_MINUTES', DEFAULT_EARLY_MINUTES))
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS items (
+                    poster TEXT NOT NULL,
+                    run_args TEXT NOT NULL,
+                    slot_at REAL NOT NULL,
+                    content TEXT NOT NULL,
+                    generated_at REAL NOT NULL,
+                    fresh_until REAL NOT NULL,
+                    PRIMARY KEY (poster, run_args, slot_at)
+                )
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _args_key(run_args):
+        return json.dumps([str(arg).lower() for arg in run_args])
+
+    def put(self, poster, run_args, slot, content, fresh_hours):
+        """Queue content (text or per-platform variants) for the slot at datetime slot"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO items (poster, run_args, slot_at, content, generated_at, fresh_until) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (poster, self._args_key(run_args), slot.timestamp(), json.dumps(content, ensure_ascii=False),
+                 now, now + fresh_hours * 3600)
+            )
+
+    def has(self, poster, run_args, slot):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM items WHERE poster = ? AND run_args = ? AND slot_at = ? AND fresh_until > ?",
+                (poster, self._args_key(run_args), slot.timestamp(), time.time())
+            ).fetchone()
+        return row is not None
+
+    def take(self, poster, run_args):
+        """Remove and return the content for the current slot, or None to generate it now.
+
+        Items for slots up to early_minutes ahead count as current; items
+        for missed slots are still used while they are fresh.
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT slot_at, content, generated_at, fresh_until FROM items "
+                "WHERE poster = ? AND run_args = ? AND slot_at <= ? ORDER BY slot_at",
+                (poster, self._args_key(run_args), now + self.early_minutes * 60)
+            ).fetchall()
+            for slot_at, content, generated_at, fresh_until in rows:
+                conn.execute("DELETE FROM items WHERE poster = ? AND run_args = ? AND slot_at = ?",
+                             (poster, self._args_key(run_args), slot_at))
+                slot = datetime.fromtimestamp(slot_at)
+                if fresh_until <= now:
+                    print(f"[prefetch] Dropping stale {poster} content for {slot:%Y-%m-%d %H:%M}")
+                    continue
+                age = (now - generated_at) / 3600
+                print(f"[prefetch] Using {poster} content for {slot:%Y-%m-%d %H:%M}, generated {age:.1f}h ago")
+                return json.loads(content)
+        return None
+
+    def purge_stale(self):
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM items WHERE fresh_until <= ?", (time.time(),)).rowcount
+
+    def pending(self):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT poster, run_args, slot_at, generated_at, fresh_until FROM items ORDER BY slot_at, poster"
+            ).fetchall()
+
+
+def upcoming_slots(schedule, after, count=None, until=None):
+    """The next slots of a schedule after a datetime: at most count, none later than until"""
+    slots = []
+    slot = after
+    while count is None or len(slots) < count:
+        slot = schedule.next_run(slot)
+        if slot is None or (until and slot > until):
+            break
+        slots.append(slot)
+    return slots
+
+
+class Prefetcher:
+    """Generates the next slots of each job into the prefetch queue.
+
+    jobs are (name, poster_class, run_args, schedule) tuples, where schedule
+    has next_run() like cron_schedule.CronSchedule. A slot is only filled
+    once it is within the poster's freshness window, so news is generated
+    a few hours ahead and quotes days ahead. Posts enter the dedup index
+    only when published (see CatalogPoster.run), so a dropped or expired
+    item never blocks new text; posts generated in one pass are not checked
+    against each other.
+    """
+
+    def __init__(self, jobs, queue=None, slots=None, **poster_options):
+        self.jobs = jobs
+        self.queue = queue or get_default_prefetch_queue()
+        self.slots = int(slots if slots is not None else os.getenv('PREFETCH_SLOTS', 0))
+        self.poster_options = poster_options
+        self._posters = {}
+
+    def poster(self, poster_class):
+        """The prefetcher's own poster instance, which skips the generation cache"""
+        if poster_class not in self._posters:
+            self._posters[poster_class] = poster_class(force_regenerate=True, prefetch_queue=self.queue,
+                                                       **self.poster_options)
+        return self._posters[poster_class]
+
+    def run(self, now=None):
+        """Fill every missing slot that is due for prefetching. Returns the number of items queued."""
+        now = now or datetime.now()
+        queued = sum(self.fill(job, upcoming_slots(job[3], now, count=self.slots), now) for job in self.jobs)
+        stale = self.queue.purge_stale()
+        print(f"[prefetch] Queued {queued} item(s)" + (f", dropped {stale} stale" if stale else ""))
+        return queued
+
+    def fill(self, job, slots, now=None):
+        """Generate and queue content for the given slots of one job. Returns the number queued."""
+        now = now or datetime.now()
+        name, poster_class, run_args, _schedule = job
+        hours = freshness_hours(poster_class)
+        queued = 0
+        for slot in slots:
+            if slot - timedelta(hours=hours) > now:
+                # Content made now would be stale by this slot; a later pass fills it
+                break
+            if self.queue.has(poster_class.POSTER_NAME, run_args, slot):
+                continue
+            content = self.generate(name, poster_class, run_args, slot)
+            if not content:
+                break
+            self.queue.put(poster_class.POSTER_NAME, run_args, slot, content, hours)
+            queued += 1
+        return queued
+
+    def generate(self, name, poster_class, run_args, slot):
+        """Generate one slot's content, dated for the slot and cached under its outbox slot"""
+        poster = self.poster(poster_class)
+        print(f"[prefetch] Generating {name} for {slot:%Y-%m-%d %H:%M}...")
+        try:
+            content = poster.generate_content(*run_args, now=slot, slot=slot_key(slot))
+        except Exception as e:
+            print(f"[prefetch] {name} generation failed: {e}")
+            return None
+        return content
+
+
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+def get_default_prefetch_queue():
+    """Return the process-wide prefetch queue"""
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = PrefetchQueue()
+        return _default_queue
+
+
+if __name__ == "__main__":
+    # python prefetch_queue.py               -> list queued items
+    # python prefetch_queue.py --slots N     -> generate the next N slots of every job now
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    queue = get_default_prefetch_queue()
+    if '--slots' in sys.argv:
+        from cron_schedule import CronSchedule
+        from scheduler_daemon import load_jobs
+
+        jobs = []
+        for name, poster_class, run_args, default_schedule in load_jobs():
+            expression = os.getenv(f"SCHEDULE_{name.upper()}", default_schedule)
+            if expression.strip().lower() != 'off':
+                jobs.append((name, poster_class, run_args, CronSchedule(expression)))
+        Prefetcher(jobs, queue, slots=int(sys.argv[sys.argv.index('--slots') + 1])).run()
+
+    rows = queue.pending()
+    if not rows:
+        print("Prefetch queue is empty.")
+        sys.exit(0)
+    now = time.time()
+    print(f"{'Poster':<22}{'Args':<14}{'Slot':<18}{'Generated':<18}Fresh for")
+    print("-" * 84)
+    for poster, run_args, slot_at, generated_at, fresh_until in rows:
+        slot = datetime.fromtimestamp(slot_at).strftime('%Y-%m-%d %H:%M')
+        generated = datetime.fromtimestamp(generated_at).strftime('%Y-%m-%d %H:%M')
+        fresh = f"{(fresh_until - now) / 3600:.1f}h" if fresh_until > now else 'stale'
+        print(f"{poster:<22}{', '.join(json.loads(run_args)) or '-':<14}{slot:<18}{generated:<18}{fresh}")
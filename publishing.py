@@ -0,0 +1,288 @@
+import os
+
+from twitter_text import fit_tweet, split_thread, weighted_length, MAX_WEIGHTED_LENGTH
+from facebook_batch import load_facebook_pages
+from quote_cards import strip_image_suggestion
+from media_upload import MediaSource, upload_twitter_media, upload_linkedin_media
+from outbox import current_delivery
+
+
+class QuoteCardMixin:
+    """Optional quote card for a post; posters that render cards set card_renderer"""
+
+    card_renderer = None
+
+    def get_quote_card(self, content):
+        """Rendered quote card for the post, or None when cards are off or it has no quote"""
+        return self.card_renderer.card_for_post(content) if self.card_renderer else None
+
+    def get_quote_cards(self, contents):
+        """get_quote_card() for many posts at once, rendered as one batch"""
+        return self.card_renderer.cards_for_posts(contents) if self.card_renderer else [None] * len(contents)
+
+
+class TwitterLinkedInMixin(QuoteCardMixin):
+    """Publishing to Twitter and LinkedIn, shared by the English posters.
+
+    Expects transport, rate_governor, credentials, outbox, twitter_thread
+    and twitter_account on the instance.
+    """
+
+    _twitter_client = None
+    _twitter_auth = None
+
+    @property
+    def linkedin_access_token(self):
+        return self.credentials.linkedin_access_token()
+
+    @property
+    def linkedin_person_id(self):
+        """LINKEDIN_PERSON_ID, or the ID cached by credentials.py --refresh (None until then)"""
+        return self.credentials.linkedin_person_id()
+
+    @property
+    def twitter_client(self):
+        """Twitter client, created on first use; None if credentials are missing"""
+        if self._twitter_client is None and all([
+                os.getenv('TWITTER_API_KEY'), os.getenv('TWITTER_API_SECRET'),
+                os.getenv('TWITTER_ACCESS_TOKEN'), os.getenv('TWITTER_ACCESS_SECRET')]):
+            import requests
+            import tweepy
+            self._twitter_client = tweepy.Client(
+                consumer_key=os.getenv('TWITTER_API_KEY'),
+                consumer_secret=os.getenv('TWITTER_API_SECRET'),
+                access_token=os.getenv('TWITTER_ACCESS_TOKEN'),
+                access_token_secret=os.getenv('TWITTER_ACCESS_SECRET'),
+                # Raw responses so the rate governor can read x-rate-limit-* headers
+                return_type=requests.Response
+            )
+        return self._twitter_client
+
+    @property
+    def twitter_auth(self):
+        """OAuth 1.0a auth for the v1.1 media upload endpoint (created on first use)"""
+        if self._twitter_auth is None:
+            import tweepy
+            self._twitter_auth = tweepy.OAuth1UserHandler(
+                os.getenv('TWITTER_API_KEY'), os.getenv('TWITTER_API_SECRET'),
+                os.getenv('TWITTER_ACCESS_TOKEN'), os.getenv('TWITTER_ACCESS_SECRET')
+            ).apply_auth()
+        return self._twitter_auth
+
+    def post_to_twitter(self, content):
+        """Post content to Twitter"""
+        if not self.twitter_client:
+            print("Twitter credentials not configured. Skipping Twitter post.")
+            return False
+
+        import tweepy
+
+        tweets, tweet_ids = [], []
+        try:
+            # Fit Twitter's weighted length (emoji/CJK count double, URLs 23),
+            # or split into a reply thread when TWITTER_THREAD is enabled
+            if self.twitter_thread and weighted_length(content) > MAX_WEIGHTED_LENGTH:
+                tweets = split_thread(content)
+            else:
+                tweets = [fit_tweet(content)]
+
+            # Tweets already sent by an earlier attempt of this outbox delivery
+            # are kept with it, so a retry continues the thread instead of posting it again
+            delivery = current_delivery()
+            tweet_ids = self.outbox.posted_parts(delivery)[:len(tweets)] if delivery else []
+            if tweet_ids:
+                print(f"Resuming Twitter thread: {len(tweet_ids)}/{len(tweets)} tweet(s) already posted")
+
+            # The quote card goes on the first tweet
+            media_ids = None
+            image = None if tweet_ids else self.get_quote_card(content)
+            if image:
+                media_ids = [upload_twitter_media(self.transport, self.twitter_auth,
+                                                  MediaSource.from_bytes(image, 'quote.jpg'),
+                                                  account=self.twitter_account)]
+
+            for text in tweets[len(tweet_ids):]:
+                if not self.rate_governor.acquire('twitter', self.twitter_account):
+                    self._report_partial_thread(tweet_ids, tweets)
+                    return False
+
+                response = self.twitter_client.create_tweet(
+                    text=text,
+                    in_reply_to_tweet_id=tweet_ids[-1] if tweet_ids else None,
+                    media_ids=None if tweet_ids else media_ids
+                )
+                self.rate_governor.observe('twitter', self.twitter_account, response.headers, response.status_code)
+                tweet_ids.append(response.json()['data']['id'])
+                if delivery:
+                    self.outbox.record_part(delivery, len(tweet_ids) - 1, tweet_ids[-1])
+
+            thread_note = f" ({len(tweet_ids)}-tweet thread)" if len(tweet_ids) > 1 else ""
+            print(f"✓ Successfully posted to Twitter! Tweet ID: {tweet_ids[0]}{thread_note}")
+            return True
+        except tweepy.TooManyRequests as e:
+            self.rate_governor.observe('twitter', self.twitter_account, e.response.headers, 429)
+            print(f"Twitter rate limit reached: {e}")
+            self._report_partial_thread(tweet_ids, tweets)
+            return False
+        except Exception as e:
+            print(f"Error posting to Twitter: {e}")
+            self._report_partial_thread(tweet_ids, tweets)
+            return False
+
+    @staticmethod
+    def _report_partial_thread(tweet_ids, tweets):
+        """Log which tweets of an interrupted thread are still missing"""
+        if tweet_ids and len(tweets) > 1:
+            missing = ', '.join(str(number) for number in range(len(tweet_ids) + 1, len(tweets) + 1))
+            print(f"Twitter thread incomplete: tweet(s) {missing} of {len(tweets)} not posted yet "
+                  f"(last posted: {tweet_ids[-1]}); a retry continues from there")
+
+    def post_to_linkedin(self, content, person_id=None):
+        """Post content to LinkedIn as person_id (default: linkedin_person_id)"""
+        access_token = self.linkedin_access_token
+        person_id = person_id or self.linkedin_person_id
+        if not access_token or not person_id:
+            print("LinkedIn credentials not configured (set LINKEDIN_PERSON_ID or run credentials.py --refresh). "
+                  "Skipping LinkedIn post.")
+            return False
+
+        url = "https://api.linkedin.com/v2/ugcPosts"
+
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+            "X-Restli-Protocol-Version": "2.0.0"
+        }
+
+        post_data = {
+            "author": f"urn:li:person:{person_id}",
+            "lifecycleState": "PUBLISHED",
+            "specificContent": {
+                "com.linkedin.ugc.ShareContent": {
+                    "shareCommentary": {
+                        "text": content
+                    },
+                    "shareMediaCategory": "NONE"
+                }
+            },
+            "visibility": {
+                "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
+            }
+        }
+
+        if not self.rate_governor.acquire('linkedin', person_id):
+            return False
+
+        try:
+            image = self.get_quote_card(content)
+            if image:
+                asset = upload_linkedin_media(self.transport, access_token,
+                                              person_id, MediaSource.from_bytes(image, 'quote.jpg'))
+                share = post_data["specificContent"]["com.linkedin.ugc.ShareContent"]
+                share["shareMediaCategory"] = "IMAGE"
+                share["media"] = [{"status": "READY", "media": asset}]
+
+            response = self.transport.post(url, headers=headers, json=post_data)
+            self.rate_governor.observe('linkedin', person_id, response.headers, response.status_code)
+            if response.status_code == 201:
+                print("✓ Successfully posted to LinkedIn!")
+                return True
+            else:
+                print(f"Error posting to LinkedIn: {response.status_code} - {response.text}")
+                return False
+        except Exception as e:
+            print(f"Error posting to LinkedIn: {e}")
+            return False
+
+    def get_publishers(self):
+        """Map each supported platform to its publish method"""
+        return {
+            'twitter': self.post_to_twitter,
+            'linkedin': self.post_to_linkedin
+        }
+
+    def publish_to_target(self, platform, target, content):
+        """Publish to a single outbox delivery target (used by the outbox retrier)"""
+        return self.get_publishers()[platform](content)
+
+
+class FacebookPagesMixin(QuoteCardMixin):
+    """Publishing to one or many Facebook Pages, shared by the Hindi posters.
+
+    Expects transport, rate_governor, credentials, facebook_batch,
+    facebook_access_token and facebook_page_id on the instance.
+    """
+
+    @property
+    def facebook_pages(self):
+        """Every page to publish to, including extra ones from FACEBOOK_PAGES, with current tokens"""
+        return load_facebook_pages(self.credentials)
+
+    def post_to_facebook(self, content, page_id=None):
+        """Post content to Facebook Page, as a photo post when a quote card is rendered"""
+        page_id = page_id or self.facebook_page_id
+        access_token = self.facebook_pages.get(page_id, self.facebook_access_token)
+        if not access_token or not page_id:
+            print("Facebook credentials not configured. Skipping Facebook post.")
+            print("\nTo configure Facebook:")
+            print("1. Go to https://developers.facebook.com/")
+            print("2. Create an app and get Page Access Token")
+            print("3. Add FACEBOOK_ACCESS_TOKEN and FACEBOOK_PAGE_ID to .env file")
+            return False
+
+        image = self.get_quote_card(content)
+        files = None
+        if image:
+            # The card replaces the image suggestion, the rest of the post is the caption
+            url = f"https://graph.facebook.com/v18.0/{page_id}/photos"
+            content = strip_image_suggestion(content)
+            files = {'source': ('quote.jpg', image, 'image/jpeg')}
+        else:
+            url = f"https://graph.facebook.com/v18.0/{page_id}/feed"
+
+        payload = {
+            'message': content,
+            'access_token': access_token
+        }
+
+        if not self.rate_governor.acquire('facebook', page_id):
+            return False
+
+        try:
+            response = self.transport.post(url, data=payload, files=files)
+            self.rate_governor.observe('facebook', page_id, response.headers, response.status_code)
+
+            if response.status_code == 200:
+                result = response.json()
+                print(f"✓ Successfully posted to Facebook! Post ID: {result.get('id')}")
+                return True
+            else:
+                print(f"Error posting to Facebook: {response.status_code}")
+                print(f"Response: {response.text}")
+                return False
+        except Exception as e:
+            print(f"Error posting to Facebook: {e}")
+            return False
+
+    def post_to_facebook_pages(self, content, page_ids):
+        """Post content to several Facebook Pages with Graph API batch requests"""
+        pages = {page_id: self.facebook_pages[page_id] for page_id in page_ids}
+        image = self.get_quote_card(content)
+        if image:
+            content = strip_image_suggestion(content)
+        results = self.facebook_batch.publish(pages, content, image=image)
+
+        published = sum(1 for result in results.values() if result['ok'])
+        print(f"✓ Posted to {published}/{len(pages)} Facebook pages")
+        for page_id, result in results.items():
+            if not result['ok']:
+                print(f"Error posting to Facebook page {page_id}: {result['error']}")
+        return {page_id: result['ok'] for page_id, result in results.items()}
+
+    def get_publishers(self):
+        """Map each supported platform to its publish method"""
+        return {'facebook': self.post_to_facebook}
+
+    def publish_to_target(self, platform, target, content):
+        """Publish to a single outbox delivery target (used by the outbox retrier)"""
+        return self.post_to_facebook(content, page_id=target)
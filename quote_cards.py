@@ -0,0 +1,383 @@
+import functools
+import io
+import os
+import re
+import sys
+import threading
+import time
+
+from dedup_index import extract_quotes
+
+DEFAULT_CARD_SIZE = 1080       # square, the size Facebook/LinkedIn/Twitter show without cropping
+DEFAULT_JPEG_QUALITY = 90
+DEFAULT_WORKERS = 2            # render processes for batches
+MAX_FONT_SIZE = 72
+MIN_FONT_SIZE = 30
+MAX_CACHED_CARDS = 32          # rendered images kept per process
+
+# Fonts with Devanagari and Latin glyphs, tried in order unless CARD_FONT is set
+FONT_SEARCH_PATHS = (
+    '/usr/share/fonts/truetype/noto/NotoSansDevanagari-Regular.ttf',
+    '/usr/share/fonts/opentype/noto/NotoSansDevanagari-Regular.ttf',
+    '/usr/share/fonts/noto/NotoSansDevanagari-Regular.ttf',
+    '/usr/share/fonts/truetype/lohit-devanagari/Lohit-Devanagari.ttf',
+    '/System/Library/Fonts/Supplemental/Devanagari Sangam MN.ttc',
+    'C:\\Windows\\Fonts\\Nirmala.ttf',
+    'C:\\Windows\\Fonts\\mangal.ttf',
+)
+
+# Background templates: (top colour, bottom colour) of the gradient used
+# when CARD_TEMPLATE_DIR has no <name>.jpg/.png for the template
+TEMPLATES = {
+    'sunrise': ((255, 153, 102), (131, 58, 112)),
+    'mountain': ((72, 110, 140), (28, 40, 58)),
+    'sky': ((64, 140, 220), (20, 44, 110)),
+    'books': ((150, 102, 70), (52, 34, 26)),
+    'light': ((246, 196, 84), (170, 88, 30)),
+    'path': ((96, 150, 96), (30, 60, 44)),
+    'default': ((58, 64, 112), (18, 20, 40)),
+}
+
+# Words in the LLM's image suggestion that pick a template (Hindi and English)
+TEMPLATE_KEYWORDS = {
+    'sunrise': ('सूर्योदय', 'सूरज', 'सुबह', 'sunrise', 'sun'),
+    'mountain': ('पहाड़', 'पर्वत', 'हिमालय', 'mountain', 'peak'),
+    'sky': ('आकाश', 'आसमान', 'तारे', 'sky', 'stars'),
+    'books': ('किताब', 'पुस्तक', 'ज्ञान', 'book', 'library'),
+    'light': ('रोशनी', 'प्रकाश', 'दीपक', 'दीया', 'light', 'lamp', 'candle'),
+    'path': ('रास्ता', 'मार्ग', 'सड़क', 'path', 'road', 'journey'),
+}
+
+IMAGE_SUGGESTION = re.compile(r'^.*(?:छवि सुझाव|image suggestion)\s*[:：]?\s*(.*)$', re.IGNORECASE | re.MULTILINE)
+TRANSLATION = re.compile(r'^\W*हिंदी अनुवाद\W*[:：]\s*(.+)$', re.MULTILINE)
+# "- Albert Einstein" or "— Rumi" right after the closing quote mark
+AUTHOR = re.compile(r'[”"»“]\s*[-–—]+\s*([^\n#(]{2,60})')
+
+
+def extract_card(content):
+    """Pick the card text out of a generated quote post.
+
+    Returns {'quote', 'translation', 'author', 'template'}, or None if the
+    post has no quoted passage to put on a card.
+    """
+    quotes = extract_quotes(content)
+    if not quotes:
+        return None
+
+    translation = TRANSLATION.search(content)
+    author = AUTHOR.search(content)
+    suggestion = IMAGE_SUGGESTION.search(content)
+    return {
+        'quote': quotes[0],
+        'translation': translation.group(1).strip().strip('"“”') if translation else None,
+        'author': author.group(1).strip().rstrip('.,;:!') if author else None,
+        'template': choose_template(suggestion.group(1) if suggestion else ''),
+    }
+
+
+def choose_template(suggestion):
+    """Template named by the first keyword found in the image suggestion"""
+    text = suggestion.casefold()
+    for name, keywords in TEMPLATE_KEYWORDS.items():
+        if any(keyword in text for keyword in keywords):
+            return name
+    return 'default'
+
+
+def strip_image_suggestion(content):
+    """Post text without the image suggestion line, once the image itself is attached"""
+    return re.sub(r'\n{3,}', '\n\n', IMAGE_SUGGESTION.sub('', content)).strip()
+
+
+def find_font_path():
+    configured = os.getenv('CARD_FONT')
+    if configured:
+        return configured
+    for path in FONT_SEARCH_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def shaping_available():
+    """True if Pillow can shape complex scripts (libraqm with FriBiDi and HarfBuzz)"""
+    from PIL import features
+    return bool(features.check('raqm'))
+
+
+@functools.lru_cache(maxsize=64)
+def load_font(path, size):
+    """TrueType font, loaded once per path and size in each process"""
+    from PIL import ImageFont
+    layout = ImageFont.Layout.RAQM if shaping_available() else ImageFont.Layout.BASIC
+    return ImageFont.truetype(path, size, layout_engine=layout)
+
+
+@functools.lru_cache(maxsize=16)
+def load_template(name, size, template_dir=None):
+    """Background for a template, built once per process and copied for each card"""
+    from PIL import Image
+
+    for extension in ('jpg', 'png'):
+        path = os.path.join(template_dir, f'{name}.{extension}') if template_dir else None
+        if path and os.path.exists(path):
+            with Image.open(path) as source:
+                background = source.convert('RGB')
+            # Cover the square, cropping the longer side
+            scale = size / min(background.size)
+            background = background.resize((round(background.width * scale), round(background.height * scale)))
+            left, top = (background.width - size) // 2, (background.height - size) // 2
+            background = background.crop((left, top, left + size, top + size))
+            # Darken so white text stays readable on any photo
+            return Image.blend(background, Image.new('RGB', background.size, (0, 0, 0)), 0.45)
+
+    top, bottom = TEMPLATES.get(name, TEMPLATES['default'])
+    # A 1-pixel-wide gradient column, stretched to the full card
+    column = Image.new('RGB', (1, size))
+    column.putdata([
+        tuple(round(top[i] + (bottom[i] - top[i]) * y / (size - 1)) for i in range(3))
+        for y in range(size)
+    ])
+    return column.resize((size, size))
+
+
+def wrap_text(text, font, width):
+    """Split text into lines no wider than width, at spaces"""
+    lines, line = [], ''
+    for word in text.split():
+        candidate = f'{line} {word}' if line else word
+        if line and font.getlength(candidate) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines
+
+
+def render_card(card, size=None, quality=None, font_path=None, template_dir=None):
+    """Render a card dict from extract_card() to JPEG bytes"""
+    from PIL import ImageDraw
+
+    size = int(size or os.getenv('CARD_SIZE', DEFAULT_CARD_SIZE))
+    quality = int(quality or os.getenv('CARD_JPEG_QUALITY', DEFAULT_JPEG_QUALITY))
+    font_path = font_path or find_font_path()
+    if not font_path:
+        raise RuntimeError("No font with Devanagari glyphs found. Set CARD_FONT to a .ttf file.")
+    template_dir = template_dir or os.getenv('CARD_TEMPLATE_DIR') or None
+
+    image = load_template(card.get('template') or 'default', size, template_dir).copy()
+    draw = ImageDraw.Draw(image)
+    margin = size // 10
+    width = size - 2 * margin
+
+    # The translation is the headline when there is one; the original goes below it
+    headline = card.get('translation') or card['quote']
+    secondary = card['quote'] if card.get('translation') else None
+    author = f"— {card['author']}" if card.get('author') else None
+
+    # Largest font size at which everything fits in the middle of the card
+    for font_size in range(MAX_FONT_SIZE, MIN_FONT_SIZE - 1, -6):
+        font = load_font(font_path, font_size)
+        small = load_font(font_path, max(MIN_FONT_SIZE - 6, font_size * 3 // 5))
+        blocks = [(wrap_text(f'“{headline}”', font, width), font)]
+        if secondary:
+            blocks.append((wrap_text(f'“{secondary}”', small, width), small))
+        if author:
+            blocks.append(([author], small))
+        height = sum(len(lines) * block_font.size * 1.4 for lines, block_font in blocks) + (len(blocks) - 1) * font_size
+        if height <= size - 2 * margin:
+            break
+
+    y = (size - height) / 2
+    for lines, block_font in blocks:
+        for line in lines:
+            line_width = block_font.getlength(line)
+            draw.text(((size - line_width) / 2, y), line, font=block_font, fill=(255, 255, 255))
+            y += block_font.size * 1.4
+        y += font_size
+
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=quality)
+    return output.getvalue()
+
+
+def _warm_worker(font_path, size, template_dir):
+    """Pool initializer: load fonts and templates once per worker process"""
+    for font_size in range(MAX_FONT_SIZE, MIN_FONT_SIZE - 1, -6):
+        load_font(font_path, font_size)
+    for name in TEMPLATES:
+        load_template(name, size, template_dir)
+
+
+class CardRenderer:
+    """Renders quote cards in-process, or batches of them in a process pool.
+
+    Fonts and backgrounds are cached in each process, so only the first card
+    pays for loading them. Rendered images are also kept by card text:
+    every platform and page publishing the same quote reuses one render,
+    and an outbox retry of the same post doesn't render it again.
+    """
+
+    def __init__(self, size=None, workers=None, font_path=None, template_dir=None):
+        self.size = int(size or os.getenv('CARD_SIZE', DEFAULT_CARD_SIZE))
+        self.workers = int(workers or os.getenv('CARD_WORKERS', DEFAULT_WORKERS))
+        self.font_path = font_path or find_font_path()
+        self.template_dir = template_dir or os.getenv('CARD_TEMPLATE_DIR') or None
+
+        self._rendered = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        self._warned = False
+
+    def _key(self, card):
+        return (card['quote'], card.get('translation'), card.get('author'), card.get('template'))
+
+    def _check_shaping(self, cards):
+        if self._warned or shaping_available():
+            return
+        if any(re.search('[\u0900-\u097F]', card.get('translation') or card['quote']) for card in cards):
+            self._warned = True
+            print("[cards] Pillow has no libraqm support: Devanagari conjuncts and matras won't be shaped. "
+                  "Install FriBiDi (libfribidi0 / fribidi.dll) next to Pillow's bundled libraqm.")
+
+    def render(self, card):
+        """JPEG bytes for one card, rendered in this process"""
+        key = self._key(card)
+        with self._lock:
+            image = self._rendered.get(key)
+        if image is None:
+            self._check_shaping([card])
+            image = render_card(card, self.size, font_path=self.font_path, template_dir=self.template_dir)
+            self._remember(key, image)
+        return image
+
+    def render_many(self, cards):
+        """JPEG bytes for each card, in order, spread over the process pool"""
+        keys = [self._key(card) for card in cards]
+        with self._lock:
+            images = {key: self._rendered[key] for key in keys if key in self._rendered}
+        missing = list({key: card for card, key in zip(cards, keys) if key not in images}.values())
+        if len(missing) > 1 and self.workers > 1:
+            self._check_shaping(missing)
+            rendered = self._pool().map(functools.partial(render_card, size=self.size, font_path=self.font_path,
+                                                          template_dir=self.template_dir), missing)
+        else:
+            rendered = [self.render(card) for card in missing]
+        for card, image in zip(missing, rendered):
+            images[self._key(card)] = image
+            self._remember(self._key(card), image)
+        return [images[key] for key in keys]
+
+    def card_for_post(self, content):
+        """Card image for a generated post, or None if it has no quote or rendering fails"""
+        card = extract_card(content)
+        if card is None:
+            return None
+        try:
+            return self.render(card)
+        except Exception as e:
+            print(f"[cards] Could not render quote card: {e}")
+            return None
+
+    def cards_for_posts(self, contents):
+        """Card image (or None) for each post, rendered as one batch with render_many.
+
+        If the batch fails, each card is rendered on its own so one bad card
+        only costs its own post its image.
+        """
+        cards = [extract_card(content) for content in contents]
+        try:
+            images = iter(self.render_many([card for card in cards if card]))
+        except Exception as e:
+            print(f"[cards] Could not render quote cards as a batch: {e}")
+            # A crashed worker breaks the pool; the next batch starts a new one
+            self.close()
+            return [self.card_for_post(content) for content in contents]
+        return [next(images) if card else None for card in cards]
+
+    def _remember(self, key, image):
+        with self._lock:
+            if len(self._rendered) >= MAX_CACHED_CARDS:
+                self._rendered.pop(next(iter(self._rendered)))
+            self._rendered[key] = image
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # Imported here so posts without cards never start a pool
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_warm_worker,
+                    initargs=(self.font_path, self.size, self.template_dir)
+                )
+            return self._executor
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def cards_enabled():
+    return os.getenv('QUOTE_CARDS', 'false').lower() == 'true'
+
+
+_default_renderer = None
+_default_renderer_lock = threading.Lock()
+
+
+def get_default_card_renderer():
+    """Return the process-wide card renderer"""
+    global _default_renderer
+    with _default_renderer_lock:
+        if _default_renderer is None:
+            _default_renderer = CardRenderer()
+        return _default_renderer
+
+
+SAMPLE_POST = """आज का विचार ✨
+
+"The only way to do great work is to love what you do." - Steve Jobs
+
+हिंदी अनुवाद: "महान कार्य करने का एकमात्र तरीका है कि आप जो करते हैं उससे प्यार करें।"
+
+📸 छवि सुझाव: सूर्योदय के समय पहाड़ की चोटी
+
+#Motivation #प्रेरणा"""
+
+
+if __name__ == "__main__":
+    # python quote_cards.py [--count N] [--workers N] [--out DIR]: render sample cards and time them
+    def option(name, default):
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+    count = int(option('--count', 20))
+    out_dir = option('--out', None)
+    renderer = CardRenderer(workers=int(option('--workers', DEFAULT_WORKERS)))
+    print(f"Font: {renderer.font_path} (complex script shaping: {'yes' if shaping_available() else 'no'})")
+
+    card = extract_card(SAMPLE_POST)
+    started = time.perf_counter()
+    first = renderer.render(card)
+    print(f"First card (loads font and template): {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    templates = list(TEMPLATES)
+    cards = [dict(card, template=templates[i % len(templates)], author=f"{card['author']} #{i}")
+             for i in range(count)]
+    started = time.perf_counter()
+    images = renderer.render_many(cards)
+    elapsed = time.perf_counter() - started
+    renderer.close()
+    print(f"{count} cards on {renderer.workers} worker(s): {elapsed:.2f}s "
+          f"({elapsed / count * 1000:.0f} ms/card, {sum(map(len, images)) / count / 1024:.0f} KiB/card)")
+
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        for i, image in enumerate([first] + images):
+            with open(os.path.join(out_dir, f'card_{i:02d}.jpg'), 'wb') as handle:
+                handle.write(image)
+        print(f"Wrote {count + 1} cards to {out_dir}")
@@ -0,0 +1,213 @@
+import json
+import os
+import threading
+import time
+
+from metrics import get_default_metrics
+
+# Default quotas per platform as (requests, window in seconds). These are
+# only starting points; real limits are learned from response headers.
+DEFAULT_QUOTAS = {
+    'twitter': (50, 24 * 3600),
+    'linkedin': (150, 24 * 3600),
+    'facebook': (200, 3600),
+}
+FALLBACK_QUOTA = (60, 3600)
+
+DEFAULT_MAX_WAIT = 60           # longest a live publish will wait for a token
+DEFAULT_429_BACKOFF = 15 * 60   # pause after a 429 without Retry-After
+USAGE_SLOWDOWN_PERCENT = 80     # Facebook usage level where we start spacing calls
+
+
+class TokenBucket:
+    """Classic token bucket that can also be blocked until a reset time"""
+
+    def __init__(self, capacity, window):
+        self.capacity = float(capacity)
+        self.refill_rate = self.capacity / window
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def wait_time(self, now=None):
+        """Seconds until one token is available"""
+        now = now or time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.blocked_until:
+            # The platform's window has reset: at least one request is allowed
+            self.blocked_until = 0.0
+            self.tokens = max(self.tokens, 1.0)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.refill_rate
+
+    def take(self):
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def set_remaining(self, limit, remaining, reset_in):
+        """Resynchronise with a quota reported by the platform"""
+        if limit:
+            self.capacity = float(limit)
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, float(remaining))
+        if remaining <= 0 and reset_in:
+            self.block_for(reset_in)
+
+    def block_for(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RateGovernor:
+    """Token bucket per (platform, account) that learns from rate-limit headers.
+
+    Publishers call acquire() before each request and observe() with the
+    response afterwards. The outbox retrier asks delay_for() so deliveries
+    that would only earn a 429 are deferred while others go ahead.
+    """
+
+    def __init__(self, max_wait=None, quotas=None):
+        self.max_wait = float(max_wait or os.getenv('RATE_LIMIT_MAX_WAIT', DEFAULT_MAX_WAIT))
+        # Starting (requests, window) per platform before any headers are seen
+        self.quotas = dict(DEFAULT_QUOTAS, **(quotas or {}))
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, platform, account):
+        key = (platform, str(account or 'default'))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            capacity, window = self.quotas.get(platform, FALLBACK_QUOTA)
+            bucket = TokenBucket(capacity, window)
+            self._buckets[key] = bucket
+        return bucket
+
+    def delay_for(self, platform, account=None):
+        """Seconds before a request for this platform/account would be allowed"""
+        with self._lock:
+            return self._bucket(platform, account).wait_time()
+
+    def acquire(self, platform, account=None, max_wait=None):
+        """Take a token, waiting up to max_wait seconds. Returns False if throttled."""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                bucket = self._bucket(platform, account)
+                wait = bucket.wait_time()
+                if wait == 0:
+                    bucket.take()
+                    return True
+            if time.monotonic() + wait > deadline:
+                print(f"[rate] {platform} is rate limited for another {wait:.0f}s. Deferring.")
+                return False
+            print(f"[rate] Waiting {wait:.1f}s for {platform} quota...")
+            time.sleep(wait)
+
+    def observe(self, platform, account, headers, status_code=None):
+        """Learn the current quota from a response's headers and status"""
+        # Every platform response passes through here, so it's also where
+        # HTTP statuses are counted
+        if status_code is not None:
+            get_default_metrics().http_responses.inc(platform=platform, status=status_code)
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        with self._lock:
+            bucket = self._bucket(platform, account)
+
+            if platform == 'twitter':
+                self._observe_twitter(bucket, headers)
+            elif platform == 'facebook':
+                self._observe_facebook(bucket, headers)
+            else:
+                self._observe_generic(bucket, headers)
+
+            if status_code == 429:
+                retry_after = _to_float(headers.get('retry-after'))
+                bucket.block_for(retry_after or DEFAULT_429_BACKOFF)
+
+    @staticmethod
+    def _observe_twitter(bucket, headers):
+        # Per-endpoint window plus the separate 24-hour tweet cap
+        for prefix in ('x-rate-limit', 'x-user-limit-24hour', 'x-app-limit-24hour'):
+            remaining = _to_float(headers.get(f'{prefix}-remaining'))
+            reset = _to_float(headers.get(f'{prefix}-reset'))
+            if remaining is None or reset is None:
+                continue
+            limit = _to_float(headers.get(f'{prefix}-limit'))
+            reset_in = max(0.0, reset - time.time())
+            if remaining <= 0 or remaining < bucket.tokens:
+                bucket.set_remaining(limit, remaining, reset_in)
+
+    @staticmethod
+    def _observe_facebook(bucket, headers):
+        # X-App-Usage / X-Page-Usage report percentages of the hourly quota
+        usage_percent = 0.0
+        for name in ('x-app-usage', 'x-page-usage', 'x-ad-account-usage'):
+            usage = _parse_json(headers.get(name))
+            if usage:
+                usage_percent = max([usage_percent] + [
+                    float(value) for value in usage.values() if isinstance(value, (int, float))
+                ])
+
+        regain_minutes = 0
+        business_usage = _parse_json(headers.get('x-business-use-case-usage')) or {}
+        for entries in business_usage.values():
+            for entry in entries if isinstance(entries, list) else []:
+                usage_percent = max(usage_percent, float(entry.get('call_count', 0)),
+                                    float(entry.get('total_time', 0)), float(entry.get('total_cputime', 0)))
+                regain_minutes = max(regain_minutes, entry.get('estimated_time_to_regain_access', 0))
+
+        if usage_percent >= 100:
+            bucket.block_for(regain_minutes * 60 if regain_minutes else 3600)
+        elif usage_percent >= USAGE_SLOWDOWN_PERCENT:
+            # Close to the limit: only let the unused fraction through this hour
+            remaining = max(1.0, bucket.capacity * (100 - usage_percent) / 100)
+            bucket.set_remaining(None, min(bucket.tokens, remaining), 3600)
+
+    @staticmethod
+    def _observe_generic(bucket, headers):
+        # LinkedIn and others: standard X-RateLimit-* headers when present
+        remaining = _to_float(headers.get('x-ratelimit-remaining'))
+        if remaining is None:
+            return
+        limit = _to_float(headers.get('x-ratelimit-limit'))
+        reset_in = _to_float(headers.get('x-ratelimit-reset')) or 3600
+        if reset_in > 10 ** 9:
+            # Epoch timestamp rather than seconds remaining
+            reset_in = max(0.0, reset_in - time.time())
+        bucket.set_remaining(limit, remaining, reset_in)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_json(value):
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        return None
+
+
+_default_governor = None
+_default_governor_lock = threading.Lock()
+
+
+def get_default_governor():
+    """Return the process-wide rate governor"""
+    global _default_governor
+    with _default_governor_lock:
+        if _default_governor is None:
+            _default_governor = RateGovernor()
+        return _default_governor
@@ -0,0 +1,4 @@
+@echo off
+cd /d C:\Users\Rakesh_Kumar42\.windsurf\daily_news_poster
+call venv\Scripts\activate.bat
+python scheduler_daemon.py
@@ -0,0 +1,206 @@
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from http_transport import HttpTransport
+from outbox import OutboxRetrier, get_default_outbox, slot_key
+from rate_governor import get_default_governor
+from dedup_index import get_default_dedup_index
+from credentials import get_default_credentials
+from prefetch_queue import DEFAULT_PREFETCH_SCHEDULE, Prefetcher, get_default_prefetch_queue
+from bulk_scheduler import BulkScheduler
+from cron_schedule import CronSchedule
+from metrics import start_metrics_server
+from feed_catalog import catalog_jobs
+
+
+def load_jobs():
+    """Every job as (name, poster_class, run_args, default schedule): built-in posters and catalog feeds.
+
+    The built-in posters are declared in posters.yaml, other feeds in
+    feeds.yaml (or FEED_CATALOG). Both are read and validated here, so this
+    is called at startup rather than on import. SCHEDULE_<JOB_NAME> in .env
+    overrides a job's schedule, e.g. SCHEDULE_TECH_NEWS="30 8 * * 1-5".
+    """
+    return catalog_jobs()
+
+
+class ScheduledJob:
+    """A poster instance kept warm in memory together with its schedule"""
+
+    def __init__(self, name, poster, run_args, schedule):
+        self.name = name
+        self.poster = poster
+        self.run_args = run_args
+        self.schedule = schedule
+        self._lock = threading.Lock()
+
+    def fire(self, moment=None):
+        """Run the poster in a worker thread unless a previous run is still busy.
+
+        moment is the scheduled fire time; it becomes the run's outbox slot,
+        so each firing of a job that runs several times a day publishes its
+        own post. Without it (run_job) the outbox falls back to today's date.
+        """
+        if not self._lock.acquire(blocking=False):
+            print(f"[{self.name}] Previous run still in progress. Skipping this slot.")
+            return None
+
+        thread = threading.Thread(target=self._run, args=(moment,), name=f"job-{self.name}", daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self, moment=None):
+        try:
+            print(f"\n[{self.name}] Starting scheduled run at {moment or datetime.now():%Y-%m-%d %H:%M}")
+            if moment:
+                self.poster.run(*self.run_args, slot=slot_key(moment))
+            else:
+                self.poster.run(*self.run_args)
+        except Exception as e:
+            print(f"[{self.name}] Error during scheduled run: {e}")
+        finally:
+            self._lock.release()
+
+
+class SchedulerDaemon:
+    """Hosts every poster in one long-running process and fires them on schedule"""
+
+    def __init__(self, jobs=None):
+        # One pooled transport shared by every poster
+        self.transport = HttpTransport()
+        self.outbox = get_default_outbox()
+        self.rate_governor = get_default_governor()
+        self.dedup_index = get_default_dedup_index()
+        self.credentials = get_default_credentials()
+        self.prefetch_queue = get_default_prefetch_queue()
+        self.jobs = []
+        for name, poster_class, run_args, default_schedule in (load_jobs() if jobs is None else jobs):
+            expression = os.getenv(f"SCHEDULE_{name.upper()}", default_schedule)
+            if expression.strip().lower() == 'off':
+                print(f"[{name}] Disabled via SCHEDULE_{name.upper()}=off")
+                continue
+
+            schedule = CronSchedule(expression)
+            # Constructed once so the OpenAI/Twitter clients and their
+            # connection pools are reused by every scheduled run
+            poster = poster_class(transport=self.transport, outbox=self.outbox,
+                                 rate_governor=self.rate_governor, dedup_index=self.dedup_index,
+                                 credentials=self.credentials, prefetch_queue=self.prefetch_queue)
+            self.jobs.append(ScheduledJob(name, poster, run_args, schedule))
+
+        # Off-peak generation of the next PREFETCH_SLOTS slots of every job
+        self.prefetcher = Prefetcher(
+            [(job.name, type(job.poster), job.run_args, job.schedule) for job in self.jobs], self.prefetch_queue,
+            transport=self.transport, outbox=self.outbox, rate_governor=self.rate_governor,
+            dedup_index=self.dedup_index, credentials=self.credentials
+        )
+        # Posts handed to Facebook's own scheduler by bulk_scheduler.py are checked hourly
+        self.bulk_scheduler = BulkScheduler(
+            [(job.name, type(job.poster), job.run_args, job.schedule) for job in self.jobs],
+            queue=self.prefetch_queue, transport=self.transport, outbox=self.outbox,
+            rate_governor=self.rate_governor, dedup_index=self.dedup_index, credentials=self.credentials
+        )
+        self.reconcile_job = ScheduledJob('reconcile', SimpleNamespace(run=self.bulk_scheduler.reconcile), (),
+                                          CronSchedule(os.getenv('BULK_RECONCILE_SCHEDULE', '15 * * * *')))
+        self.prefetch_job = None
+        if self.prefetcher.slots:
+            self.prefetch_job = ScheduledJob('prefetch', self.prefetcher, (),
+                                             CronSchedule(os.getenv('PREFETCH_SCHEDULE', DEFAULT_PREFETCH_SCHEDULE)))
+
+        # Failed deliveries are re-sent in the background with backoff
+        resolvers = {job.poster.POSTER_NAME: job.poster.publish_to_target for job in self.jobs}
+        self.retrier = OutboxRetrier(self.outbox, resolvers,
+                                     interval=float(os.getenv('OUTBOX_RETRY_INTERVAL', 30)),
+                                     rate_governor=self.rate_governor)
+
+    def print_schedule(self):
+        now = datetime.now()
+        print(f"{'Job':<22}{'Schedule':<18}Next run")
+        print("-" * 60)
+        for job in self.jobs:
+            next_run = job.schedule.next_run(now)
+            next_text = f"{next_run:%Y-%m-%d %H:%M}" if next_run else "never"
+            print(f"{job.name:<22}{job.schedule.expression:<18}{next_text}")
+        if self.prefetch_job:
+            next_run = self.prefetch_job.schedule.next_run(now)
+            print(f"{'(prefetch)':<22}{self.prefetch_job.schedule.expression:<18}{next_run:%Y-%m-%d %H:%M} "
+                  f"- next {self.prefetcher.slots} slot(s)")
+
+    def run_job(self, name):
+        """Run a single job immediately and wait for it to finish"""
+        for job in self.jobs:
+            if job.name == name:
+                thread = job.fire()
+                if thread:
+                    thread.join()
+                return True
+        print(f"Unknown job '{name}'. Available: {', '.join(job.name for job in self.jobs)}")
+        return False
+
+    def run_forever(self):
+        print(f"🕒 Scheduler daemon started with {len(self.jobs)} job(s)")
+        self.print_schedule()
+        self.retrier.start()
+        # Page and LinkedIn tokens are renewed well before they expire
+        self.credentials.start()
+        # Optional /metrics endpoint for Prometheus (METRICS_PORT)
+        metrics_server = start_metrics_server()
+
+        last_tick = datetime.now().replace(second=0, microsecond=0)
+        try:
+            while True:
+                # Sleep until the start of the next minute
+                now = datetime.now()
+                next_tick = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+                time.sleep(max(0.0, (next_tick - now).total_seconds()))
+
+                # Catch up on any minutes skipped while the machine was asleep
+                current = datetime.now().replace(second=0, microsecond=0)
+                moment = last_tick + timedelta(minutes=1)
+                while moment <= current:
+                    for job in self.jobs:
+                        if job.schedule.matches(moment):
+                            job.fire(moment)
+                    for job in [self.reconcile_job] + ([self.prefetch_job] if self.prefetch_job else []):
+                        if job.schedule.matches(moment):
+                            job.fire()
+                    moment += timedelta(minutes=1)
+                last_tick = current
+        except KeyboardInterrupt:
+            self.retrier.stop()
+            self.credentials.stop()
+            if metrics_server:
+                metrics_server.shutdown()
+            print("\nScheduler daemon stopped.")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    try:
+        jobs = load_jobs()
+    except (OSError, ValueError) as e:
+        print(f"Invalid feed catalog: {e}")
+        sys.exit(1)
+    daemon = SchedulerDaemon(jobs)
+
+    if len(sys.argv) > 1 and sys.argv[1] == '--list':
+        daemon.print_schedule()
+    elif len(sys.argv) > 2 and sys.argv[1] == '--run':
+        sys.exit(0 if daemon.run_job(sys.argv[2]) else 1)
+    elif len(sys.argv) > 1 and sys.argv[1] == '--prefetch':
+        daemon.prefetcher.slots = int(sys.argv[2]) if len(sys.argv) > 2 else daemon.prefetcher.slots or 1
+        daemon.prefetcher.run()
+    elif len(sys.argv) > 1 and sys.argv[1] == '--retry':
+        attempted = daemon.retrier.run_once()
+        print(f"Retried {attempted} pending deliver{'y' if attempted == 1 else 'ies'}.")
+    elif len(sys.argv) > 1:
+        print("Usage: python scheduler_daemon.py [--list | --run <job_name> | --retry | --prefetch [N]]")
+        sys.exit(1)
+    else:
+        daemon.run_forever()
@@ -0,0 +1,112 @@
+import glob
+import os
+import re
+import subprocess
+import sys
+import time
+
+# Import-time budget per entry point, in milliseconds
+DEFAULT_BUDGET_MS = 250
+DEFAULT_RUNS = 5
+
+# Modules that must not be imported just by loading a poster module
+HEAVY_MODULES = ('openai', 'tweepy', 'requests', 'tiktoken')
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def find_entry_points():
+    """Module names launched by the run_*.bat files"""
+    modules = []
+    for bat_file in sorted(glob.glob(os.path.join(BASE_DIR, 'run_*.bat'))):
+        with open(bat_file) as handle:
+            for line in handle:
+                match = re.search(r'python\s+(\S+)\.py', line)
+                if match and match.group(1) not in modules:
+                    modules.append(match.group(1))
+    return modules
+
+
+def measure(module):
+    """Import a module in a fresh interpreter and parse -X importtime output"""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=BASE_DIR
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'
+        return {'module': module, 'error': error}
+
+    imports = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, _indent, name = match.groups()
+            imports[name] = (int(self_us), int(cumulative_us))
+
+    return {
+        'module': module,
+        'import_ms': imports.get(module, (0, 0))[1] / 1000,
+        'wall_ms': wall_ms,
+        'heavy': sorted(name for name in imports if name in HEAVY_MODULES),
+        'slowest': sorted(imports.items(), key=lambda item: item[1][0], reverse=True)[:5],
+    }
+
+
+def run_benchmark(modules, runs, budget_ms):
+    """Measure every module, keep the best of several runs, and check the budget"""
+    results = []
+    for module in modules:
+        samples = [measure(module) for _ in range(runs)]
+        failed = [sample for sample in samples if 'error' in sample]
+        if failed:
+            results.append(failed[0])
+            continue
+        results.append(min(samples, key=lambda sample: sample['import_ms']))
+
+    print(f"{'Entry point':<30}{'Import (ms)':>12}{'Wall (ms)':>12}  Status")
+    print("-" * 80)
+    all_ok = True
+    for result in results:
+        if 'error' in result:
+            print(f"{result['module']:<30}{'-':>12}{'-':>12}  ERROR: {result['error']}")
+            all_ok = False
+            continue
+
+        problems = []
+        if result['import_ms'] > budget_ms:
+            problems.append(f"over {budget_ms}ms budget")
+        if result['heavy']:
+            problems.append(f"eagerly imports {', '.join(result['heavy'])}")
+        all_ok = all_ok and not problems
+
+        status = "OK" if not problems else "FAIL: " + "; ".join(problems)
+        print(f"{result['module']:<30}{result['import_ms']:>12.1f}{result['wall_ms']:>12.1f}  {status}")
+        if problems:
+            for name, (self_us, _cumulative_us) in result['slowest']:
+                print(f"    {name:<40}{self_us / 1000:>8.1f} ms self")
+    return all_ok
+
+
+if __name__ == "__main__":
+    budget_ms = float(os.getenv('STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS))
+    runs = DEFAULT_RUNS
+    modules = []
+
+    # Usage: python startup_benchmark.py [module ...] [--budget-ms N] [--runs N]
+    args = iter(sys.argv[1:])
+    for arg in args:
+        if arg == '--budget-ms':
+            budget_ms = float(next(args))
+        elif arg == '--runs':
+            runs = int(next(args))
+        else:
+            modules.append(arg)
+    modules = modules or find_entry_points()
+
+    print(f"Cold-start import benchmark ({runs} runs each, budget {budget_ms:g} ms)\n")
+    sys.exit(0 if run_benchmark(modules, runs, budget_ms) else 1)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The modules live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FIXTURE_FEEDS = os.path.join(ROOT, 'fixtures', 'feeds')
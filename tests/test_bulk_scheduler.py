@@ -0,0 +1,148 @@
+import json
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs
+
+import pytest
+
+from bulk_scheduler import MISSING, MISSING_AFTER, PUBLISHED, BulkScheduler, ScheduledPostStore
+from cron_schedule import CronSchedule
+from facebook_batch import FacebookBatchPublisher
+from outbox import PENDING, Outbox
+from prefetch_queue import PrefetchQueue
+
+PAGES = {'p1': 'token1', 'p2': 'token2', 'p3': 'token3'}
+NOW = datetime(2026, 10, 18, 10, 0)
+SLOT = datetime(2026, 10, 19, 9, 0)
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+        self.headers = {}
+
+    def json(self):
+        return self.payload
+
+
+class FakeGraph:
+    """Graph API stand-in: p3 rejects every post, the others keep theirs as scheduled posts"""
+
+    def __init__(self):
+        self.posts = {}
+        self.batches = []
+
+    def post(self, url, data=None, files=None):
+        operations = json.loads(data['batch'])
+        self.batches.append(operations)
+        items = []
+        for operation in operations:
+            page_id = operation['relative_url'].split('/')[0]
+            if page_id == 'p3':
+                error = {'error': {'code': 200, 'message': 'Permissions error'}}
+                items.append({'code': 403, 'headers': [], 'body': json.dumps(error)})
+                continue
+            post_id = f"{page_id}_{len(self.posts) + 1}"
+            self.posts[post_id] = {'is_published': False, **parse_qs(operation['body'])}
+            items.append({'code': 200, 'headers': [], 'body': json.dumps({'id': post_id})})
+        return FakeResponse(items)
+
+    def get(self, url, params=None):
+        post = self.posts.get(url.rsplit('/', 1)[1])
+        if post is None:
+            return FakeResponse({'error': {'code': 100, 'message': 'Object does not exist'}}, 400)
+        return FakeResponse({'is_published': post['is_published']})
+
+
+class FakeDedupIndex:
+    def __init__(self):
+        self.added = []
+
+    def add(self, poster, text, slot=None):
+        self.added.append((poster, text, slot))
+
+
+class FakePoster:
+    POSTER_NAME = 'quotes'
+    PREFETCH_FRESHNESS_HOURS = 48
+
+    def __init__(self, graph, outbox, force_regenerate=False, prefetch_queue=None):
+        self.transport = graph
+        self.outbox = outbox
+        self.facebook_pages = dict(PAGES)
+        self.facebook_batch = FacebookBatchPublisher(graph)
+        self.dedup_index = FakeDedupIndex()
+
+    def generate_content(self, now=None, slot=None):
+        return f"Quote for {now:%A}"
+
+    def get_quote_cards(self, texts):
+        return [None] * len(texts)
+
+    def post_to_facebook_pages(self, content):
+        raise AssertionError("scheduled posts are not published live")
+
+
+@pytest.fixture
+def graph():
+    return FakeGraph()
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(path=str(tmp_path / 'outbox.db'))
+
+
+@pytest.fixture
+def scheduler(tmp_path, graph, outbox):
+    jobs = [('quotes', FakePoster, (), CronSchedule('0 9 * * *'))]
+    return BulkScheduler(jobs, store=ScheduledPostStore(path=str(tmp_path / 'scheduled.db')),
+                         queue=PrefetchQueue(path=str(tmp_path / 'prefetch.db')), graph=graph, outbox=outbox)
+
+
+def deliveries(outbox):
+    return {(platform, target): state for _poster, _slot, platform, target, state, _attempts, _error
+            in outbox.summary()}
+
+
+def test_run_schedules_accepted_pages_and_queues_the_rest(scheduler, graph, outbox):
+    assert scheduler.run(days=1, now=NOW) == 2
+
+    [operations] = graph.batches
+    assert {parse_qs(op['body'])['scheduled_publish_time'][0] for op in operations} == {str(int(SLOT.timestamp()))}
+    # Facebook owns the accepted pages; the rejected one is left for the slot's own run
+    assert deliveries(outbox) == {('facebook', 'p1'): PUBLISHED, ('facebook', 'p2'): PUBLISHED}
+    assert scheduler.store.scheduled_targets('quotes', 'facebook', SLOT) == {'p1', 'p2'}
+    assert scheduler.prefetcher.queue.has('quotes', (), SLOT)
+    poster = scheduler.prefetcher.poster(FakePoster)
+    assert poster.dedup_index.added == [('quotes', 'Quote for Monday', '2026-10-19T09:00')]
+
+    # A second pass only retries the rejected page
+    assert scheduler.run(days=1, now=NOW) == 0
+    assert [op['relative_url'].split('/')[0] for op in graph.batches[1]] == ['p3']
+
+
+def test_reconcile_resends_posts_facebook_did_not_publish(scheduler, graph, outbox):
+    scheduler.run(days=1, now=NOW)
+    p1_post, p2_post = sorted(graph.posts)
+    graph.posts[p1_post]['is_published'] = True
+
+    # Too soon after the slot to give up on the unpublished one
+    assert scheduler.reconcile(now=SLOT.timestamp() + 3600) == {PUBLISHED: 1}
+    assert deliveries(outbox) == {('facebook', 'p1'): PUBLISHED, ('facebook', 'p2'): PUBLISHED}
+
+    # Deleted from the page's scheduled posts
+    del graph.posts[p2_post]
+    assert scheduler.reconcile(now=SLOT.timestamp() + MISSING_AFTER + 60) == {MISSING: 1}
+    # Failed in the outbox, so its retrier publishes the post live
+    assert deliveries(outbox) == {('facebook', 'p1'): PUBLISHED, ('facebook', 'p2'): PENDING}
+    assert scheduler.reconcile(now=SLOT.timestamp() + MISSING_AFTER + 120) == {}
+
+
+def test_reconcile_marks_long_unpublished_posts_missing(scheduler, graph, outbox):
+    scheduler.run(days=1, now=NOW)
+
+    late = SLOT + timedelta(seconds=MISSING_AFTER + 60)
+    assert scheduler.reconcile(now=late.timestamp()) == {MISSING: 2}
+    assert deliveries(outbox) == {('facebook', 'p1'): PENDING, ('facebook', 'p2'): PENDING}
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import pytest
+
+from content_generator import ContentGenerator, find_sentence_cutoff
+from generation_cache import GenerationCache
+from hedging import HedgePolicy
+from model_router import ModelRouter
+
+
+@pytest.mark.parametrize('text, budget, expected', [
+    ('Short enough.', 280, 'Short enough.'),
+    ('First sentence. Second one is cut', 30, 'First sentence.'),
+    ('पहला वाक्य। दूसरा वाक्य अधूरा', 25, 'पहला वाक्य।'),
+    # No sentence boundary: the last whole word
+    ('no boundary at all in this unfinished te', 39, 'no boundary at all in this unfinished'),
+    ('Supercalifragilistic', 10, 'Supercalif'),
+    # A line break at the very start is not a place to cut
+    ('\nHello wor', 9, '\nHello'),
+    ('x', 0, ''),
+])
+def test_find_sentence_cutoff(text, budget, expected):
+    assert find_sentence_cutoff(text, budget) == expected
+
+
+class FakeClient:
+    def __init__(self, content, finish_reason):
+        self.content = content
+        self.finish_reason = finish_reason
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **request):
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=self.finish_reason)],
+                               usage=SimpleNamespace(prompt_tokens=50, completion_tokens=100))
+
+
+@pytest.fixture
+def generator(tmp_path):
+    return ContentGenerator('tech_news', None, cache=GenerationCache(path=str(tmp_path / 'cache.db')),
+                            hedge_policy=HedgePolicy(enabled=False), router=ModelRouter(routes={}, fallbacks={}))
+
+
+def create(generator, content, finish_reason='length', char_budget=280):
+    messages = [{'role': 'user', 'content': 'Write a post.'}]
+    client = FakeClient(content, finish_reason)
+    text, _usage = generator._create(lambda: client, messages, 'gpt-4', 100, 0.7, char_budget)
+    return text
+
+
+@pytest.mark.parametrize('content, expected', [
+    ('AI tools ship weekly. Teams that adopt them ear', 'AI tools ship weekly.'),
+    ('AI tools ship weekly and teams that adopt them ear', 'AI tools ship weekly and teams that adopt them'),
+    # Cutting at the first character would leave nothing: the text is kept
+    ('x', 'x'),
+    ('  Trailing space is stripped first. Then cut  ', 'Trailing space is stripped first.'),
+])
+def test_truncated_completion_ends_on_a_full_sentence(generator, content, expected):
+    assert create(generator, content) == expected
+
+
+def test_finished_completion_is_not_cut(generator):
+    assert create(generator, 'Done. And more', finish_reason='stop') == 'Done. And more'
+    assert create(generator, 'Done. And more', char_budget=None) == 'Done. And more'
@@ -0,0 +1,51 @@
+import pytest
+
+from credentials import CredentialService
+
+
+class FakeResponse:
+    status_code = 200
+    text = ''
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class FakeTransport:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(url)
+        return FakeResponse({'sub': 'abc123'})
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    for name in ('LINKEDIN_PERSON_ID', 'LINKEDIN_REFRESH_TOKEN', 'FACEBOOK_APP_ID', 'FACEBOOK_APP_SECRET'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('LINKEDIN_ACCESS_TOKEN', 'token')
+    return CredentialService(transport=FakeTransport(), path=str(tmp_path / 'credentials.db'))
+
+
+def test_person_id_lookup_at_post_time_is_cache_only(service):
+    assert service.linkedin_person_id() is None
+    assert service.transport.calls == []
+
+
+def test_refresh_resolves_and_caches_the_person_id(service):
+    assert service.refresh_due() == ['linkedin person id']
+    assert service.linkedin_person_id() == 'abc123'
+    # Cached: the next refresh has nothing to do
+    assert service.refresh_due() == []
+    assert len(service.transport.calls) == 1
+
+
+def test_configured_person_id_wins(service, monkeypatch):
+    monkeypatch.setenv('LINKEDIN_PERSON_ID', 'configured')
+
+    assert service.linkedin_person_id() == 'configured'
+    assert service.refresh_due() == []
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from dedup_index import QUOTE, DedupIndex, extract_quotes, minhash, normalize, similarity
+
+POST = ("Start your week with purpose. Small, consistent steps build the habits that carry you "
+        "through hard days, and every expert was once a beginner who refused to quit. #Motivation #Growth")
+REWORDED = ("Start your week with purpose! Small, consistent steps build the habits that carry you "
+            "through the hard days, and every expert was once a beginner who refused to quit. #Monday")
+UNRELATED = ("Open-source database adds vector search to its core engine, letting teams store "
+             "embeddings next to their regular tables without running a separate service. #Tech")
+
+
+@pytest.fixture
+def index(tmp_path):
+    return DedupIndex(path=str(tmp_path / 'dedup.db'), threshold=0.6, window_days=30)
+
+
+def test_normalize_drops_hashtags_urls_and_punctuation():
+    assert normalize('Hello, World! https://example.com #News') == 'hello world'
+    assert normalize('नमस्ते, दुनिया!') == 'नमस्ते दुनिया'
+
+
+def test_similarity_estimates_jaccard():
+    assert similarity(minhash(POST), minhash(POST)) == 1.0
+    assert similarity(minhash(POST), minhash(REWORDED)) > 0.6
+    assert similarity(minhash(POST), minhash(UNRELATED)) < 0.2
+
+
+def test_reworded_post_is_found(index):
+    index.add('motivational_quote', POST, slot='2026-10-01')
+
+    matches = index.find_similar(REWORDED, poster='motivational_quote', slot='2026-10-18')
+
+    assert matches and matches[0]['poster'] == 'motivational_quote'
+    assert matches[0]['slot'] == '2026-10-01'
+    assert index.find_similar(UNRELATED, poster='tech_news', slot='2026-10-18') == []
+
+
+def test_same_poster_and_slot_is_not_a_repeat_of_itself(index):
+    index.add('motivational_quote', POST, slot='2026-10-18')
+
+    assert index.find_similar(POST, poster='motivational_quote', slot='2026-10-18') == []
+    assert index.find_similar(POST, poster='indian_quotes', slot='2026-10-18')
+
+
+def test_other_slot_on_the_same_day_is_a_repeat(index):
+    index.add('world_quotes_hindi', POST, slot='2026-10-18T09:00')
+
+    assert index.find_similar(POST, poster='world_quotes_hindi', slot='2026-10-18T09:00') == []
+    matches = index.find_similar(REWORDED, poster='world_quotes_hindi', slot='2026-10-18T21:00')
+    assert matches and matches[0]['slot'] == '2026-10-18T09:00'
+
+
+def test_reused_quote_is_found_in_a_different_post(index):
+    quote = "The only way to do great work is to love what you do."
+    index.add('world_quotes_hindi', f'Today\'s thought: "{quote}" - Steve Jobs', slot='2026-10-01')
+
+    assert extract_quotes(f'“{quote}”') == [quote]
+    matches = index.find_similar(f'A new week, a timeless reminder: “{quote}” Keep going!',
+                                 poster='indian_quotes', slot='2026-10-18')
+
+    assert any(match['kind'] == QUOTE for match in matches)
+
+
+def test_history_outside_the_window_is_ignored(index):
+    index.add('motivational_quote', POST, slot='2026-01-01', created_at=time.time() - 60 * 86400)
+
+    assert index.find_similar(POST, poster='motivational_quote', slot='2026-10-18') == []
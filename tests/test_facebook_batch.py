@@ -0,0 +1,96 @@
+import json
+from urllib.parse import parse_qs
+
+from facebook_batch import FacebookBatchPublisher
+
+PAGES = {'p1': 'token1', 'p2': 'token2', 'p3': 'token3'}
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+        self.headers = {}
+
+    def json(self):
+        return self.payload
+
+
+class FakeGraph:
+    """Graph API stand-in: batch items come from a script, pages keep what was posted"""
+
+    def __init__(self, batch_items=None, batch_error=None, feed_error=None):
+        self.batch_items = batch_items
+        self.batch_error = batch_error
+        self.feed_error = feed_error
+        self.feeds = {page_id: [] for page_id in PAGES}
+        self.single_posts = []
+
+    def post(self, url, data=None, files=None):
+        if 'batch' in data:
+            if self.batch_error:
+                raise self.batch_error
+            operations = json.loads(data['batch'])
+            for operation, item in zip(operations, self.batch_items or [None] * len(operations)):
+                # Items that Graph created (200) or timed out on (None) end up on the page
+                if item is None or item['code'] == 200:
+                    page_id = operation['relative_url'].split('/')[0]
+                    message = parse_qs(operation['body'])['message'][0]
+                    self.feeds[page_id].append({'id': f"{page_id}_{len(self.feeds[page_id]) + 1}",
+                                                'message': message})
+            return FakeResponse(self.batch_items)
+        page_id = url.rsplit('/', 2)[1]
+        self.single_posts.append(page_id)
+        self.feeds[page_id].append({'id': f"{page_id}_{len(self.feeds[page_id]) + 1}", 'message': data['message']})
+        return FakeResponse({'id': self.feeds[page_id][-1]['id']})
+
+    def get(self, url, params=None):
+        if self.feed_error:
+            raise self.feed_error
+        return FakeResponse({'data': self.feeds[url.rsplit('/', 2)[1]]})
+
+
+def ok_item(post_id):
+    return {'code': 200, 'headers': [], 'body': json.dumps({'id': post_id})}
+
+
+def test_partial_failure_only_resends_pages_without_the_post():
+    throttled = {'code': 400, 'headers': [], 'body': json.dumps({'error': {'code': 613, 'message': 'slow down'}})}
+    graph = FakeGraph(batch_items=[ok_item('p1_1'), throttled, None])
+
+    results = FacebookBatchPublisher(graph).publish(PAGES, 'hello')
+
+    assert all(result['ok'] for result in results.values())
+    # p2 failed outright and is sent again; p3 timed out but its post exists
+    assert graph.single_posts == ['p2']
+    assert results['p3']['id'] == 'p3_1'
+    assert all(len(feed) == 1 for feed in graph.feeds.values())
+
+
+def test_unknown_outcome_is_left_to_the_outbox_retry():
+    graph = FakeGraph(batch_error=ConnectionError('connection reset'), feed_error=ConnectionError('still down'))
+
+    results = FacebookBatchPublisher(graph).publish(PAGES, 'hello')
+
+    assert not any(result['ok'] for result in results.values())
+    assert graph.single_posts == []
+    assert 'connection reset' in results['p1']['error']
+
+    # The outbox's later retry sends each page its post once
+    graph.batch_error = graph.feed_error = None
+    graph.batch_items = [ok_item(f"{page_id}_1") for page_id in PAGES]
+    results = FacebookBatchPublisher(graph).publish(PAGES, 'hello')
+
+    assert all(result['ok'] for result in results.values())
+    assert graph.single_posts == []
+    assert all(len(feed) == 1 for feed in graph.feeds.values())
+
+
+def test_failed_request_is_resent_once_the_pages_show_no_post():
+    graph = FakeGraph(batch_error=ConnectionError('connection refused'))
+
+    results = FacebookBatchPublisher(graph).publish(PAGES, 'hello')
+
+    assert all(result['ok'] for result in results.values())
+    assert graph.single_posts == ['p1', 'p2', 'p3']
@@ -0,0 +1,102 @@
+import re
+from datetime import datetime
+
+import pytest
+
+from cron_schedule import CronSchedule
+from feed_catalog import Feed, load_catalog
+
+ENTRY = {'name': 'morning_quotes', 'prompt': 'A quote for {weekday}', 'targets': 'twitter', 'schedule': '0 9 * * *'}
+
+
+def write_catalog(tmp_path, text):
+    path = tmp_path / 'feeds.toml'
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_feed_settings_fall_back_to_defaults():
+    feed = Feed({**ENTRY, 'targets': 'Twitter, facebook'}, {'temperature': 0.2}, 'feed #1')
+
+    assert feed.targets == ['twitter', 'facebook']
+    assert feed.temperature == 0.2
+    assert feed.poster_class.FEED is feed
+    assert feed.messages(datetime(2026, 10, 18))[-1]['content'] == 'A quote for Sunday'
+
+
+@pytest.mark.parametrize('override, error', [
+    ({'schedule': '0 25 * * *'}, "bad schedule '0 25 * * *'"),
+    ({'schedule': 'daily'}, 'expected 5 fields'),
+    ({'targets': 'twitter,myspace'}, 'targets must be some of'),
+    ({'targets': []}, 'missing targets'),
+    ({'name': 'Morning Quotes'}, 'must be lowercase'),
+    ({'colour': 'blue'}, 'unknown setting(s) colour'),
+    ({'prompt': 'Quote for {tomorrow}'}, 'unknown placeholder {tomorrow}'),
+    ({'prompt': 'Summarize {headlines}'}, 'need news_feeds'),
+])
+def test_invalid_feed_is_rejected(override, error):
+    with pytest.raises(ValueError, match=re.escape(error)):
+        Feed({**ENTRY, **override}, {}, 'feed #1')
+
+
+def test_load_catalog_applies_defaults(tmp_path):
+    path = write_catalog(tmp_path, """
+[defaults]
+max_tokens = 120
+
+[[feeds]]
+name = "morning_quotes"
+prompt = "A quote for {weekday}"
+targets = ["twitter", "linkedin"]
+schedule = "0 9 * * 1-5"
+""")
+
+    [feed] = load_catalog(path)
+    assert (feed.name, feed.targets, feed.max_tokens) == ('morning_quotes', ['twitter', 'linkedin'], 120)
+
+
+def test_duplicate_feed_name_is_rejected(tmp_path):
+    feed = '\n[[feeds]]\nname = "quotes"\nprompt = "A quote"\ntargets = "twitter"\nschedule = "0 9 * * *"\n'
+    path = write_catalog(tmp_path, feed * 2)
+
+    with pytest.raises(ValueError, match='duplicate feed name'):
+        load_catalog(path)
+
+
+def test_unknown_default_is_rejected(tmp_path):
+    path = write_catalog(tmp_path, '[defaults]\nshedule = "0 9 * * *"\n')
+
+    with pytest.raises(ValueError, match='defaults: unknown setting'):
+        load_catalog(path)
+
+
+@pytest.mark.parametrize('expression, moment, expected', [
+    ('*/15 * * * *', datetime(2026, 10, 18, 10, 45), True),
+    ('*/15 * * * *', datetime(2026, 10, 18, 10, 50), False),
+    ('0 9-17/4 * * *', datetime(2026, 10, 18, 13, 0), True),
+    ('0 9-17/4 * * *', datetime(2026, 10, 18, 15, 0), False),
+    ('30 8 * * 1-5', datetime(2026, 10, 16, 8, 30), True),     # Friday
+    ('30 8 * * 1-5', datetime(2026, 10, 18, 8, 30), False),    # Sunday
+    ('0 0 * * 7', datetime(2026, 10, 18, 0, 0), True),         # 7 is Sunday too
+    # Both day fields restricted: either one matching is enough
+    ('0 12 1 * 1', datetime(2026, 10, 19, 12, 0), True),       # a Monday
+    ('0 12 1 * 1', datetime(2026, 10, 1, 12, 0), True),        # the 1st, a Thursday
+    ('0 12 1 * 1', datetime(2026, 10, 2, 12, 0), False),
+    ('0 12 * 2 *', datetime(2026, 10, 18, 12, 0), False),
+])
+def test_cron_schedule_matches(expression, moment, expected):
+    assert CronSchedule(expression).matches(moment) is expected
+
+
+def test_cron_schedule_next_run():
+    schedule = CronSchedule('0 9,21 * * *')
+
+    assert schedule.next_run(datetime(2026, 10, 18, 9, 0, 30)) == datetime(2026, 10, 18, 21, 0)
+    assert schedule.next_run(datetime(2026, 10, 18, 22, 0)) == datetime(2026, 10, 19, 9, 0)
+    assert CronSchedule('0 0 31 2 *').next_run(datetime(2026, 10, 18)) is None
+
+
+@pytest.mark.parametrize('expression', ['* * * *', '60 * * * *', '*/0 * * * *', '0 9 * * 8', '0 17-9 * * *'])
+def test_invalid_cron_expression(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
@@ -0,0 +1,74 @@
+import time
+from contextlib import closing
+from datetime import date
+
+import pytest
+
+from generation_cache import GenerationCache
+
+MESSAGES = [{'role': 'user', 'content': 'Write a quote for Monday'}]
+REQUEST = dict(poster='quotes', messages=MESSAGES, model='gpt-4', temperature=0.7, max_tokens=200,
+               slot='2026-10-19T09:00')
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return GenerationCache(path=str(tmp_path / 'cache.db'))
+
+
+def test_same_request_hits(cache):
+    cache.put(GenerationCache.make_key(**REQUEST), 'quotes', 'gpt-4', 'Cached quote')
+
+    assert cache.get(GenerationCache.make_key(**{**REQUEST, 'messages': [dict(MESSAGES[0])]})) == 'Cached quote'
+
+
+@pytest.mark.parametrize('change', [
+    {'poster': 'tech_news'},
+    {'messages': [{'role': 'user', 'content': 'Write a quote for Tuesday'}]},
+    {'messages': [{'role': 'system', 'content': 'Be brief'}] + MESSAGES},
+    {'model': 'gpt-4o-mini'},
+    {'temperature': 0.8},
+    {'max_tokens': 100},
+    {'slot': '2026-10-19T21:00'},
+    {'extra': 'budget=140'},
+])
+def test_any_key_component_changing_misses(cache, change):
+    cache.put(GenerationCache.make_key(**REQUEST), 'quotes', 'gpt-4', 'Cached quote')
+
+    assert cache.get(GenerationCache.make_key(**{**REQUEST, **change})) is None
+
+
+def test_extra_variants_are_cached_separately(cache):
+    short = GenerationCache.make_key(**REQUEST, extra='budget=140')
+    cache.put(short, 'quotes', 'gpt-4', 'Short quote')
+
+    assert cache.get(short) == 'Short quote'
+    assert cache.get(GenerationCache.make_key(**REQUEST, extra='budget=280')) is None
+
+
+def test_slot_defaults_to_today(cache):
+    today = GenerationCache.make_key(**{**REQUEST, 'slot': date.today().isoformat()})
+
+    assert GenerationCache.make_key(**{**REQUEST, 'slot': None}) == today
+
+
+def test_expired_entry_misses(tmp_path):
+    cache = GenerationCache(path=str(tmp_path / 'cache.db'), ttl_hours=1)
+    key = GenerationCache.make_key(**REQUEST)
+    cache.put(key, 'quotes', 'gpt-4', 'Old quote')
+
+    with closing(cache._connect()) as conn, conn:
+        conn.execute("UPDATE generations SET created_at = ?", (time.time() - 2 * 3600,))
+    assert cache.get(key) is None
+
+
+def test_oldest_entries_are_evicted(tmp_path):
+    cache = GenerationCache(path=str(tmp_path / 'cache.db'), max_entries=2)
+    keys = [GenerationCache.make_key(**{**REQUEST, 'slot': f"2026-10-{day}T09:00"}) for day in (19, 20, 21)]
+    for key in keys:
+        cache.put(key, 'quotes', 'gpt-4', key)
+        time.sleep(0.01)
+
+    assert [cache.get(key) for key in keys] == [None, keys[1], keys[2]]
+    cache.clear()
+    assert cache.get(keys[2]) is None
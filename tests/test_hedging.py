@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from hedging import HEDGE_WON, NOT_NEEDED, PRIMARY_WON, HedgeCancelled, HedgePolicy
+
+
+def make_policy(**options):
+    options = dict(dict(enabled=True, min_samples=5, initial_delay=0.05, min_delay=0.01, max_hedge_rate=1.0),
+                   **options)
+    return HedgePolicy(**options)
+
+
+def slow(value, seconds, cancelled_calls=None):
+    def call(cancelled):
+        if cancelled.wait(seconds):
+            if cancelled_calls is not None:
+                cancelled_calls.append(value)
+            raise HedgeCancelled(value)
+        return value
+    return call
+
+
+def failing(message):
+    def call(cancelled):
+        raise RuntimeError(message)
+    return call
+
+
+def test_hedge_delay_uses_the_initial_delay_until_enough_samples():
+    policy = make_policy(initial_delay=20, min_delay=2)
+
+    assert policy.hedge_delay('gpt-4') == 20
+    for seconds in (1, 2, 3, 4, 10):
+        policy.observe('gpt-4', seconds)
+    # 90th percentile of the recent latencies, never below min_delay
+    assert policy.hedge_delay('gpt-4') == 10
+    assert policy.hedge_delay('gpt-4o-mini') == 20
+
+
+def test_hedge_delay_respects_the_minimum():
+    policy = make_policy(min_delay=2)
+    for _ in range(5):
+        policy.observe('gpt-4', 0.5)
+
+    assert policy.hedge_delay('gpt-4') == 2
+
+
+def test_fast_primary_sends_no_hedge():
+    policy = make_policy()
+    hedged = threading.Event()
+
+    result, outcome = policy.run('gpt-4', lambda cancelled: 'primary', lambda cancelled: hedged.set())
+
+    assert (result, outcome) == ('primary', NOT_NEEDED)
+    assert not hedged.is_set()
+
+
+def test_slow_primary_loses_to_the_hedge():
+    policy = make_policy()
+
+    assert policy.run('gpt-4', slow('primary', 1.0), slow('hedge', 0)) == ('hedge', HEDGE_WON)
+    assert policy.hedge_rate() == 1.0
+
+
+def test_losing_request_is_cancelled():
+    policy = make_policy()
+    cancelled_calls = []
+
+    assert policy.run('gpt-4', slow('primary', 5.0, cancelled_calls), slow('hedge', 0)) == ('hedge', HEDGE_WON)
+    deadline = time.monotonic() + 1
+    while not cancelled_calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cancelled_calls == ['primary']
+
+
+def test_slow_primary_can_still_win():
+    policy = make_policy()
+
+    assert policy.run('gpt-4', slow('primary', 0.1), slow('hedge', 1.0)) == ('primary', PRIMARY_WON)
+
+
+def test_failed_primary_is_hedged_at_once():
+    policy = make_policy(initial_delay=5)
+    started = time.monotonic()
+
+    assert policy.run('gpt-4', failing('HTTP 500'), lambda cancelled: 'hedge') == ('hedge', HEDGE_WON)
+    assert time.monotonic() - started < 1
+
+
+def test_both_failing_raises_the_last_error():
+    policy = make_policy()
+
+    with pytest.raises(RuntimeError, match='hedge down'):
+        policy.run('gpt-4', failing('primary down'), failing('hedge down'))
+
+
+def test_no_hedge_above_the_max_hedge_rate():
+    policy = make_policy(max_hedge_rate=0.0)
+    policy._record_hedged(True)
+    hedged = threading.Event()
+
+    result, outcome = policy.run('gpt-4', slow('primary', 0.1), lambda cancelled: hedged.set())
+
+    assert (result, outcome) == ('primary', NOT_NEEDED)
+    assert not hedged.is_set()
@@ -0,0 +1,113 @@
+import json
+from email.parser import BytesParser
+from email.policy import default
+
+import pytest
+
+from media_upload import MediaSource, MediaUploadError, UploadStore, upload_facebook_video, upload_twitter_media
+
+DATA = bytes(range(256)) * 40    # 10240 bytes
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.payload = payload or {}
+        self.text = json.dumps(self.payload)
+        self.headers = {}
+
+    def json(self):
+        return self.payload
+
+
+def form_fields(data, headers):
+    """Fields of a streamed multipart body, read the way requests sends it"""
+    body = b''.join(iter(lambda: data.read(1000), b''))
+    assert len(body) == len(data)
+    message = BytesParser(policy=default).parsebytes(
+        f"Content-Type: {headers['Content-Type']}\r\n\r\n".encode() + body)
+    return {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+            for part in message.iter_parts()}
+
+
+class FakeTwitterUpload:
+    def __init__(self, fail_segment=None):
+        self.fail_segment = fail_segment
+        self.commands = []
+        self.segments = {}
+
+    def post(self, url, auth=None, data=None, headers=None):
+        if isinstance(data, dict):
+            self.commands.append(data['command'])
+            if data['command'] == 'INIT':
+                return FakeResponse(202, {'media_id_string': 'm1', 'expires_after_secs': 3600})
+            return FakeResponse(201, {'media_id_string': 'm1'})
+        fields = form_fields(data, headers)
+        segment = int(fields['segment_index'])
+        self.commands.append(f"APPEND {segment}")
+        if segment == self.fail_segment:
+            return FakeResponse(503, {'error': 'over capacity'})
+        self.segments[segment] = fields['media']
+        return FakeResponse(204)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(path=str(tmp_path / 'uploads.db'))
+
+
+def test_interrupted_twitter_upload_resumes_at_the_failed_segment(store):
+    source = MediaSource.from_bytes(DATA, 'clip.mp4')
+    interrupted = FakeTwitterUpload(fail_segment=2)
+    with pytest.raises(MediaUploadError):
+        upload_twitter_media(interrupted, None, source, store=store, chunk_size=4096)
+
+    resumed = FakeTwitterUpload()
+    media_id = upload_twitter_media(resumed, None, source, store=store, chunk_size=4096)
+
+    assert media_id == 'm1'
+    assert interrupted.commands == ['INIT', 'APPEND 0', 'APPEND 1', 'APPEND 2']
+    # No new INIT: the stored session continues with the segment that failed
+    assert resumed.commands == ['APPEND 2', 'FINALIZE']
+    uploaded = {**interrupted.segments, **resumed.segments}
+    assert b''.join(uploaded[index] for index in sorted(uploaded)) == DATA
+    assert store.load(store.make_key('twitter', 'default', source.fingerprint))['media_id'] == 'm1'
+
+
+class FakeFacebookUpload:
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.phases = []
+        self.received = {}
+
+    def post(self, url, data=None, headers=None):
+        if isinstance(data, dict):
+            self.phases.append(data['upload_phase'])
+            if data['upload_phase'] == 'start':
+                return FakeResponse(200, {'upload_session_id': 's1', 'video_id': 'v1',
+                                          'start_offset': '0', 'end_offset': '4000'})
+            return FakeResponse(200, {'success': True})
+        fields = form_fields(data, headers)
+        start = int(fields['start_offset'])
+        self.phases.append(f"transfer {start}")
+        if start == self.fail_at:
+            return FakeResponse(500, {'error': {'message': 'try again'}})
+        self.received[start] = fields['video_file_chunk']
+        end = min(len(DATA), start + len(fields['video_file_chunk']))
+        return FakeResponse(200, {'start_offset': str(end), 'end_offset': str(min(len(DATA), end + 4000))})
+
+
+def test_interrupted_facebook_transfer_resumes_at_the_acknowledged_offset(store):
+    source = MediaSource.from_bytes(DATA, 'clip.mp4')
+    interrupted = FakeFacebookUpload(fail_at=8000)
+    with pytest.raises(MediaUploadError):
+        upload_facebook_video(interrupted, 'page1', 'token', source, store=store)
+
+    resumed = FakeFacebookUpload()
+    video_id = upload_facebook_video(resumed, 'page1', 'token', source, store=store)
+
+    assert video_id == 'v1'
+    assert interrupted.phases == ['start', 'transfer 0', 'transfer 4000', 'transfer 8000']
+    assert resumed.phases == ['transfer 8000', 'finish']
+    received = {**interrupted.received, **resumed.received}
+    assert b''.join(received[offset] for offset in sorted(received)) == DATA
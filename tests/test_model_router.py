@@ -0,0 +1,83 @@
+import pytest
+
+from model_router import ModelRouter, parse_fallbacks, parse_routes
+
+
+@pytest.fixture
+def router():
+    return ModelRouter(routes={}, fallbacks={}, latency_threshold=10, error_threshold=0.5, window=600, min_calls=3)
+
+
+def test_parse_routes_and_fallbacks():
+    assert parse_routes('hindi_news:facebook=gpt-4o, *:twitter=gpt-4o-mini,broken') == {
+        ('hindi_news', 'facebook'): 'gpt-4o',
+        ('*', 'twitter'): 'gpt-4o-mini',
+    }
+    assert parse_fallbacks('gpt-4=gpt-4o, bad') == {'gpt-4': 'gpt-4o'}
+
+
+def test_most_specific_route_wins():
+    router = ModelRouter(routes={('hindi_news', 'facebook'): 'custom', ('hindi_news', '*'): 'poster-wide'},
+                         fallbacks={})
+
+    assert router.route('hindi_news', 'facebook', 'default') == 'custom'
+    assert router.route('hindi_news', 'linkedin', 'default') == 'poster-wide'
+    assert router.route('tech_news', 'twitter') == 'gpt-4o-mini'
+    assert router.route('tech_news', 'email') == 'gpt-4'
+
+
+def test_feed_model_beats_wildcard_routes_but_not_poster_routes():
+    router = ModelRouter(routes={('hindi_news', 'facebook'): 'poster-route', ('*', 'linkedin'): 'wildcard'},
+                         fallbacks={})
+
+    assert router.route('tech_news', 'twitter', 'feed-model') == 'feed-model'
+    assert router.route('tech_news', 'linkedin', 'feed-model') == 'feed-model'
+    assert router.route('tech_news', 'linkedin') == 'wildcard'
+    assert router.route('hindi_news', 'facebook', 'feed-model') == 'poster-route'
+
+
+def test_healthy_model_is_kept(router):
+    for _ in range(5):
+        router.observe('gpt-4', 2.0)
+
+    assert router.select('tech_news', 'linkedin', 'gpt-4') == 'gpt-4'
+
+
+def test_failing_model_falls_back(router):
+    for ok in (False, False, True):
+        router.observe('gpt-4', 1.0, ok=ok)
+
+    assert router.health_problem('gpt-4') == '67% errors'
+    assert router.select('tech_news', 'linkedin', 'gpt-4') == 'gpt-4o'
+
+
+def test_slow_model_falls_back_down_the_chain(router):
+    for model in ('gpt-4', 'gpt-4o'):
+        for _ in range(3):
+            router.observe(model, 45.0)
+
+    assert router.select('tech_news', 'linkedin', 'gpt-4') == 'gpt-4o-mini'
+
+
+def test_stays_on_the_configured_model_when_every_fallback_is_unhealthy(router):
+    for model in ('gpt-4', 'gpt-4o', 'gpt-4o-mini'):
+        for _ in range(3):
+            router.observe(model, 1.0, ok=False)
+
+    assert router.select('tech_news', 'linkedin', 'gpt-4') == 'gpt-4'
+
+
+def test_too_few_calls_are_not_judged(router):
+    router.observe('gpt-4', 1.0, ok=False)
+    router.observe('gpt-4', 1.0, ok=False)
+
+    assert router.health_problem('gpt-4') is None
+
+
+def test_history_ages_out_of_the_window():
+    router = ModelRouter(routes={}, fallbacks={}, window=0.01, min_calls=1)
+    router.observe('gpt-4', 1.0, ok=False)
+    router._calls['gpt-4'][0] = (router._calls['gpt-4'][0][0] - 1,) + router._calls['gpt-4'][0][1:]
+
+    assert router.health('gpt-4') == (0, None, 0.0)
+    assert router.select('tech_news', 'linkedin', 'gpt-4') == 'gpt-4'
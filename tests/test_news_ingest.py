@@ -0,0 +1,169 @@
+import os
+import pathlib
+from email.utils import parsedate_to_datetime
+
+from conftest import FIXTURE_FEEDS
+from news_ingest import FETCHED, NOT_MODIFIED, ArticleStore, NewsIngest, parse_feed
+
+
+def read_chunks(name, size=512):
+    with open(os.path.join(FIXTURE_FEEDS, name), 'rb') as handle:
+        return list(iter(lambda: handle.read(size), b''))
+
+
+def feed_url(name):
+    return pathlib.Path(FIXTURE_FEEDS, name).as_uri()
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b'', headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def iter_content(self, size):
+        return iter([self.body[i:i + size] for i in range(0, len(self.body), size)])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeTransport:
+    """Serves one feed: 200 with validators, then 304 when they come back"""
+
+    ETAG = '"v1"'
+    LAST_MODIFIED = 'Sun, 18 Oct 2026 06:00:00 GMT'
+
+    def __init__(self, body):
+        self.body = body
+        self.requests = []
+
+    def get(self, url, headers=None, stream=False):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get('If-None-Match') == self.ETAG:
+            return FakeResponse(304)
+        return FakeResponse(200, self.body, {'ETag': self.ETAG, 'Last-Modified': self.LAST_MODIFIED})
+
+
+def make_ingest(tmp_path, **options):
+    options.setdefault('max_age_hours', 0)   # the fixtures are dated, so don't age them out
+    return NewsIngest(store=ArticleStore(str(tmp_path / 'news.db')), **options)
+
+
+def test_parse_rss_fixture():
+    title, articles = parse_feed(read_chunks('tech.xml'))
+
+    assert title == 'Example Tech Wire'
+    assert len(articles) == 8
+    first = articles[0]
+    assert first['title'] == 'Open-source database adds vector search to its core engine'
+    assert first['link'] == 'https://example.com/tech/1'
+    assert first['guid'] == 'tech-1'
+    # HTML in descriptions is reduced to plain text
+    assert first['summary'].startswith("The project's latest release")
+    assert '<p>' not in first['summary']
+    assert first['published_at'] == parsedate_to_datetime('Sun, 18 Oct 2026 06:00:00 GMT').timestamp()
+
+
+def test_parse_atom_fixture():
+    title, articles = parse_feed(read_chunks('ai.atom'))
+
+    assert title == 'Example AI Research Digest'
+    assert len(articles) == 6
+    first = articles[0]
+    assert first['title'] == 'Research lab releases small open-weight model tuned for code'
+    assert first['link'] == 'https://example.org/ai/1'
+    assert first['guid'] == 'tag:example.com,2026:ai-1'
+    assert first['published_at'] == parsedate_to_datetime('Sun, 18 Oct 2026 05:00:00 GMT').timestamp()
+
+
+def test_parse_rss1_fixture():
+    title, articles = parse_feed(read_chunks('science.rdf'))
+
+    assert title == 'Example Science Notes'
+    assert articles and all(article['title'] and article['link'] for article in articles)
+
+
+def test_parse_stops_after_max_items():
+    _title, articles = parse_feed(read_chunks('tech.xml'), max_items=3)
+
+    assert [article['guid'] for article in articles] == ['tech-1', 'tech-2', 'tech-3']
+
+
+def test_not_modified_keeps_cached_items(tmp_path):
+    with open(os.path.join(FIXTURE_FEEDS, 'tech.xml'), 'rb') as handle:
+        transport = FakeTransport(handle.read())
+    ingest = make_ingest(tmp_path, transport=transport, refresh_minutes=0)
+    url = 'https://example.com/tech/feed.xml'
+
+    first = ingest.refresh([url])
+    second = ingest.refresh([url])
+
+    assert first[FETCHED] == 1 and first['articles'] == 8
+    assert second[NOT_MODIFIED] == 1 and second['articles'] == 0
+    assert transport.requests[1]['If-None-Match'] == FakeTransport.ETAG
+    assert transport.requests[1]['If-Modified-Since'] == FakeTransport.LAST_MODIFIED
+    articles = ingest.top_articles('test_feed', urls=[url], limit=10)
+    assert len(articles) == 8
+    assert articles[0]['source'] == 'Example Tech Wire'
+
+
+def test_recently_checked_feed_is_not_fetched_again(tmp_path):
+    with open(os.path.join(FIXTURE_FEEDS, 'tech.xml'), 'rb') as handle:
+        transport = FakeTransport(handle.read())
+    ingest = make_ingest(tmp_path, transport=transport, refresh_minutes=15)
+
+    ingest.refresh(['https://example.com/tech/feed.xml'])
+    counts = ingest.refresh(['https://example.com/tech/feed.xml'])
+
+    assert len(transport.requests) == 1
+    assert counts['skipped'] == 1
+
+
+def test_top_articles_takes_turns_between_sources(tmp_path):
+    ingest = make_ingest(tmp_path)
+    tech, ai = feed_url('tech.xml'), feed_url('ai.atom')
+
+    articles = ingest.top_articles('test_feed', urls=[tech, ai], limit=4)
+
+    assert len(articles) == 4
+    sources = [article['source'] for article in articles]
+    assert sorted(sources) == sorted(['Example Tech Wire', 'Example AI Research Digest'] * 2)
+    assert sources[0] != sources[1] and sources[2] != sources[3]
+    # Newest first within each source
+    for source in set(sources):
+        times = [article['published_at'] for article in articles if article['source'] == source]
+        assert times == sorted(times, reverse=True)
+
+
+def test_top_articles_limit_and_default(tmp_path):
+    ingest = make_ingest(tmp_path, top_items=5)
+    tech, ai = feed_url('tech.xml'), feed_url('ai.atom')
+
+    assert len(ingest.top_articles('test_feed', urls=[tech, ai])) == 5
+    assert len(ingest.top_articles('test_feed', urls=[tech], limit=2)) == 2
+    assert ingest.top_articles('test_feed', urls=[]) == []
+
+
+def test_top_articles_offers_a_shared_story_once(tmp_path):
+    copy = tmp_path / 'copy.xml'
+    copy.write_bytes(pathlib.Path(FIXTURE_FEEDS, 'tech.xml').read_bytes()
+                     .replace(b'Example Tech Wire', b'Example Mirror'))
+    ingest = make_ingest(tmp_path)
+
+    articles = ingest.top_articles('test_feed', urls=[feed_url('tech.xml'), copy.as_uri()], limit=20)
+
+    titles = [article['title'] for article in articles]
+    assert len(titles) == len(set(titles)) == 8
+
+
+def test_sources_env_override(monkeypatch):
+    monkeypatch.setenv('NEWS_FEEDS_TEST_FEED', ' https://a.example/feed , https://b.example/feed,')
+
+    assert NewsIngest.sources('test_feed', ['https://default.example/feed']) == \
+        ['https://a.example/feed', 'https://b.example/feed']
+    monkeypatch.delenv('NEWS_FEEDS_TEST_FEED')
+    assert NewsIngest.sources('test_feed', ('https://default.example/feed',)) == ['https://default.example/feed']
@@ -0,0 +1,126 @@
+from datetime import datetime
+
+import pytest
+
+from outbox import FAILED, PENDING, PUBLISHED, Outbox, current_delivery, slot_key
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(path=str(tmp_path / 'outbox.db'), max_attempts=3, base_delay=30, max_delay=3600)
+
+
+def test_published_delivery_is_not_sent_again(outbox):
+    sent = []
+    publishers = {'twitter': lambda content: sent.append(content) or True}
+
+    first = outbox.guard('tech_news', 'first post', publishers, slot='2026-10-18T09:00')
+    assert first['twitter']('first post') is True
+    second = outbox.guard('tech_news', 'second post', publishers, slot='2026-10-18T09:00')
+    assert second['twitter']('second post') is True
+
+    assert sent == ['first post']
+
+
+def test_rerun_reuses_the_slots_content(outbox):
+    keys = outbox.record('tech_news', 'original', [('linkedin', 'me')], slot='2026-10-18T09:00')
+    again = outbox.record('tech_news', 'regenerated', [('linkedin', 'me')], slot='2026-10-18T09:00')
+
+    assert again == keys
+    assert outbox.get_content(keys[('linkedin', 'me')]) == 'original'
+
+
+def test_slots_of_one_day_are_separate(outbox):
+    morning = slot_key(datetime(2026, 10, 18, 9, 0))
+    evening = slot_key(datetime(2026, 10, 18, 21, 0))
+    sent = []
+    publishers = {'facebook': lambda content: sent.append(content) or True}
+
+    for slot, text in ((morning, 'morning post'), (evening, 'evening post')):
+        outbox.guard('world_quotes_hindi', text, publishers, slot=slot)['facebook'](text)
+
+    assert (morning, evening) == ('2026-10-18T09:00', '2026-10-18T21:00')
+    assert sent == ['morning post', 'evening post']
+
+
+def test_manual_runs_default_to_todays_slot(outbox):
+    keys = outbox.record('tech_news', 'post', [('twitter', None)])
+
+    assert keys == outbox.record('tech_news', 'post', [('twitter', None)],
+                                 slot=datetime.now().date().isoformat())
+
+
+def test_failed_delivery_is_retried_with_backoff(outbox):
+    keys = outbox.record('tech_news', 'post', [('twitter', 'acct')], slot='s1')
+    key = keys[('twitter', 'acct')]
+    assert outbox.claim(key)
+
+    assert outbox.mark_failed(key, 'HTTP 500') == PENDING
+    assert outbox.get_state(key) == PENDING
+    # Not due until its backoff has passed
+    assert outbox.due_deliveries() == []
+    assert not outbox.claim(key)
+    assert outbox.claim(key, force=True)
+
+
+def test_gives_up_after_max_attempts(outbox):
+    key = outbox.record('tech_news', 'post', [('twitter', 'acct')], slot='s1')[('twitter', 'acct')]
+
+    states = [outbox.mark_failed(key, 'HTTP 500') for _ in range(3)]
+
+    assert states == [PENDING, PENDING, FAILED]
+    assert outbox.get_state(key) == FAILED
+
+
+def test_published_delivery_cannot_be_claimed(outbox):
+    key = outbox.record('tech_news', 'post', [('twitter', 'acct')], slot='s1')[('twitter', 'acct')]
+    outbox.mark_published(key)
+
+    assert outbox.get_state(key) == PUBLISHED
+    assert not outbox.claim(key, force=True)
+
+
+@pytest.mark.parametrize('attempts, low, high', [(1, 15, 30), (2, 30, 60), (3, 60, 120), (20, 1800, 3600)])
+def test_backoff_doubles_with_jitter_up_to_the_cap(outbox, attempts, low, high):
+    delays = [outbox.backoff_delay(attempts) for _ in range(50)]
+
+    assert all(low <= delay <= high for delay in delays)
+
+
+def test_guard_batch_skips_published_targets(outbox):
+    calls = []
+
+    def publish_batch(content, targets):
+        calls.append(list(targets))
+        return {target: target != 'p2' for target in targets}
+
+    deliver = outbox.guard_batch('hindi_news', 'post', 'facebook', ['p1', 'p2', 'p3'], publish_batch, slot='s1')
+    assert deliver('post') is False
+    deliver = outbox.guard_batch('hindi_news', 'post', 'facebook', ['p1', 'p2', 'p3'], publish_batch, slot='s1')
+    assert deliver('post') is False
+
+    assert calls == [['p1', 'p2', 'p3'], ['p2']]
+
+
+def test_retry_resumes_a_partly_sent_delivery(outbox):
+    sent = []
+    fail_at = [2]
+
+    def publish_thread(content):
+        key = current_delivery()
+        parts = content.split('|')
+        for position in range(len(outbox.posted_parts(key)), len(parts)):
+            if position == fail_at[0]:
+                raise ConnectionError('timeout')
+            sent.append(parts[position])
+            outbox.record_part(key, position, f"id{position}")
+        return True
+
+    deliver = outbox.guard('tech_news', 'one|two|three', {'twitter': publish_thread}, slot='s1')['twitter']
+    assert deliver('one|two|three') is False
+    fail_at[0] = None
+    deliver = outbox.guard('tech_news', 'one|two|three', {'twitter': publish_thread}, slot='s1')['twitter']
+    assert deliver('one|two|three') is True
+
+    assert sent == ['one', 'two', 'three']
+    assert current_delivery() is None
@@ -0,0 +1,69 @@
+import threading
+import time
+
+from platform_fanout import all_published, get_platform_timeout, publish_to_platforms
+
+
+def test_one_platform_raising_does_not_stop_the_others():
+    def broken(content):
+        raise RuntimeError('401 Unauthorized')
+
+    report = publish_to_platforms({'twitter': broken, 'linkedin': lambda content: True,
+                                   'facebook': lambda content: False}, 'Hello')
+
+    statuses = {platform: outcome['status'] for platform, outcome in report.items()}
+    assert statuses == {'twitter': 'error', 'linkedin': 'published', 'facebook': 'failed'}
+    assert report['twitter']['error'] == '401 Unauthorized'
+    assert report['linkedin']['error'] is None
+    assert not all_published(report)
+
+
+def test_slow_platform_times_out_without_holding_up_the_rest():
+    release = threading.Event()
+    delivered = []
+
+    def hanging(content):
+        release.wait(5)
+        return True
+
+    def quick(content):
+        delivered.append(content)
+        return True
+
+    started = time.monotonic()
+    try:
+        report = publish_to_platforms({'facebook': hanging, 'twitter': quick}, 'Hello',
+                                      timeouts={'facebook': 0.2})
+    finally:
+        release.set()
+
+    assert time.monotonic() - started < 2
+    assert report['facebook']['status'] == 'timeout'
+    assert report['facebook']['error'] == 'No response within 0.2s'
+    assert report['twitter']['status'] == 'published'
+    assert delivered == ['Hello']
+
+
+def test_platforms_publish_concurrently():
+    barrier = threading.Barrier(3, timeout=2)
+
+    def publish(content):
+        # Only passes once all three platforms are publishing at the same time
+        barrier.wait()
+        return True
+
+    report = publish_to_platforms({'twitter': publish, 'linkedin': publish, 'facebook': publish}, 'Hello')
+
+    assert all_published(report)
+
+
+def test_no_publishers():
+    assert publish_to_platforms({}, 'Hello') == {}
+    assert not all_published({})
+
+
+def test_platform_timeout_env_override(monkeypatch):
+    assert get_platform_timeout('linkedin') == 30
+    assert get_platform_timeout('mastodon') == 60
+    monkeypatch.setenv('LINKEDIN_PUBLISH_TIMEOUT', '7.5')
+    assert get_platform_timeout('linkedin') == 7.5
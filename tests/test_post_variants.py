@@ -0,0 +1,96 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from content_generator import ContentGenerator
+from generation_cache import GenerationCache
+from hedging import HedgePolicy
+from model_router import ModelRouter
+from post_variants import VariantError, parse_variants
+from twitter_text import weighted_length
+
+PLATFORMS = ['twitter', 'linkedin']
+LIMITS = {'twitter': 280, 'linkedin': 3000}
+TWEET = "Small teams ship faster when they write things down. #Engineering"
+POST = "Writing things down is the cheapest way to scale a team. Decisions outlive meetings. " * 3
+
+
+def reply(**fields):
+    return json.dumps({'twitter_short': TWEET, 'linkedin_long': POST, 'hashtags': ['#Teams'], **fields})
+
+
+def test_valid_reply_is_parsed_with_normalized_hashtags():
+    text = '```json\n' + reply(hashtags=['Teams', '#teams', '#Deep Work', 3]) + '\n```'
+
+    variants = parse_variants(text, PLATFORMS, LIMITS)
+
+    assert variants['twitter'] == TWEET
+    assert variants['hashtags'] == ['#Teams', '#teams', '#DeepWork']
+
+
+@pytest.mark.parametrize('text, problem', [
+    ('{"twitter_short": "cut off', 'not valid JSON'),
+    ('["a list"]', 'not a JSON object'),
+    (reply(linkedin_long=None), '"linkedin_long" is missing or empty'),
+    (reply(twitter_short='  '), '"twitter_short" is missing or empty'),
+    (reply(hashtags='#Teams'), '"hashtags" is not a list'),
+    (reply(twitter_short='x' * 281), '"twitter_short" is 281 characters, over the 280 limit'),
+])
+def test_invalid_reply_names_the_problem(text, problem):
+    with pytest.raises(VariantError, match=problem):
+        parse_variants(text, PLATFORMS, LIMITS)
+
+
+def test_emoji_count_double_towards_the_twitter_limit():
+    with pytest.raises(VariantError, match='over the 280 limit'):
+        parse_variants(reply(twitter_short='🚀' * 141), PLATFORMS, LIMITS)
+    assert parse_variants(reply(twitter_short='🚀' * 141), PLATFORMS, LIMITS, check_lengths=False)
+
+
+class FakeClient:
+    """chat.completions.create that answers with scripted replies and records the requests"""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.requests = []
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **request):
+        self.requests.append(request)
+        message = SimpleNamespace(content=self.replies.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason='stop')],
+                               usage=SimpleNamespace(prompt_tokens=100, completion_tokens=200))
+
+
+def generate(tmp_path, replies):
+    client = FakeClient(replies)
+    generator = ContentGenerator('tech_news', lambda: client, cache=GenerationCache(path=str(tmp_path / 'cache.db')),
+                                 hedge_policy=HedgePolicy(enabled=False), router=ModelRouter(routes={}, fallbacks={}))
+    messages = [{'role': 'system', 'content': 'You write tech posts.'}, {'role': 'user', 'content': 'Write one.'}]
+    return generator.generate_variants(messages, None, 1000, 0.7, PLATFORMS), client
+
+
+def test_invalid_reply_gets_one_repair_request(tmp_path):
+    variants, client = generate(tmp_path, ['{"twitter_short": "cut off', reply()])
+
+    assert variants['twitter'] == TWEET
+    # Shared hashtags are added to a variant that has none
+    assert variants['linkedin'] == POST.strip() + '\n\n#Teams'
+    assert len(client.requests) == 2
+    repair = client.requests[1]['messages'][-1]['content']
+    assert 'not valid JSON' in repair
+
+
+def test_repair_still_too_long_is_trimmed_locally(tmp_path):
+    long_tweet = "Write it down. " * 30
+    variants, client = generate(tmp_path, [reply(twitter_short=long_tweet), reply(twitter_short=long_tweet)])
+
+    assert len(client.requests) == 2
+    assert weighted_length(variants['twitter']) <= 280
+    assert variants['twitter'].startswith('Write it down. Write it down.')
+
+
+def test_repair_still_malformed_raises(tmp_path):
+    with pytest.raises(VariantError, match='missing or empty'):
+        generate(tmp_path, [reply(linkedin_long=''), reply(linkedin_long='')])
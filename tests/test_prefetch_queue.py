@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from cron_schedule import CronSchedule
+from prefetch_queue import PrefetchQueue, Prefetcher, freshness_hours, upcoming_slots
+
+
+class FakeDedupIndex:
+    def __init__(self):
+        self.added = []
+
+    def add(self, poster, text, slot=None):
+        self.added.append((poster, text, slot))
+
+
+class FakePoster:
+    POSTER_NAME = 'quotes'
+    PREFETCH_FRESHNESS_HOURS = 48
+
+    def __init__(self, **options):
+        self.options = options
+        self.dedup_index = FakeDedupIndex()
+        self.generated_for = []
+        self.slots = []
+
+    def generate_content(self, now=None, slot=None):
+        self.generated_for.append(now)
+        self.slots.append(slot)
+        return f"Quote for {now:%A}"
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return PrefetchQueue(path=str(tmp_path / 'prefetch.db'), early_minutes=60)
+
+
+def test_freshness_hours_env_override(monkeypatch):
+    assert freshness_hours(FakePoster) == 48
+    monkeypatch.setenv('PREFETCH_FRESHNESS_HOURS_QUOTES', '6')
+    assert freshness_hours(FakePoster) == 6
+
+
+def test_upcoming_slots():
+    schedule = CronSchedule('0 9 * * *')
+    after = datetime(2026, 10, 18, 10, 0)
+
+    assert upcoming_slots(schedule, after, count=2) == [datetime(2026, 10, 19, 9, 0), datetime(2026, 10, 20, 9, 0)]
+    assert upcoming_slots(schedule, after, until=datetime(2026, 10, 19, 12, 0)) == [datetime(2026, 10, 19, 9, 0)]
+
+
+def test_take_returns_a_current_item_once(queue):
+    slot = datetime.now() + timedelta(minutes=30)
+    queue.put('quotes', ('both',), slot, 'prefetched', fresh_hours=24)
+
+    assert queue.has('quotes', ('both',), slot)
+    assert queue.take('quotes', ('BOTH',)) == 'prefetched'
+    assert queue.take('quotes', ('both',)) is None
+
+
+def test_take_leaves_later_slots_queued(queue):
+    later = datetime.now() + timedelta(hours=5)
+    queue.put('quotes', (), later, 'for later', fresh_hours=24)
+
+    assert queue.take('quotes', ()) is None
+    assert queue.has('quotes', (), later)
+
+
+def test_stale_item_is_dropped(queue):
+    slot = datetime.now() - timedelta(minutes=5)
+    queue.put('news', (), slot, {'twitter': 'old', 'linkedin': 'old news'}, fresh_hours=-1)
+
+    assert not queue.has('news', (), slot)
+    assert queue.take('news', ()) is None
+    assert queue.pending() == []
+
+
+def test_fill_stops_at_the_freshness_window(queue):
+    prefetcher = Prefetcher([], queue)
+    now = datetime(2026, 10, 18, 10, 0)
+    slots = upcoming_slots(CronSchedule('0 9 * * *'), now, count=5)
+    job = ('quotes', FakePoster, (), None)
+
+    assert prefetcher.fill(job, slots, now) == 2
+    poster = prefetcher.poster(FakePoster)
+    # Each slot is generated for its own date; nothing is indexed until published
+    assert poster.generated_for == slots[:2]
+    assert poster.slots == ['2026-10-19T09:00', '2026-10-20T09:00']
+    assert poster.dedup_index.added == []
+    assert poster.options['force_regenerate'] is True
+
+
+def test_fill_skips_slots_already_queued(queue):
+    prefetcher = Prefetcher([], queue)
+    now = datetime(2026, 10, 18, 10, 0)
+    slots = upcoming_slots(CronSchedule('0 9 * * *'), now, count=2)
+    job = ('quotes', FakePoster, (), None)
+
+    prefetcher.fill(job, slots, now)
+    assert prefetcher.fill(job, slots, now) == 0
+    assert len(prefetcher.poster(FakePoster).generated_for) == 2
@@ -0,0 +1,66 @@
+import pytest
+
+from outbox import Outbox
+from publishing import TwitterLinkedInMixin
+
+tweepy = pytest.importorskip('tweepy')
+
+
+class FakeResponse:
+    status_code = 201
+    headers = {}
+
+    def __init__(self, tweet_id):
+        self.tweet_id = tweet_id
+
+    def json(self):
+        return {'data': {'id': self.tweet_id}}
+
+
+class FakeTwitterClient:
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.tweets = []
+
+    def create_tweet(self, text, in_reply_to_tweet_id=None, media_ids=None):
+        if len(self.tweets) == self.fail_at:
+            raise ConnectionError('connection reset')
+        self.tweets.append((text, in_reply_to_tweet_id))
+        return FakeResponse(f"t{len(self.tweets)}")
+
+
+class FakeRateGovernor:
+    def acquire(self, platform, account):
+        return True
+
+    def observe(self, platform, account, headers, status_code):
+        pass
+
+
+class ThreadPoster(TwitterLinkedInMixin):
+    twitter_thread = True
+    twitter_account = 'acct'
+
+    def __init__(self, outbox, client):
+        self.outbox = outbox
+        self.rate_governor = FakeRateGovernor()
+        self._twitter_client = client
+
+
+def test_failed_thread_resumes_after_the_last_posted_tweet(tmp_path):
+    outbox = Outbox(path=str(tmp_path / 'outbox.db'))
+    client = FakeTwitterClient(fail_at=2)
+    poster = ThreadPoster(outbox, client)
+    content = ' '.join(f"Sentence number {number} of a long post about open source." for number in range(20))
+
+    publishers = {'twitter': poster.post_to_twitter}
+    assert outbox.guard('tech_news', content, publishers, slot='s1')['twitter'](content) is False
+    first_attempt = list(client.tweets)
+    client.fail_at = None
+    assert outbox.guard('tech_news', content, publishers, slot='s1')['twitter'](content) is True
+
+    assert len(first_attempt) == 2
+    # The retry replies to the last tweet that got out instead of starting over
+    assert client.tweets[:2] == first_attempt
+    assert client.tweets[2][1] == 't2'
+    assert len(client.tweets) == len(set(text for text, _reply in client.tweets)) > 2
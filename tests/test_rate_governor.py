@@ -0,0 +1,84 @@
+import json
+import time
+
+import pytest
+
+from rate_governor import RateGovernor, TokenBucket
+
+
+@pytest.fixture
+def governor():
+    return RateGovernor(max_wait=0, quotas={'twitter': (50, 3600), 'facebook': (200, 3600), 'linkedin': (100, 3600)})
+
+
+def test_bucket_refills_at_capacity_per_window():
+    bucket = TokenBucket(10, 100)
+    start = bucket.updated
+    bucket.tokens = 0
+
+    assert bucket.wait_time(start) == pytest.approx(10)
+    assert bucket.wait_time(start + 5) == pytest.approx(5)
+    # Float rounding of start + 10 can leave a hair under one token
+    assert bucket.wait_time(start + 10) == pytest.approx(0, abs=1e-6)
+    bucket.wait_time(start + 10_000)
+    assert bucket.tokens == 10
+
+
+def test_bucket_allows_one_request_once_a_block_ends():
+    bucket = TokenBucket(10, 100)
+    start = bucket.updated
+    bucket.tokens = 0
+    bucket.blocked_until = start + 30
+
+    assert bucket.wait_time(start + 10) == pytest.approx(20)
+    assert bucket.wait_time(start + 31) == 0
+
+
+def test_acquire_takes_tokens_until_the_bucket_is_empty():
+    governor = RateGovernor(max_wait=0, quotas={'linkedin': (2, 3600)})
+
+    assert governor.acquire('linkedin', 'me')
+    assert governor.acquire('linkedin', 'me')
+    assert not governor.acquire('linkedin', 'me')
+    # Buckets are per account
+    assert governor.acquire('linkedin', 'someone-else')
+
+
+def test_twitter_headers_set_remaining_and_block_until_reset(governor):
+    reset = time.time() + 120
+    governor.observe('twitter', 'acct', {'x-rate-limit-limit': '50', 'x-rate-limit-remaining': '3',
+                                         'x-rate-limit-reset': str(reset)})
+    assert governor._bucket('twitter', 'acct').tokens == pytest.approx(3, abs=0.01)
+
+    governor.observe('twitter', 'acct', {'x-user-limit-24hour-limit': '17', 'x-user-limit-24hour-remaining': '0',
+                                         'x-user-limit-24hour-reset': str(reset)})
+    assert governor.delay_for('twitter', 'acct') == pytest.approx(120, abs=2)
+    assert not governor.acquire('twitter', 'acct')
+
+
+def test_facebook_usage_near_the_limit_slows_down(governor):
+    governor.observe('facebook', 'page', {'X-App-Usage': json.dumps({'call_count': 90, 'total_time': 10})})
+
+    assert governor._bucket('facebook', 'page').tokens <= 200 * 0.1 + 0.01
+
+
+def test_facebook_usage_at_the_limit_blocks_until_regained(governor):
+    usage = {'123': [{'type': 'pages', 'call_count': 100, 'total_time': 20, 'total_cputime': 5,
+                      'estimated_time_to_regain_access': 5}]}
+    governor.observe('facebook', 'page', {'X-Business-Use-Case-Usage': json.dumps(usage)})
+
+    assert governor.delay_for('facebook', 'page') == pytest.approx(300, abs=2)
+
+
+def test_generic_ratelimit_headers(governor):
+    governor.observe('linkedin', 'me', {'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '0',
+                                        'X-RateLimit-Reset': '60'})
+
+    assert governor.delay_for('linkedin', 'me') == pytest.approx(60, abs=2)
+
+
+def test_429_blocks_for_retry_after(governor):
+    governor.observe('linkedin', 'me', {'Retry-After': '45'}, status_code=429)
+
+    assert governor.delay_for('linkedin', 'me') == pytest.approx(45, abs=2)
+    assert governor.delay_for('linkedin', 'other') == 0
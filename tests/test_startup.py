@@ -0,0 +1,20 @@
+import pytest
+
+from startup_benchmark import find_entry_points, measure
+
+# Entry points need their own dependencies to be importable at all
+pytest.importorskip('dotenv')
+pytest.importorskip('yaml')
+
+
+def test_entry_points_are_found():
+    assert 'scheduler_daemon' in find_entry_points()
+    assert 'news_poster' in find_entry_points()
+
+
+@pytest.mark.parametrize('module', find_entry_points())
+def test_entry_point_imports_no_heavy_modules(module):
+    result = measure(module)
+
+    assert 'error' not in result, result.get('error')
+    assert result['heavy'] == []
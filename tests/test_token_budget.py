@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+import token_budget
+from token_budget import TOKENS_PER_MESSAGE, TOKENS_PER_REPLY, TokenBudget, detect_script
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    # Per-script estimates, whether or not tiktoken is installed
+    monkeypatch.setattr(token_budget, '_tiktoken', False)
+    return TokenBudget(headroom=1.5, prompt_token_warning=10000)
+
+
+def test_detect_script():
+    assert detect_script('Today in tech news') == 'latin'
+    assert detect_script('आज की ताज़ा ख़बरें: AI और बाज़ार') == 'devanagari'
+    assert detect_script('今日のニュース') == 'other'
+    assert detect_script('1234 !!') == 'latin'
+
+
+def test_count_message_tokens_adds_chat_overhead(budget):
+    messages = [{'role': 'system', 'content': 'abcd' * 10}, {'role': 'user', 'content': 'abcd' * 5}]
+
+    assert budget.count_message_tokens(messages, 'gpt-4') == TOKENS_PER_REPLY + 2 * TOKENS_PER_MESSAGE + 10 + 5
+
+
+def test_plan_sizes_max_tokens_from_the_character_limit(budget):
+    english = [{'role': 'user', 'content': 'Write a short post about today.'}]
+    hindi = [{'role': 'user', 'content': 'आज के बारे में एक छोटी पोस्ट लिखें।'}]
+
+    english_tokens, _ = budget.plan(english, 'gpt-4', 280, 1000)
+    hindi_tokens, _ = budget.plan(hindi, 'gpt-4', 280, 1000)
+
+    assert english_tokens == math.ceil(280 / 4.0 * 1.5)
+    assert hindi_tokens == math.ceil(280 / 1.0 * 1.5)
+    assert hindi_tokens > english_tokens
+
+
+def test_plan_never_exceeds_the_cap(budget):
+    hindi = [{'role': 'user', 'content': 'आज के बारे में एक लंबी पोस्ट लिखें।'}]
+
+    assert budget.plan(hindi, 'gpt-4', 3000, 800)[0] == 800
+    assert budget.plan(hindi, 'gpt-4', None, 800)[0] == 800
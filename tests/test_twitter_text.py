@@ -0,0 +1,54 @@
+import pytest
+
+from twitter_text import ELLIPSIS, MAX_WEIGHTED_LENGTH, fit_tweet, graphemes, split_thread, weighted_length
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('hello world', 11),
+    ('नमस्ते दुनिया', len('नमस्ते दुनिया')),  # Devanagari counts one per code point
+    ('日本語', 6),                              # CJK counts double
+    ('👍', 2),
+    ('👩‍💻', 2),                                 # a ZWJ sequence is one emoji
+    ('🇮🇳', 2),                                  # so is a flag
+    ('see https://example.com/a/very/long/path/that/goes/on', 4 + 23),
+])
+def test_weighted_length(text, expected):
+    assert weighted_length(text) == expected
+
+
+def test_graphemes_keep_conjuncts_and_emoji_together():
+    assert graphemes('क्षत्रिय') == ['क्ष', 'त्रि', 'य']
+    assert graphemes('a👍🏽b') == ['a', '👍🏽', 'b']
+
+
+def test_short_text_is_unchanged():
+    assert fit_tweet('  Short and sweet #tag  ') == 'Short and sweet #tag'
+
+
+def test_fit_tweet_trims_at_a_word_and_keeps_hashtags():
+    text = ' '.join(['word'] * 100) + ' #AI #Tech'
+
+    tweet = fit_tweet(text)
+
+    assert weighted_length(tweet) <= MAX_WEIGHTED_LENGTH
+    assert tweet.endswith(ELLIPSIS + ' #AI #Tech')
+    assert set(tweet.split(ELLIPSIS)[0].split()) == {'word'}
+
+
+def test_fit_tweet_counts_cjk_double():
+    tweet = fit_tweet('日本語のテキスト' * 40, keep_hashtags=False)
+
+    assert weighted_length(tweet) <= MAX_WEIGHTED_LENGTH
+    assert len(tweet) < MAX_WEIGHTED_LENGTH // 2 + 2
+
+
+def test_split_thread_numbers_parts_within_the_limit():
+    text = ' '.join(f'sentence{index}' for index in range(120))
+
+    parts = split_thread(text)
+
+    assert len(parts) > 1
+    assert all(weighted_length(part) <= MAX_WEIGHTED_LENGTH for part in parts)
+    assert [part.rsplit(' ', 1)[1] for part in parts] == [f'{i}/{len(parts)}' for i in range(1, len(parts) + 1)]
+    words = [word for part in parts for word in part.rsplit(' ', 1)[0].split()]
+    assert words == text.split()
@@ -0,0 +1,124 @@
+import math
+import os
+import unicodedata
+
+# Typical characters per token for GPT-4 class tokenizers, used when
+# tiktoken isn't installed. Devanagari splits into far more tokens than
+# English, so a Hindi post needs several times the token budget.
+CHARS_PER_TOKEN = {
+    'latin': 4.0,
+    'devanagari': 1.0,
+    'other': 1.5,
+}
+
+# Per-message overhead added by the chat format
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+
+DEFAULT_HEADROOM = 1.5
+DEFAULT_PROMPT_TOKEN_WARNING = 2500
+
+_tiktoken = None
+
+
+def _load_tiktoken():
+    """Import tiktoken on first use; it is optional and slow to import"""
+    global _tiktoken
+    if _tiktoken is None:
+        try:
+            import tiktoken
+            _tiktoken = tiktoken
+        except ImportError:  # fall back to per-script estimates
+            _tiktoken = False
+    return _tiktoken or None
+
+
+def detect_script(text):
+    """Return the dominant writing system of a text: latin, devanagari or other"""
+    counts = {'latin': 0, 'devanagari': 0, 'other': 0}
+    for char in text:
+        if not char.isalpha():
+            continue
+        if 'ऀ' <= char <= 'ॿ':
+            counts['devanagari'] += 1
+        elif char.isascii() or unicodedata.name(char, '').startswith('LATIN'):
+            counts['latin'] += 1
+        else:
+            counts['other'] += 1
+    if not any(counts.values()):
+        return 'latin'
+    return max(counts, key=counts.get)
+
+
+class TokenBudget:
+    """Counts prompt tokens locally and sizes max_tokens for a target platform"""
+
+    def __init__(self, headroom=None, prompt_token_warning=None):
+        self.headroom = float(headroom or os.getenv('TOKEN_BUDGET_HEADROOM', DEFAULT_HEADROOM))
+        self.prompt_token_warning = int(
+            prompt_token_warning or os.getenv('PROMPT_TOKEN_WARNING', DEFAULT_PROMPT_TOKEN_WARNING)
+        )
+        self._encodings = {}
+
+    def _encoding(self, model):
+        tiktoken = _load_tiktoken()
+        if tiktoken is None:
+            return None
+        if model not in self._encodings:
+            try:
+                self._encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encodings[model] = tiktoken.get_encoding('cl100k_base')
+            except Exception:
+                # No cached BPE file and no network: stay with estimates
+                self._encodings[model] = None
+        return self._encodings[model]
+
+    def count_tokens(self, text, model):
+        """Count tokens in a text, exactly with tiktoken or by script estimate"""
+        encoding = self._encoding(model)
+        if encoding is not None:
+            return len(encoding.encode(text))
+        return math.ceil(len(text) / CHARS_PER_TOKEN[detect_script(text)])
+
+    def count_message_tokens(self, messages, model):
+        """Count the prompt tokens a chat request will be billed for"""
+        total = TOKENS_PER_REPLY
+        for message in messages:
+            total += TOKENS_PER_MESSAGE + self.count_tokens(message['content'], model)
+        return total
+
+    def chars_per_token(self, text, model):
+        """Characters per token for the script a text is written in"""
+        encoding = self._encoding(model)
+        if encoding is not None and text:
+            return len(text) / max(1, len(encoding.encode(text)))
+        return CHARS_PER_TOKEN[detect_script(text)]
+
+    def plan(self, messages, model, char_limit, cap):
+        """Return (max_tokens, prompt_tokens) for a request.
+
+        The completion budget comes from the platform character limit and
+        the prompt's chars-per-token ratio (the reply is written in the
+        same script), plus headroom, never exceeding the configured cap.
+        """
+        prompt_tokens = self.count_message_tokens(messages, model)
+        user_text = messages[-1]['content']
+
+        max_tokens = cap
+        if char_limit:
+            derived = math.ceil(char_limit / self.chars_per_token(user_text, model) * self.headroom)
+            max_tokens = min(cap, derived)
+
+        if prompt_tokens > self.prompt_token_warning:
+            print(f"[tokens] Warning: prompt is {prompt_tokens} tokens "
+                  f"(threshold {self.prompt_token_warning}). Consider trimming it.")
+        return max_tokens, prompt_tokens
+
+
+def format_usage_report(poster_name, usage, max_tokens):
+    """One-line prompt/completion split for a generation"""
+    source = "local estimate" if usage.get('estimated') else "API usage"
+    return (f"[tokens] {poster_name}: prompt {usage['prompt_tokens']} + completion "
+            f"{usage['completion_tokens']} = {usage['prompt_tokens'] + usage['completion_tokens']} "
+            f"(max_tokens {max_tokens}, {source})")
@@ -0,0 +1,172 @@
+import re
+import unicodedata
+
+# Weighted length rules from twitter-text v3 (the config Twitter itself uses)
+MAX_WEIGHTED_LENGTH = 280
+SCALE = 100
+DEFAULT_WEIGHT = 200
+WEIGHTED_RANGES = [
+    # (first code point, last code point, weight)
+    (0x0000, 0x10FF, 100),  # Latin, Greek, Cyrillic, Indic scripts incl. Devanagari, ...
+    (0x2000, 0x200D, 100),  # spaces and joiners
+    (0x2010, 0x201F, 100),  # dashes and quotes
+    (0x2032, 0x2037, 100),  # primes
+]
+URL_LENGTH = 23  # every URL is shortened to a t.co link of this length
+
+URL_PATTERN = re.compile(r'https?://\S+')
+TRAILING_HASHTAGS = re.compile(r'(?:\s*#[^\s#]+)+\s*$')
+ELLIPSIS = '…'
+
+ZWJ = '‍'
+VIRAMA = '्'  # Devanagari halant joins the next consonant into a conjunct
+
+
+def _is_emoji(char):
+    code = ord(char)
+    return (
+        0x1F000 <= code <= 0x1FAFF or   # pictographs, emoticons, flags, ...
+        0x2600 <= code <= 0x27BF or     # misc symbols and dingbats
+        0x2300 <= code <= 0x23FF or     # technical (⌚, ⏰, ...)
+        0x2B00 <= code <= 0x2BFF or     # arrows, stars (⭐)
+        code in (0xFE0F, 0x20E3)        # emoji presentation / keycap
+    )
+
+
+def _extends_cluster(char, previous):
+    """True when char belongs to the same grapheme cluster as previous"""
+    code = ord(char)
+    if unicodedata.category(char) in ('Mn', 'Mc', 'Me'):
+        return True
+    if char == ZWJ or previous == ZWJ or previous == VIRAMA:
+        return True
+    return (
+        0xFE00 <= code <= 0xFE0F or     # variation selectors
+        0x1F3FB <= code <= 0x1F3FF or   # skin tone modifiers
+        0xE0020 <= code <= 0xE007F      # tag sequences (subdivision flags)
+    )
+
+
+def graphemes(text):
+    """Split text into user-perceived characters (grapheme clusters).
+
+    Approximates Unicode extended grapheme clusters closely enough for
+    emoji ZWJ/modifier sequences, flags and Devanagari conjuncts/matras,
+    so trimming never splits a visible character.
+    """
+    clusters = []
+    previous = None
+    pending_flag = False
+    for char in text:
+        is_regional = 0x1F1E6 <= ord(char) <= 0x1F1FF
+        if clusters and (_extends_cluster(char, previous) or (is_regional and pending_flag)):
+            clusters[-1] += char
+            pending_flag = False
+        else:
+            clusters.append(char)
+            pending_flag = is_regional
+        previous = char
+    return clusters
+
+
+def _cluster_weight(cluster):
+    if any(_is_emoji(char) for char in cluster):
+        # A whole emoji sequence counts as one default-weight character
+        return DEFAULT_WEIGHT
+    total = 0
+    for char in cluster:
+        code = ord(char)
+        for start, end, weight in WEIGHTED_RANGES:
+            if start <= code <= end:
+                total += weight
+                break
+        else:
+            total += DEFAULT_WEIGHT
+    return total
+
+
+def _token_weight(token):
+    if URL_PATTERN.fullmatch(token):
+        return URL_LENGTH * SCALE
+    return sum(_cluster_weight(cluster) for cluster in graphemes(token))
+
+
+def weighted_length(text):
+    """Length of a tweet as Twitter counts it (CJK and emoji count double, URLs 23)"""
+    text = unicodedata.normalize('NFC', text)
+    total = 0
+    position = 0
+    for match in URL_PATTERN.finditer(text):
+        total += _token_weight(text[position:match.start()]) + URL_LENGTH * SCALE
+        position = match.end()
+    total += _token_weight(text[position:])
+    return total // SCALE
+
+
+def _take_words(text, budget):
+    """Longest prefix of whole words (URLs kept intact) within a weighted budget"""
+    budget *= SCALE
+    used = 0
+    kept = []
+    for token in re.split(r'(\s+)', text):
+        weight = _token_weight(token)
+        if used + weight > budget:
+            if not kept and not token.isspace():
+                # A single word longer than the budget: cut it by grapheme
+                for cluster in graphemes(token):
+                    cluster_weight = _cluster_weight(cluster)
+                    if used + cluster_weight > budget:
+                        break
+                    kept.append(cluster)
+                    used += cluster_weight
+            break
+        kept.append(token)
+        used += weight
+    return ''.join(kept).rstrip()
+
+
+def fit_tweet(text, limit=MAX_WEIGHTED_LENGTH, keep_hashtags=True):
+    """Trim text to fit in one tweet at a word boundary, keeping trailing hashtags"""
+    text = unicodedata.normalize('NFC', text.strip())
+    if weighted_length(text) <= limit:
+        return text
+
+    body, tags = text, []
+    match = TRAILING_HASHTAGS.search(text)
+    if keep_hashtags and match:
+        body = text[:match.start()].rstrip()
+        tags = match.group(0).split()
+
+    # Keep as many hashtags as fit in roughly a third of the tweet
+    while tags and weighted_length(' '.join(tags)) > limit // 3:
+        tags.pop()
+    tail = ' ' + ' '.join(tags) if tags else ''
+
+    budget = limit - weighted_length(ELLIPSIS) - weighted_length(tail)
+    trimmed = _take_words(body, budget).rstrip(' ,;:-–—')
+    return trimmed + ELLIPSIS + tail
+
+
+def split_thread(text, limit=MAX_WEIGHTED_LENGTH, numbered=True):
+    """Split text into a reply thread of tweets, breaking at word boundaries"""
+    text = unicodedata.normalize('NFC', text.strip())
+    if weighted_length(text) <= limit:
+        return [text]
+
+    # Leave room for a " 10/12" style counter on every part
+    reserve = 7 if numbered else 0
+    parts = []
+    remaining = text
+    while remaining:
+        if weighted_length(remaining) <= limit - reserve:
+            parts.append(remaining)
+            break
+        part = _take_words(remaining, limit - reserve)
+        if not part:
+            break
+        parts.append(part)
+        remaining = remaining[len(part):].lstrip()
+
+    if numbered and len(parts) > 1:
+        parts = [f"{part} {index}/{len(parts)}" for index, part in enumerate(parts, 1)]
+    return parts
@@ -1,147 +1,12 @@
-import os
-from datetime import datetime
-from openai import OpenAI
-import requests
 from dotenv import load_dotenv
+from feed_catalog import builtin_poster_class, run_poster_script
 
 # Load environment variables
 load_dotenv()
 
-class WorldQuotesHindi:
-    def __init__(self):
-        # OpenAI setup
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        
-        # Facebook setup
-        self.facebook_access_token = os.getenv('FACEBOOK_ACCESS_TOKEN')
-        self.facebook_page_id = os.getenv('FACEBOOK_PAGE_ID')
-    
-    def get_world_famous_quote_hindi(self):
-        """Generate world famous quotes in Hindi with image suggestions"""
-        today = datetime.now().strftime("%d %B %Y")
-        
-        prompt = f"""आप एक प्रेरणादायक वक्ता हैं जो दुनिया के महान नेताओं, वैज्ञानिकों, और विचारकों के प्रसिद्ध उद्धरणों को हिंदी में साझा करते हैं।
-
-आज ({today}) के लिए एक शक्तिशाली प्रेरक पोस्ट बनाएं जिसमें विश्व प्रसिद्ध उद्धरण हिंदी में हो!
-
-आपकी पोस्ट में शामिल होना चाहिए:
-
-1. **विश्व प्रसिद्ध व्यक्तित्व से उद्धरण** (हिंदी में अनुवाद के साथ):
-   - महान नेता: नेल्सन मंडेला, मार्टिन लूथर किंग, महात्मा गांधी, अब्राहम लिंकन
-   - प्रसिद्ध वैज्ञानिक: अल्बर्ट आइंस्टीन, स्टीफन हॉकिंग, मैरी क्यूरी, निकोला टेस्ला
-   - महान विचारक: सुकरात, अरस्तू, कन्फ्यूशियस, रूमी
-   - समाज सुधारक: मदर टेरेसा, स्वामी विवेकानंद, डॉ. बी.आर. अंबेडकर
-
-2. **विषय** (कोई एक चुनें):
-   - साहस और दृढ़ता
-   - ज्ञान और शिक्षा
-   - सफलता और मेहनत
-   - प्रेम और करुणा
-   - न्याय और समानता
-   - नवाचार और खोज
-   - आत्म-विश्वास और आंतरिक शक्ति
-
-3. **पोस्ट की संरचना**:
-   - एक आकर्षक शुरुआती पंक्ति (हिंदी में)
-   - मूल उद्धरण अंग्रेजी में (उद्धरण चिह्नों में)
-   - उद्धरण का हिंदी अनुवाद
-   - व्यक्ति का नाम और उनकी संक्षिप्त पहचान
-   - 2-3 पंक्तियों में प्रेरक विचार
-   - छवि सुझाव: किस प्रकार की छवि इस उद्धरण के साथ अच्छी लगेगी
-   - प्रासंगिक हैशटैग (हिंदी और अंग्रेजी दोनों)
-
-4. **इमोजी का उपयोग**: ✨💪🌟🔥💡🌍📚🎯
-
-5. **छवि सुझाव**: पोस्ट के अंत में स्पष्ट रूप से बताएं कि इस उद्धरण के लिए कौन सी छवि उपयुक्त होगी:
-   - व्यक्ति का चित्र
-   - प्रेरक पृष्ठभूमि (सूर्योदय, पहाड़, आकाश, आदि)
-   - प्रतीकात्मक छवि (किताबें, रोशनी, रास्ता, आदि)
-
-फॉर्मेट: Facebook पोस्ट (200-250 शब्द)
-
-भाषा: मुख्य रूप से हिंदी, लेकिन मूल उद्धरण अंग्रेजी में रखें और फिर हिंदी अनुवाद दें।
-
-उदाहरण संरचना:
-"[शुरुआती पंक्ति]
-
-[English Quote] - [Person Name]
-
-हिंदी अनुवाद: [Hindi translation]
-
-[प्रेरक विचार]
-
-📸 छवि सुझाव: [Image suggestion]
-
-#Motivation #Inspiration #Quotes #हिंदी #प्रेरणा"
-
-पोस्ट को प्रामाणिक, प्रेरक और हृदयस्पर्शी बनाएं!"""
-
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "आप एक प्रेरणादायक हिंदी सामग्री निर्माता हैं जो विश्व प्रसिद्ध उद्धरणों को हिंदी में साझा करते हैं। आप प्रामाणिक और प्रभावशाली सामग्री बनाते हैं।"},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800,
-                temperature=0.8
-            )
-            
-            quote_content = response.choices[0].message.content.strip()
-            return quote_content
-        
-        except Exception as e:
-            print(f"Error generating world famous quote in Hindi: {e}")
-            return None
-    
-    def post_to_facebook(self, content):
-        """Post content to Facebook Page"""
-        if not self.facebook_access_token or not self.facebook_page_id:
-            print("Facebook credentials not configured. Skipping Facebook post.")
-            return False
-        
-        url = f"https://graph.facebook.com/v18.0/{self.facebook_page_id}/feed"
-        
-        payload = {
-            'message': content,
-            'access_token': self.facebook_access_token
-        }
-        
-        try:
-            response = requests.post(url, data=payload)
-            
-            if response.status_code == 200:
-                result = response.json()
-                print(f"✓ Successfully posted to Facebook! Post ID: {result.get('id')}")
-                return True
-            else:
-                print(f"Error posting to Facebook: {response.status_code}")
-                print(f"Response: {response.text}")
-                return False
-        except Exception as e:
-            print(f"Error posting to Facebook: {e}")
-            return False
-    
-    def run(self):
-        """Main function to generate and post world famous quotes in Hindi"""
-        print("🌍 विश्व प्रसिद्ध उद्धरण हिंदी में तैयार कर रहे हैं...")
-        quote_content = self.get_world_famous_quote_hindi()
-        
-        if not quote_content:
-            print("Failed to generate quote. Exiting.")
-            return
-        
-        print("\n" + "="*50)
-        print("Generated World Famous Quote in Hindi:")
-        print("="*50)
-        print(quote_content)
-        print("="*50 + "\n")
-        
-        print("Posting to Facebook...")
-        self.post_to_facebook(quote_content)
-        
-        print("\n✓ विश्व प्रसिद्ध उद्धरण सफलतापूर्वक पोस्ट किया गया! 🎉✨")
+# Prompt, model, targets and schedule are the 'world_quotes_hindi' entry in posters.yaml
+WorldQuotesHindi = builtin_poster_class('world_quotes_hindi')
 
 if __name__ == "__main__":
-    poster = WorldQuotesHindi()
-    poster.run()
+    # python world_quotes_hindi.py [--force-regenerate] [--stream]
+    run_poster_script('world_quotes_hindi')